@@ -31,6 +31,61 @@ from plotly.subplots import make_subplots
 import tkinter as tk
 from tkinter import filedialog
 
+try:
+    from _plotly_utils.utils import convert_to_base64
+except ImportError:
+    # Older Plotly releases serialize arrays as plain lists
+    convert_to_base64 = None
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+    print("Numba not available. Using the NumPy spacecraft outline transform.")
+
+if njit is not None:
+    @njit(cache=True, fastmath=True)
+    def _square_corners(out, bodies, half_size):
+        """Write the closed, rotated and translated square of every body and frame into out."""
+        for b in range(bodies.shape[0]):
+            for i in range(bodies.shape[1]):
+                x = bodies[b, i, 0]
+                y = bodies[b, i, 1]
+                cos_rot = np.cos(bodies[b, i, 2])
+                sin_rot = np.sin(bodies[b, i, 2])
+                # Rotated half-diagonals; the four corners are +-u and +-v
+                ux = half_size * (cos_rot - sin_rot)
+                uy = half_size * (sin_rot + cos_rot)
+                vx = half_size * (cos_rot + sin_rot)
+                vy = half_size * (sin_rot - cos_rot)
+                out[b, i, 0, 0] = x - ux
+                out[b, i, 0, 1] = y - uy
+                out[b, i, 1, 0] = x + vx
+                out[b, i, 1, 1] = y + vy
+                out[b, i, 2, 0] = x + ux
+                out[b, i, 2, 1] = y + uy
+                out[b, i, 3, 0] = x - vx
+                out[b, i, 3, 1] = y - vy
+                out[b, i, 4, 0] = x - ux
+                out[b, i, 4, 1] = y - uy
+else:
+    _square_corners = None
+
+# Trace styles shared by the base figure and every animation frame; the
+# theme-dependent ones come in dark and light variants
+BODY_LINE_DARK = dict(color='white', width=2)
+BODY_LINE_LIGHT = dict(color='black', width=2)
+CHASER_FILL = 'rgba(255, 0, 0, 0.5)'
+TARGET_FILL_DARK = 'rgba(100, 100, 100, 0.5)'
+TARGET_FILL_LIGHT = 'rgba(0, 0, 0, 0.5)'
+OBSTACLE_FILL = 'rgba(0, 0, 255, 0.5)'
+BODIES_FILL = 'rgba(128, 128, 128, 0.5)'  # Shared fill when the bodies are merged
+CHASER_PATH_LINE = dict(color='rgba(255, 0, 0, 0.7)', width=2, dash='dot')
+TARGET_PATH_LINE_DARK = dict(color='rgba(120, 120, 120, 0.7)', width=2)
+TARGET_PATH_LINE_LIGHT = dict(color='rgba(0, 0, 0, 0.7)', width=2)
+OBSTACLE_PATH_LINE = dict(color='rgba(0, 0, 255, 0.7)', width=2)
+AXIS_ARROW_MARKER = dict(size=[0, 15], symbol='arrow', angleref='previous')
+
 class SpacecraftAnimator:
     """
     Create animations of spacecraft positions from logged data.
@@ -52,9 +107,13 @@ class SpacecraftAnimator:
         self.obstacle_x = None
         self.obstacle_y = None
         self.obstacle_rot = None
+        self.bodies = None
+        self.trails = None
         self.n_frames = 0
         self.spacecraft_size = 0.3
         self.max_frames = 200
+        # Draw all spacecraft as one trace with a shared fill color
+        self.merge_bodies = False
         self.skip = 1
         self.effective_frames = 0
         
@@ -112,75 +171,280 @@ class SpacecraftAnimator:
         if not all(key in self.data for key in required_keys):
             raise ValueError("Missing required position data for chaser or target")
             
-        self.chaser_x = self.data['Chaser Px (m)']
-        self.chaser_y = self.data['Chaser Py (m)']
-        self.target_x = self.data['Target Px (m)']
-        self.target_y = self.data['Target Py (m)']
-        
         # Extract rotation data if available
-        self.chaser_rot = self.data.get('Chaser Rz (rad)', np.zeros_like(self.time))
-        self.target_rot = self.data.get('Target Rz (rad)', np.zeros_like(self.time))
+        zeros = np.zeros_like(self.time)
+        body_list = [
+            (self.data['Chaser Px (m)'], self.data['Chaser Py (m)'], self.data.get('Chaser Rz (rad)', zeros)),
+            (self.data['Target Px (m)'], self.data['Target Py (m)'], self.data.get('Target Rz (rad)', zeros)),
+        ]
         
         # Check if obstacle data exists
-        if 'Obstacle Px (m)' in self.data and 'Obstacle Py (m)' in self.data:
-            self.obstacle_x = self.data['Obstacle Px (m)']
-            self.obstacle_y = self.data['Obstacle Py (m)']
-            self.obstacle_rot = self.data.get('Obstacle Rz (rad)', np.zeros_like(self.time))
+        has_obstacle = 'Obstacle Px (m)' in self.data and 'Obstacle Py (m)' in self.data
+        if has_obstacle:
+            body_list.append((self.data['Obstacle Px (m)'], self.data['Obstacle Py (m)'],
+                              self.data.get('Obstacle Rz (rad)', zeros)))
+        
+        # Struct-of-arrays layout: one (n_bodies, N, 3) buffer of [x, y, rot] per
+        # body (chaser, target, then obstacle), so subsampling is a single slice
+        # and the outlines of every body are rotated together. It is stored as
+        # float32 rounded to 0.1 mm, which is plenty for the 3.4 m x 2.5 m table
+        # and halves the data Plotly has to encode
+        self.bodies = np.stack([np.stack([x, y, rot], axis=-1) for (x, y, rot) in body_list])
+        self.bodies = np.round(self.bodies, 4).astype(np.float32)
+            
+        # Subsample data for performance
+        full_time, full_bodies = self.time, self.bodies
+        if self.skip > 1:
+            self.time = self.time[::self.skip]
+            self.bodies = self.bodies[:, ::self.skip]
+        
+        # The trails get the same point budget as the frames but are downsampled
+        # with LTTB, which keeps the corners of the path that stride subsampling
+        # cuts off. Each trail is stored as contiguous (time, x, y) arrays
+        self.trails = []
+        for body in full_bodies:
+            idx = self._lttb(body[:, 0], body[:, 1], len(self.time))
+            self.trails.append((full_time[idx], body[idx, 0], body[idx, 1]))
+        
+        # Per-body views into the buffer
+        self.chaser_x, self.chaser_y, self.chaser_rot = self.bodies[0].T
+        self.target_x, self.target_y, self.target_rot = self.bodies[1].T
+        if has_obstacle:
+            self.obstacle_x, self.obstacle_y, self.obstacle_rot = self.bodies[2].T
         else:
             self.obstacle_x = None
             self.obstacle_y = None
             self.obstacle_rot = None
+
+    def _lttb(self, x, y, n_out):
+        """
+        Select the points of a path to keep using Largest-Triangle-Three-Buckets.
+        
+        The first and last points are always kept; every other bucket keeps the
+        point forming the largest triangle with the previously kept point and the
+        mean of the next bucket.
+        
+        Args:
+            x, y (numpy.ndarray): Coordinates of the path
+            n_out (int): Number of points to keep
             
-        # Subsample data for performance
-        if self.skip > 1:
-            self.time = self.time[::self.skip]
-            self.chaser_x = self.chaser_x[::self.skip]
-            self.chaser_y = self.chaser_y[::self.skip]
-            self.chaser_rot = self.chaser_rot[::self.skip]
-            self.target_x = self.target_x[::self.skip]
-            self.target_y = self.target_y[::self.skip]
-            self.target_rot = self.target_rot[::self.skip]
-            if self.obstacle_x is not None:
-                self.obstacle_x = self.obstacle_x[::self.skip]
-                self.obstacle_y = self.obstacle_y[::self.skip]
-                self.obstacle_rot = self.obstacle_rot[::self.skip]
+        Returns:
+            numpy.ndarray: Sorted indices of the kept points
+        """
+        n = len(x)
+        if n_out >= n or n_out < 3:
+            return np.arange(n)
+        
+        # Interior points split into n_out - 2 buckets of at least one point
+        edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+        idx = np.empty(n_out, dtype=int)
+        idx[0] = 0
+        idx[-1] = n - 1
+        
+        a = 0
+        for b in range(n_out - 2):
+            lo, hi = edges[b], edges[b + 1]
+            if b < n_out - 3:
+                next_x = x[hi:edges[b + 2]].mean()
+                next_y = y[hi:edges[b + 2]].mean()
+            else:
+                next_x, next_y = x[-1], y[-1]
+            
+            # Twice the triangle area for every candidate in the bucket at once
+            area = np.abs((x[a] - next_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (next_y - y[a]))
+            a = lo + int(np.argmax(area))
+            idx[b + 1] = a
+        
+        return idx
 
-    def _create_square_shape(self, x, y, rotation, size, color):
+    def _create_square_shapes(self, bodies, size):
         """
-        Create a rotated square shape representing a spacecraft.
+        Create rotated square shapes representing every spacecraft at every frame.
+        
+        All bodies and frames are rotated in one batched matrix product instead of
+        building a rotation matrix and calling np.dot once per frame. When Numba is
+        installed, a compiled kernel writes the corners directly instead.
         
         Args:
-            x, y (float): Center coordinates of the square
-            rotation (float): Rotation angle in radians
+            bodies (numpy.ndarray): Array of shape (n_bodies, N, 3) holding the
+                center x, y and rotation angle in radians of each body per frame
             size (float): Side length of the square in meters
-            color (str): Fill color of the square
             
         Returns:
-            numpy.ndarray: Array of (x, y) coordinates for the rotated square
+            numpy.ndarray: Array of shape (n_bodies, N, 5, 2) with the (x, y)
+                coordinates of each body's rotated square for each frame
         """
-        # Create square corners (centered at origin)
         half_size = size / 2
+        if _square_corners is not None:
+            rotated_corners = np.empty(bodies.shape[:-1] + (5, 2), dtype=bodies.dtype)
+            _square_corners(rotated_corners, bodies, half_size)
+            return rotated_corners
+        
+        # Create square corners (centered at origin)
         corners = np.array([
             [-half_size, -half_size],
             [half_size, -half_size],
             [half_size, half_size],
             [-half_size, half_size],
             [-half_size, -half_size]  # Close the shape
-        ])
+        ], dtype=bodies.dtype)
         
-        # Rotation matrix
-        rot_matrix = np.array([
-            [np.cos(rotation), -np.sin(rotation)],
-            [np.sin(rotation), np.cos(rotation)]
-        ])
+        # Stack of transposed rotation matrices, one per body and frame
+        cos_rot = np.cos(bodies[..., 2])
+        sin_rot = np.sin(bodies[..., 2])
+        rot_matrix_t = np.empty(cos_rot.shape + (2, 2), dtype=bodies.dtype)
+        rot_matrix_t[..., 0, 0] = cos_rot
+        rot_matrix_t[..., 0, 1] = sin_rot
+        rot_matrix_t[..., 1, 0] = -sin_rot
+        rot_matrix_t[..., 1, 1] = cos_rot
         
-        # Apply rotation and translation
-        rotated_corners = np.dot(corners, rot_matrix.T)
-        rotated_corners[:, 0] += x
-        rotated_corners[:, 1] += y
+        # Apply rotation and translation for all bodies and frames at once
+        rotated_corners = corners @ rot_matrix_t
+        rotated_corners += bodies[..., None, :2]
         
         return rotated_corners
 
+    def _merge_outlines(self, corners):
+        """
+        Join the outlines of every body into one NaN-separated polyline per frame.
+        
+        Plotly draws NaN-separated segments of a single trace as disjoint shapes,
+        so all spacecraft can be updated as one trace instead of one per body.
+        
+        Args:
+            corners (numpy.ndarray): Array of shape (n_bodies, N, 5, 2) from
+                _create_square_shapes
+            
+        Returns:
+            tuple: x and y arrays of shape (N, 6 * n_bodies - 1)
+        """
+        n_bodies, n_frames = corners.shape[:2]
+        merged = np.full((n_frames, n_bodies, 6, 2), np.nan, dtype=corners.dtype)
+        merged[:, :, :5] = corners.transpose(1, 0, 2, 3)
+        merged = merged.reshape(n_frames, -1, 2)[:, :-1]
+        return np.ascontiguousarray(merged[..., 0]), np.ascontiguousarray(merged[..., 1])
+
+    def _iter_frames(self, use_dark_theme=True):
+        """
+        Generate the animation frames one at a time.
+        
+        Args:
+            use_dark_theme (bool): Whether to use dark theme consistent with the web app
+            
+        Yields:
+            dict: Frame with the trail and spacecraft traces at one time step
+        """
+        # Frame traces are plain dicts rather than go.Scatter objects so each one
+        # is not run through the full Plotly validator; their styles are the
+        # module-level constants, shared by every frame
+        body_line_style = BODY_LINE_DARK if use_dark_theme else BODY_LINE_LIGHT
+        target_fill = TARGET_FILL_DARK if use_dark_theme else TARGET_FILL_LIGHT
+        target_path_style = TARGET_PATH_LINE_DARK if use_dark_theme else TARGET_PATH_LINE_LIGHT
+        
+        # Each frame shows the trail points up to the frame time; the trails are
+        # contiguous, so every per-frame prefix slice is a view that Plotly
+        # encodes directly
+        chaser_trail_t, chaser_trail_x, chaser_trail_y = self.trails[0]
+        chaser_trail_end = np.searchsorted(chaser_trail_t, self.time, side='right')
+        target_trail_t, target_trail_x, target_trail_y = self.trails[1]
+        target_trail_end = np.searchsorted(target_trail_t, self.time, side='right')
+        if self.obstacle_x is not None:
+            obstacle_trail_t, obstacle_trail_x, obstacle_trail_y = self.trails[2]
+            obstacle_trail_end = np.searchsorted(obstacle_trail_t, self.time, side='right')
+        
+        # The workspace rectangle and axis arrows (traces 0-2) never move, so they
+        # live only in the base figure; each frame carries just the trails and
+        # spacecraft of every body and names the trace indices it updates
+        n_body_traces = 1 if self.merge_bodies else len(self.bodies)
+        dynamic_traces = list(range(3, 3 + len(self.bodies) + n_body_traces))
+        
+        # Rotate the spacecraft outlines of every body and frame in one batch
+        corners_all = self._create_square_shapes(self.bodies, self.spacecraft_size)
+        chaser_corners_all = corners_all[0]
+        target_corners_all = corners_all[1]
+        if self.obstacle_x is not None:
+            obstacle_corners_all = corners_all[2]
+        if self.merge_bodies:
+            merged_x, merged_y = self._merge_outlines(corners_all)
+        
+        for i in range(len(self.time)):
+            frame_data = []
+            
+            # Chaser path
+            frame_data.append(dict(
+                type='scatter',
+                x=chaser_trail_x[:chaser_trail_end[i]],
+                y=chaser_trail_y[:chaser_trail_end[i]],
+                mode='lines',
+                line=CHASER_PATH_LINE
+            ))
+            
+            # Target path
+            frame_data.append(dict(
+                type='scatter',
+                x=target_trail_x[:target_trail_end[i]],
+                y=target_trail_y[:target_trail_end[i]],
+                mode='lines',
+                line=target_path_style
+            ))
+            
+            # Obstacle path (if available)
+            if self.obstacle_x is not None:
+                frame_data.append(dict(
+                    type='scatter',
+                    x=obstacle_trail_x[:obstacle_trail_end[i]],
+                    y=obstacle_trail_y[:obstacle_trail_end[i]],
+                    mode='lines',
+                    line=OBSTACLE_PATH_LINE
+                ))
+            
+            # Rotated spacecraft shapes
+            if self.merge_bodies:
+                frame_data.append(dict(
+                    type='scatter',
+                    x=merged_x[i], y=merged_y[i],
+                    fill="toself",
+                    fillcolor=BODIES_FILL,
+                    line=body_line_style,
+                    showlegend=False
+                ))
+            else:
+                # Chaser spacecraft
+                chaser_corners = chaser_corners_all[i]
+                frame_data.append(dict(
+                    type='scatter',
+                    x=chaser_corners[:, 0], y=chaser_corners[:, 1],
+                    fill="toself",
+                    fillcolor=CHASER_FILL,
+                    line=body_line_style,
+                    showlegend=False
+                ))
+            
+                # Target spacecraft
+                target_corners = target_corners_all[i]
+                frame_data.append(dict(
+                    type='scatter',
+                    x=target_corners[:, 0], y=target_corners[:, 1],
+                    fill="toself",
+                    fillcolor=target_fill,
+                    line=body_line_style,
+                    showlegend=False
+                ))
+            
+                # Obstacle spacecraft (if available)
+                if self.obstacle_x is not None:
+                    obstacle_corners = obstacle_corners_all[i]
+                    frame_data.append(dict(
+                        type='scatter',
+                        x=obstacle_corners[:, 0], y=obstacle_corners[:, 1],
+                        fill="toself",
+                        fillcolor=OBSTACLE_FILL,
+                        line=body_line_style,
+                        showlegend=False
+                    ))
+                
+            yield dict(data=frame_data, traces=dynamic_traces, name=str(i))
+
     def create_animation(self, use_dark_theme=True):
         """
         Create an animated Plotly figure showing spacecraft trajectories.
@@ -189,7 +453,7 @@ class SpacecraftAnimator:
             use_dark_theme (bool): Whether to use dark theme consistent with the web app
             
         Returns:
-            plotly.graph_objects.Figure: The animated figure, or None if no data loaded
+            dict: The animated figure as a Plotly figure dict, or None if no data loaded
         """
         if self.data is None or self.time is None:
             return None
@@ -233,7 +497,7 @@ class SpacecraftAnimator:
             y=[0, 0],
             mode='lines+markers',
             line=dict(color='red', width=3),
-            marker=dict(size=[0, 15], symbol='arrow', angleref='previous'),
+            marker=AXIS_ARROW_MARKER,
             name='X-axis',
             hoverinfo='none'
         ))
@@ -244,7 +508,7 @@ class SpacecraftAnimator:
             y=[0, 0.3],
             mode='lines+markers',
             line=dict(color='green', width=3),
-            marker=dict(size=[0, 15], symbol='arrow', angleref='previous'),
+            marker=AXIS_ARROW_MARKER,
             name='Y-axis',
             hoverinfo='none'
         ))
@@ -271,55 +535,61 @@ class SpacecraftAnimator:
             fig.add_trace(go.Scatter(
                 x=[self.obstacle_x[0]], y=[self.obstacle_y[0]],
                 mode='lines',
-                line=dict(color='rgba(0, 0, 255, 0.7)', width=2),
+                line=OBSTACLE_PATH_LINE,
                 name='Obstacle Path'
             ))
         
-        # Create initial spacecraft shapes
-        # Chaser spacecraft (red)
-        chaser_corners = self._create_square_shape(
-            self.chaser_x[0], self.chaser_y[0], 
-            self.chaser_rot[0], self.spacecraft_size, 'red'
-        )
-        fig.add_trace(go.Scatter(
-            x=chaser_corners[:, 0], y=chaser_corners[:, 1],
-            fill="toself",
-            fillcolor='rgba(255, 0, 0, 0.5)',
-            line=dict(color=workspace_line, width=2),
-            name='Chaser',
-            showlegend=False
-        ))
+        # Spacecraft outlines at the first frame
+        body_line_style = BODY_LINE_DARK if use_dark_theme else BODY_LINE_LIGHT
+        initial_corners = self._create_square_shapes(self.bodies[:, :1], self.spacecraft_size)[:, 0]
         
-        # Target spacecraft (black/gray depending on theme)
-        target_fill = 'rgba(100, 100, 100, 0.5)' if use_dark_theme else 'rgba(0, 0, 0, 0.5)'
-        target_corners = self._create_square_shape(
-            self.target_x[0], self.target_y[0], 
-            self.target_rot[0], self.spacecraft_size, 'black'
-        )
-        fig.add_trace(go.Scatter(
-            x=target_corners[:, 0], y=target_corners[:, 1],
-            fill="toself",
-            fillcolor=target_fill,
-            line=dict(color=workspace_line, width=2),
-            name='Target',
-            showlegend=False
-        ))
+        # Create initial spacecraft shapes
+        if self.merge_bodies:
+            merged_x, merged_y = self._merge_outlines(initial_corners[:, None])
+            fig.add_trace(go.Scatter(
+                x=merged_x[0], y=merged_y[0],
+                fill="toself",
+                fillcolor=BODIES_FILL,
+                line=body_line_style,
+                name='Spacecraft',
+                showlegend=False
+            ))
+        else:
+            # Chaser spacecraft (red)
+            chaser_corners = initial_corners[0]
+            fig.add_trace(go.Scatter(
+                x=chaser_corners[:, 0], y=chaser_corners[:, 1],
+                fill="toself",
+                fillcolor=CHASER_FILL,
+                line=body_line_style,
+                name='Chaser',
+                showlegend=False
+            ))
         
-        # Obstacle spacecraft (if available)
-        if self.obstacle_x is not None:
-            obstacle_corners = self._create_square_shape(
-                self.obstacle_x[0], self.obstacle_y[0], 
-                self.obstacle_rot[0], self.spacecraft_size, 'blue'
-            )
+            # Target spacecraft (black/gray depending on theme)
+            target_fill = TARGET_FILL_DARK if use_dark_theme else TARGET_FILL_LIGHT
+            target_corners = initial_corners[1]
             fig.add_trace(go.Scatter(
-                x=obstacle_corners[:, 0], y=obstacle_corners[:, 1],
+                x=target_corners[:, 0], y=target_corners[:, 1],
                 fill="toself",
-                fillcolor='rgba(0, 0, 255, 0.5)',
-                line=dict(color=workspace_line, width=2),
-                name='Obstacle',
+                fillcolor=target_fill,
+                line=body_line_style,
+                name='Target',
                 showlegend=False
             ))
         
+            # Obstacle spacecraft (if available)
+            if self.obstacle_x is not None:
+                obstacle_corners = initial_corners[2]
+                fig.add_trace(go.Scatter(
+                    x=obstacle_corners[:, 0], y=obstacle_corners[:, 1],
+                    fill="toself",
+                    fillcolor=OBSTACLE_FILL,
+                    line=body_line_style,
+                    name='Obstacle',
+                    showlegend=False
+                ))
+        
         # Replace the update_layout call with this:
         fig.update_layout(
             title={
@@ -368,7 +638,8 @@ class SpacecraftAnimator:
             updatemenus=[{
                 "buttons": [
                     {
-                        "args": [None, {"frame": {"duration": 50, "redraw": False}, "fromcurrent": True}],
+                        "args": [None, {"frame": {"duration": 50, "redraw": False}, "fromcurrent": True,
+                                         "mode": "immediate", "transition": {"duration": 0}}],
                         "label": "Play",
                         "method": "animate"
                     },
@@ -392,115 +663,11 @@ class SpacecraftAnimator:
             template=template
         )
         
-        # Create frames
-        frames = []
-        for i in range(len(self.time)):
-            frame_data = []
-
-            # Add background rectangle as first element in each frame
-            frame_data.append(go.Scatter(
-                x=rect_corners[:, 0], y=rect_corners[:, 1],
-                fill="toself",
-                fillcolor=workspace_fill,
-                line=dict(color=workspace_line, width=2),
-                showlegend=False
-            ))
-
-            # X-axis (red arrow)
-            frame_data.append(go.Scatter(
-                x=[0, 0.3],
-                y=[0, 0],
-                mode='lines+markers',
-                line=dict(color='red', width=3),
-                marker=dict(size=[0, 15], symbol='arrow', angleref='previous'),
-                hoverinfo='none'
-            ))
-
-            # Y-axis (green arrow)
-            frame_data.append(go.Scatter(
-                x=[0, 0],
-                y=[0, 0.3],
-                mode='lines+markers',
-                line=dict(color='green', width=3),
-                marker=dict(size=[0, 15], symbol='arrow', angleref='previous'),
-                hoverinfo='none'
-            ))
-            
-            # Chaser path
-            frame_data.append(go.Scatter(
-                x=self.chaser_x[:i+1],
-                y=self.chaser_y[:i+1],
-                mode='lines',
-                line=dict(color='rgba(255, 0, 0, 0.7)', width=2, dash='dot')
-            ))
-            
-            # Target path
-            frame_data.append(go.Scatter(
-                x=self.target_x[:i+1],
-                y=self.target_y[:i+1],
-                mode='lines',
-                line=dict(color='rgba(120, 120, 120, 0.7)' if use_dark_theme else 'rgba(0, 0, 0, 0.7)', width=2)
-            ))
-            
-            # Obstacle path (if available)
-            if self.obstacle_x is not None:
-                frame_data.append(go.Scatter(
-                    x=self.obstacle_x[:i+1],
-                    y=self.obstacle_y[:i+1],
-                    mode='lines',
-                    line=dict(color='rgba(0, 0, 255, 0.7)', width=2)
-                ))
-            
-            # Rotated spacecraft shapes
-            # Chaser spacecraft
-            chaser_corners = self._create_square_shape(
-                self.chaser_x[i], self.chaser_y[i], 
-                self.chaser_rot[i], self.spacecraft_size, 'red'
-            )
-            frame_data.append(go.Scatter(
-                x=chaser_corners[:, 0], y=chaser_corners[:, 1],
-                fill="toself",
-                fillcolor='rgba(255, 0, 0, 0.5)',
-                line=dict(color=workspace_line, width=2),
-                showlegend=False
-            ))
-            
-            # Target spacecraft
-            target_corners = self._create_square_shape(
-                self.target_x[i], self.target_y[i], 
-                self.target_rot[i], self.spacecraft_size, 'black'
-            )
-            frame_data.append(go.Scatter(
-                x=target_corners[:, 0], y=target_corners[:, 1],
-                fill="toself",
-                fillcolor=target_fill,
-                line=dict(color=workspace_line, width=2),
-                showlegend=False
-            ))
-            
-            # Obstacle spacecraft (if available)
-            if self.obstacle_x is not None:
-                obstacle_corners = self._create_square_shape(
-                    self.obstacle_x[i], self.obstacle_y[i], 
-                    self.obstacle_rot[i], self.spacecraft_size, 'blue'
-                )
-                frame_data.append(go.Scatter(
-                    x=obstacle_corners[:, 0], y=obstacle_corners[:, 1],
-                    fill="toself",
-                    fillcolor='rgba(0, 0, 255, 0.5)',
-                    line=dict(color=workspace_line, width=2),
-                    showlegend=False
-                ))
-                
-            frames.append(go.Frame(data=frame_data, name=str(i)))
-        
-        fig.frames = frames
-        
         # Create a more efficient slider - only show key frames
         slider_steps = []
-        step_size = max(1, len(frames) // 20)  # Show at most 20 slider steps
+        step_size = max(1, len(self.time) // 20)  # Show at most 20 slider steps
         
-        for i in range(0, len(frames), step_size):
+        for i in range(0, len(self.time), step_size):
             step = {
                 "args": [
                     [str(i)],
@@ -535,6 +702,14 @@ class SpacecraftAnimator:
             }]
         )
         
+        # Frames are attached to the serialized figure instead of fig.frames:
+        # go.Figure coerces every frame trace into a validated go.Scatter, which
+        # was most of the build time, while Plotly renders the dict as is
+        fig = fig.to_dict()
+        fig['frames'] = list(self._iter_frames(use_dark_theme))
+        if convert_to_base64 is not None:
+            convert_to_base64(fig['frames'])
+        
         return fig
 
 class SSHConnectionManager:
@@ -1209,7 +1384,8 @@ class AnimationManager:
         Create the spacecraft animation figure.
         
         Returns:
-            go.Figure: The animation figure if data is loaded, or an empty figure with controls
+            dict or go.Figure: The animation figure dict if data is loaded, or an empty
+                figure with controls
         """
         # Create an empty figure with proper controls if no data is loaded
         if self.data is None:
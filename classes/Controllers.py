@@ -1,6 +1,5 @@
 import numpy as np
 import scipy.linalg
-from scipy.optimize import minimize
 
 class LinearQuadraticRegulator:
     def __init__(self, mass, inertia, thruster_dist2CG, thruster_F, dt, pwm_freq=5):
@@ -61,7 +60,10 @@ class LinearQuadraticRegulator:
         self.controlSignalBodyFrame = None
         self.saturatedControlSignal = None
         self.saturatedControlSignalBodyFrame = None
-        self.dutyCycle = None
+        # Allocated once and updated in place, so readers such as the data
+        # logger always copy from the same array; agents that are tracked but
+        # not commanded from this platform log these zeros
+        self.dutyCycle = np.zeros(len(thruster_dist2CG))
         self.current_decay_factor = 1.0
 
     def _initialize_H_matrix(self):
@@ -146,7 +148,7 @@ class LinearQuadraticRegulator:
             raise ValueError("Control signal in body frame not available")
             
         # Optimize duty cycles with integrated constraints
-        self.dutyCycle = self.optimize_duty_cycle_realtime(self.controlSignalBodyFrame)
+        self.dutyCycle[:] = self.optimize_duty_cycle_realtime(self.controlSignalBodyFrame)
 
     def optimize_duty_cycle(self, u_desired, max_iters=100, tol=1e-6):
         """
@@ -176,6 +178,10 @@ class LinearQuadraticRegulator:
         if np.all(initial_guess < 1e-6):
             initial_guess = np.ones(num_thrusters) * 0.1
         
+        # scipy.optimize is only needed by this offline allocator and takes
+        # about as long to import as scipy.linalg, so it is imported on first use
+        from scipy.optimize import minimize
+        
         # Single optimization step
         result = minimize(
             objective,
@@ -34,6 +34,11 @@ class OwlStreamProcessor:
         
         # Dictionary to hold the latest state data for each rigid body
         self.states = {"chaser": None, "target": None, "obstacle": None}
+        
+        # The same states as rows of [x, y, att, vx, vy, omega] (chaser, target,
+        # obstacle), and whether each row has been received yet
+        self.state_matrix = np.zeros((3, 6))
+        self.state_valid = np.zeros(3, dtype=bool)
         self.prev_states = {"chaser": None, "target": None, "obstacle": None}  # To store previous measurements
         self.lock = threading.Lock()  # For thread-safe access to self.states
         
@@ -134,10 +139,13 @@ class OwlStreamProcessor:
                             key = None
                             if r.id == self.tracker_ID_CHASER:
                                 key = "chaser"
+                                row = 0
                             elif r.id == self.tracker_ID_TARGET:
                                 key = "target"
+                                row = 1
                             elif r.id == self.tracker_ID_OBSTACLE:
                                 key = "obstacle"
+                                row = 2
                             
                             if key is not None:
                                 # Get the current time for delta calculations
@@ -172,6 +180,9 @@ class OwlStreamProcessor:
                                         "vel": vel/1000,               # [vx, vy]
                                         "omega": omega            # angular velocity (ω)
                                     }
+                                    self.state_matrix[row] = (current_data[0]/1000, current_data[1]/1000, current_data[2],
+                                                              vel[0]/1000, vel[1]/1000, omega)
+                                    self.state_valid[row] = True
         except KeyboardInterrupt:
             print("Interrupted by user. Closing connection...")
         finally:
@@ -189,6 +200,27 @@ class OwlStreamProcessor:
         with self.lock:
             return self.states.copy()
 
+    def get_matrix(self, out=None):
+        """
+        Returns the latest states as one array, together with the dictionary from get().
+
+        Both are taken under the same lock, so they describe the same frames.
+
+        Args:
+            out (np.ndarray, optional): A (3, 6) array to copy the states into
+                instead of allocating a new one.
+
+        Returns:
+            tuple: The (3, 6) array of [x, y, att, vx, vy, omega] rows for the chaser,
+                target and obstacle, a (3,) boolean array marking the rows received
+                so far, and a copy of the state dictionary.
+        """
+        if out is None:
+            out = np.empty((3, 6))
+        with self.lock:
+            out[...] = self.state_matrix
+            return out, self.state_valid.copy(), self.states.copy()
+
     def stop(self):
         """
         Signals the background thread to stop and waits for it to terminate.
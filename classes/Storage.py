@@ -1,3 +1,4 @@
+import os
 import numpy as np
 from datetime import datetime
 
@@ -11,6 +12,11 @@ class Storage:
         """
         self.expected_size = expected_size
         self.data = {}
+        self.record = None
+        self.table = None
+        self.columns = {}
+        self.headers = []
+        self.column_index = {}
         self.current_index = 0
         
     def initialize_arrays(self, keys):
@@ -23,6 +29,43 @@ class Storage:
         for key in keys:
             self.data[key] = np.zeros(self.expected_size)
         
+    def initialize_record(self, dtype, columns):
+        """
+        Pre-allocate one structured array holding a full row per time step.
+        
+        Every field must be float64, so that the record can also be used as
+        the plain 2D array self.table with one column per exported column.
+        
+        Args:
+            dtype (np.dtype): Structured dtype of a single row
+            columns (dict): Maps each field of dtype to the column names it
+                is exported under, one name per element of the field
+        """
+        if any(dtype[field].base != np.float64 for field in dtype.names):
+            raise ValueError("All fields of the record must be float64")
+        
+        self.record = np.zeros(self.expected_size, dtype=dtype)
+        self.table = self.record.view(np.float64).reshape(self.expected_size, -1)
+        self.columns = columns
+        # Column names in table order, expanded once for every export
+        self.headers = [name for field in dtype.names for name in columns[field]]
+        self.column_index = {name: j for j, name in enumerate(self.headers)}
+        
+    def next_row(self):
+        """
+        Claim the next row of the record for writing.
+        
+        Returns:
+            np.ndarray: Flat float64 view of the row; writing to it writes into the record
+        """
+        if self.current_index >= self.expected_size:
+            # Resize arrays if needed
+            self._resize_arrays()
+            
+        row = self.table[self.current_index]
+        self.current_index += 1
+        return row
+        
     def append_data_batch(self, data_dict):
         """
         Append multiple data points at once.
@@ -34,12 +77,22 @@ class Storage:
             # Resize arrays if needed
             self._resize_arrays()
             
+        # The values are copied out, so callers can reuse one dictionary and
+        # only overwrite its values every time step
+        row = self.table[self.current_index] if self.record is not None else None
         for key, value in data_dict.items():
-            if key not in self.data:
+            j = self.column_index.get(key)
+            if j is not None:
+                # Columns of the record are written into its current row
+                row[j] = value
+                continue
+            
+            column = self.data.get(key)
+            if column is None:
                 # Initialize a new array if this key wasn't pre-allocated
-                self.data[key] = np.zeros(self.expected_size)
+                column = self.data[key] = np.zeros(self.expected_size)
             
-            self.data[key][self.current_index] = value
+            column[self.current_index] = value
             
         self.current_index += 1
         
@@ -51,26 +104,81 @@ class Storage:
             temp[:self.expected_size] = self.data[key]
             self.data[key] = temp
         
+        if self.record is not None:
+            temp = np.zeros(new_size, dtype=self.record.dtype)
+            temp[:self.expected_size] = self.record
+            self.record = temp
+            self.table = temp.view(np.float64).reshape(new_size, -1)
+        
         self.expected_size = new_size
     
+    def _column(self, key):
+        """Get the full pre-allocated array of a key, or None if it is not stored"""
+        if key in self.data:
+            return self.data[key]
+        if key in self.column_index:
+            return self.table[:, self.column_index[key]]
+        return None
+    
     def get_all_data(self, key):
         """Get all data for a given key up to the current index"""
-        if key in self.data:
-            return self.data[key][:self.current_index]
+        values = self._column(key)
+        if values is not None:
+            return values[:self.current_index]
         return np.array([])
     
     def get_latest_data(self, key):
         """Get the most recent value for a key"""
-        if key in self.data and self.current_index > 0:
-            return self.data[key][self.current_index - 1]
+        values = self._column(key)
+        if values is not None and self.current_index > 0:
+            return values[self.current_index - 1]
         return None
     
-    def write_to_npy(self):
-        """Save data to a .npy file, truncating arrays to actual used size"""
-        # Create a new dictionary with truncated arrays
+    def _output_data(self):
+        """Split the record back into one array per column, truncated to the actual used size"""
         output_data = {}
+        if self.record is not None:
+            # One bulk transpose makes every column contiguous, instead of a
+            # strided copy per column
+            output_data.update(zip(self.headers, np.ascontiguousarray(self.table[:self.current_index].T)))
         for key in self.data:
             output_data[key] = self.data[key][:self.current_index]
+        return output_data
+    
+    def write_to_npy(self):
+        """Save data to a .npy file, truncating arrays to actual used size"""
+        # Create a new dictionary with truncated arrays
+        output_data = self._output_data()
             
+        # Single call, no separate existence check to race against
+        os.makedirs("data", exist_ok=True)
         filename = f"data/data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.npy"
-        np.save(filename, output_data)
\ No newline at end of file
+        np.save(filename, output_data)
+        
+    def write_to_npz(self, compress=False):
+        """
+        Save data to a .npz file with one array per key, truncating arrays to actual used size
+        
+        Args:
+            compress (bool): Deflate the arrays with np.savez_compressed; smaller
+                files for transfer, at the cost of a slower write
+        """
+        # Unlike the pickled dict in write_to_npy, readers can load single
+        # columns without reading the whole log
+        output_data = self._output_data()
+            
+        os.makedirs("data", exist_ok=True)
+        filename = f"data/data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.npz"
+        if compress:
+            np.savez_compressed(filename, **output_data)
+        else:
+            np.savez(filename, **output_data)
+            
+    def write_to_csv(self):
+        """Save data to a .csv file with a header row of column names, truncating arrays to actual used size"""
+        output_data = self._output_data()
+        
+        os.makedirs("data", exist_ok=True)
+        filename = f"data/data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        np.savetxt(filename, np.column_stack(list(output_data.values())), delimiter=',',
+                   header=','.join(output_data), comments='', encoding='utf-8')
@@ -7,17 +7,15 @@ except ImportError:
     print("Jetson.GPIO not available. Running in simulation mode.")
 
 import time
-from time import perf_counter_ns, perf_counter
+from time import perf_counter
 import ctypes
 import multiprocessing
+import numpy as np
 
-def precise_delay_microsecond(delay_us):
-    """
-    Delays execution for the specified microseconds using a busy-wait loop.
-    """
-    target_time = perf_counter_ns() + delay_us * 1000
-    while perf_counter_ns() < target_time:
-        pass
+# Same clock_nanosleep-backed delay as the control loop, so both share one spin
+# tail; tools.timing only needs the standard library, so the PWM process does not
+# pull in the controller dependencies of tools.utils
+from tools.timing import precise_delay_microsecond
 
 class Thrusters:
     """
@@ -45,7 +43,10 @@ class Thrusters:
         manager = multiprocessing.Manager()
         self.duty_cycles = manager.list([0.0] * self.NUM_THRUSTERS)
         self.requested_duty_cycles = manager.list([0.0] * self.NUM_THRUSTERS)
-        self.current_states = manager.list([False] * self.NUM_THRUSTERS)
+        # ON/OFF states live in shared memory written by the PWM process, so
+        # the main process reads all of them as one array without any IPC
+        self.current_states = multiprocessing.Array('i', self.NUM_THRUSTERS, lock=False)
+        self.states = np.frombuffer(self.current_states, dtype=np.int32)
         self.duty_cycle_lock = manager.Lock()
         self.duty_cycle_updated = manager.Value('b', False)
         # Shared flag for running the PWM process
@@ -159,13 +160,13 @@ class Thrusters:
         Get the current ON/OFF state of a specific thruster.
         """
         if 1 <= thruster_index <= self.NUM_THRUSTERS:
-            return self.current_states[thruster_index - 1]
+            return bool(self.states[thruster_index - 1])
         else:
             raise ValueError(f"Thruster index must be between 1 and {self.NUM_THRUSTERS}")
     
     def get_all_states(self):
         """Return a copy of the current states of all thrusters."""
-        return list(self.current_states)
+        return self.states.astype(bool).tolist()
     
     def get_duty_cycle(self, thruster_index):
         """
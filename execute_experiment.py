@@ -1,11 +1,43 @@
 import os
+import posixpath
+import argparse
 import paramiko
+import sys
+import codecs
+import io
+import gzip
+import json
+import tempfile
 import shlex
-from scp import SCPClient
+import select
+import shutil
+import tarfile
+import threading
+import queue
+import subprocess
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+
+# Read remote output in large chunks so chatty scripts cost few recv calls
+STREAM_CHUNK_SIZE = 65536
+
+# gzip level for WAN transfers; level 1 keeps most of the ratio of the default
+# level 9 at a fraction of the CPU time
+GZIP_LEVEL = 1
+
+# Write archives to the SSH channel in 1 MB pieces
+ARCHIVE_CHUNK_SIZE = 1 << 20
+
+# Base name of the cached project archive in the temp directory
+ARCHIVE_CACHE_NAME = "proxipy_project"
+
+# SFTP channels opened on the shared connection for the per-file fallback
+SFTP_CHANNELS = 8
 
 class ProjectTransfer:
-    def __init__(self, remote_host, remote_user, remote_path, remote_password=None, ssh_key_path=None):
+    def __init__(self, remote_host, remote_user, remote_path, remote_password=None, ssh_key_path=None, wan=False,
+                 use_openssh=True, use_rsync=True):
         """Initialize the ProjectTransfer with connection details.
         
         Args:
@@ -14,15 +46,28 @@ class ProjectTransfer:
             remote_path: The destination directory on the remote server
             remote_password: The password for the remote server (None if using SSH key)
             ssh_key_path: Path to the SSH key file (None if using password)
+            wan: If True, compress transfers (only worthwhile on slow links)
+            use_openssh: If True, upload through the OpenSSH client when key
+                authentication is used and ssh is installed
+            use_rsync: If True, upload with rsync when it is installed, using
+                sshpass for password authentication
         """
         self.remote_host = remote_host
         self.remote_user = remote_user
         self.remote_password = remote_password
         self.remote_path = os.path.normpath(remote_path)
         self.ssh_key_path = ssh_key_path
+        self.wan = wan
+        self.use_openssh = use_openssh
+        self.use_rsync = use_rsync
+        
+        # Shared SSH connection, opened on first use; the lock keeps the data
+        # sync thread and the main thread from reconnecting at the same time
+        self._ssh = None
+        self._ssh_lock = threading.Lock()
         
-        # Directories to exclude
-        self.exclude_dirs = [".venv", ".git"]
+        # Directories to exclude; .cache holds the data plotter's parsed uploads
+        self.exclude_dirs = [".venv", ".git", ".cache"]
         
         # File extensions to exclude
         self.exclude_extensions = [".npy"]
@@ -37,6 +82,18 @@ class ProjectTransfer:
         
         # Normalize paths
         self.folder_to_copy = os.path.normpath(self.folder_to_copy)
+        
+        self._update_exclusion_filters()
+    
+    def _update_exclusion_filters(self):
+        """Rebuild the lookups used by should_skip_file and should_skip_directory.
+        
+        Called whenever the exclusion lists change, so the scan tests each name
+        with set lookups and a single str.endswith call instead of list loops.
+        """
+        self._exclude_dir_set = frozenset(self.exclude_dirs)
+        self._excluded_names = frozenset({self.script_name})
+        self._excluded_suffixes = tuple(self.exclude_extensions)
     
     def should_skip_file(self, filename):
         """Determine if a file should be skipped during transfer.
@@ -47,16 +104,9 @@ class ProjectTransfer:
         Returns:
             bool: True if the file should be skipped, False otherwise
         """
-        # Skip the script itself
-        if filename == self.script_name:
-            return True
-            
-        # Skip files with excluded extensions
-        for ext in self.exclude_extensions:
-            if filename.endswith(ext):
-                return True
-                
-        return False
+        # Skip the script itself and files with excluded extensions; endswith
+        # checks every suffix of the tuple in one C-level call
+        return filename in self._excluded_names or filename.endswith(self._excluded_suffixes)
     
     def should_skip_directory(self, dirname):
         """Determine if a directory should be skipped during transfer.
@@ -67,7 +117,34 @@ class ProjectTransfer:
         Returns:
             bool: True if the directory should be skipped, False otherwise
         """
-        return dirname in self.exclude_dirs
+        return dirname in self._exclude_dir_set
+    
+    def iter_eligible_files(self, folder=None, rel_root=""):
+        """Scan the project folder and yield the files that should be transferred.
+        
+        Uses os.scandir so the file type (and on Windows the full stat) comes with
+        the directory listing instead of costing a separate call per file.
+        
+        Args:
+            folder: The directory to scan (defaults to the project folder)
+            rel_root: The path of folder relative to the project folder
+            
+        Yields:
+            tuple: (local_file_path, relative_path, stat_result) with the relative
+                path in Unix format
+        """
+        if folder is None:
+            folder = self.folder_to_copy
+        
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                rel_path = rel_root + entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    # Skip excluded directories
+                    if entry.name not in self._exclude_dir_set:
+                        yield from self.iter_eligible_files(entry.path, rel_path + "/")
+                elif not self.should_skip_file(entry.name):
+                    yield entry.path, rel_path, entry.stat()
     
     def count_eligible_files(self):
         """Count the number of files that will be transferred.
@@ -75,39 +152,364 @@ class ProjectTransfer:
         Returns:
             int: The number of eligible files
         """
-        eligible_files = 0
-        for root, dirs, files in os.walk(self.folder_to_copy):
-            # Skip excluded directories
-            dirs_to_remove = [d for d in dirs if self.should_skip_directory(d)]
-            for d in dirs_to_remove:
-                dirs.remove(d)
-            
-            # Count eligible files
-            for file in files:
-                if not self.should_skip_file(file):
-                    eligible_files += 1
+        return sum(1 for _ in self.iter_eligible_files())
+    
+    def _collect_transfer_jobs(self):
+        """List the eligible files with their remote destinations in one scan.
         
-        return eligible_files
+        Returns:
+            list: (local_file_path, remote_file_path) tuples with the remote
+                paths in Unix format
+        """
+        remote_root = self.remote_path.replace("\\", "/")
+        return [(local_file_path, f"{remote_root}/{rel_path}")
+                for local_file_path, rel_path, stat in self.iter_eligible_files()]
     
     def connect_ssh(self):
-        """Establish an SSH connection to the remote server.
+        """Return the SSH connection to the remote server, opening it if needed.
+        
+        The connection is kept open and shared by every remote operation so the
+        TCP and SSH handshakes are only paid once; call close() when done.
         
         Returns:
             paramiko.SSHClient: An established SSH client
         """
-        ssh = paramiko.SSHClient()
-        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        with self._ssh_lock:
+            if self._ssh is not None:
+                transport = self._ssh.get_transport()
+                if transport is not None and transport.is_active():
+                    return self._ssh
+            
+            ssh = paramiko.SSHClient()
+            ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+            
+            # Connect using password or SSH key; on the lab LAN the link is faster than
+            # the CPU can compress, so SSH compression is only enabled for WAN transfers
+            if self.ssh_key_path:
+                ssh.connect(self.remote_host, username=self.remote_user, key_filename=self.ssh_key_path,
+                            compress=self.wan)
+            else:
+                ssh.connect(self.remote_host, username=self.remote_user, password=self.remote_password,
+                            compress=self.wan)
+            
+            self._ssh = ssh
+            return ssh
+    
+    def close(self):
+        """Close the shared SSH connection if it is open."""
+        with self._ssh_lock:
+            if self._ssh is not None:
+                self._ssh.close()
+                self._ssh = None
+    
+    def build_manifest(self):
+        """Describe the eligible files by modification time and size.
         
-        # Connect using password or SSH key
-        if self.ssh_key_path:
-            ssh.connect(self.remote_host, username=self.remote_user, key_filename=self.ssh_key_path)
+        Returns:
+            dict: The project folder, compression mode and a {relative_path:
+                [mtime_ns, size]} map of the eligible files
+        """
+        files = {}
+        for local_file_path, rel_path, stat in self.iter_eligible_files():
+            files[rel_path] = [stat.st_mtime_ns, stat.st_size]
+        
+        return {"folder": self.folder_to_copy, "wan": self.wan, "files": files}
+    
+    def build_archive(self, manifest=None, files=None):
+        """Pack the eligible files into an in-memory tar archive.
+        
+        The archive depends only on the local project folder, so it can be built
+        once and shared by every host instead of re-reading and re-compressing
+        the project for each transfer. The last full archive is cached in the
+        temp directory next to a manifest of file times and sizes, and reused as
+        is when nothing has changed since.
+        
+        Args:
+            manifest: Optional manifest from build_manifest() to avoid rescanning
+            files: Optional list of relative paths to pack instead of the whole
+                project; partial archives are not cached
+        
+        Returns:
+            tuple: (bytes, int) with the archive and the number of files it holds
+        """
+        if manifest is None:
+            manifest = self.build_manifest()
+        
+        if files is not None:
+            return self._pack_files(files)
+        
+        archive_path = os.path.join(tempfile.gettempdir(), ARCHIVE_CACHE_NAME + (".tar.gz" if self.wan else ".tar"))
+        manifest_path = archive_path + ".manifest.json"
+        
+        # Reuse the cached archive if the project is unchanged
+        try:
+            with open(manifest_path, "r") as f:
+                if json.load(f) == manifest:
+                    with open(archive_path, "rb") as archive_file:
+                        print("Project unchanged since the last transfer; reusing cached archive.")
+                        return archive_file.read(), len(manifest["files"])
+        except (OSError, ValueError):
+            pass
+        
+        archive_bytes, file_count = self._pack_files(manifest["files"])
+        
+        # Cache the archive for the next run; the manifest is written last so a
+        # partial write is never mistaken for a valid cache
+        try:
+            with open(archive_path, "wb") as f:
+                f.write(archive_bytes)
+            with open(manifest_path, "w") as f:
+                json.dump(manifest, f)
+        except OSError as e:
+            print(f"Could not cache project archive: {e}")
+        
+        return archive_bytes, file_count
+    
+    def _pack_files(self, files):
+        """Pack the given project files into an in-memory tar archive.
+        
+        Args:
+            files: Iterable of relative paths in Unix format
+            
+        Returns:
+            tuple: (bytes, int) with the archive and the number of files it holds
+        """
+        buffer = io.BytesIO()
+        
+        # Compress through a fast gzip layer only when transferring over the WAN
+        sink = gzip.GzipFile(fileobj=buffer, mode="wb", compresslevel=GZIP_LEVEL) if self.wan else buffer
+        file_count = 0
+        with tarfile.open(fileobj=sink, mode="w|") as tar:
+            for rel_path in files:
+                tar.add(os.path.join(self.folder_to_copy, rel_path), arcname=rel_path)
+                file_count += 1
+        if self.wan:
+            sink.close()
+        
+        return buffer.getvalue(), file_count
+    
+    def _sync_index_path(self):
+        """Return the path of the local index of files last pushed to this host."""
+        return os.path.join(tempfile.gettempdir(),
+                            f"{ARCHIVE_CACHE_NAME}_{self.remote_user}@{self.remote_host}.index.json")
+    
+    def _changed_files(self, manifest):
+        """List the files that changed since the last successful transfer to this host.
+        
+        Args:
+            manifest: The current manifest from build_manifest()
+            
+        Returns:
+            list: The changed relative paths, or None if there is no usable index
+                and the whole project must be sent
+        """
+        try:
+            with open(self._sync_index_path(), "r") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return None
+        
+        if index.get("folder") != manifest["folder"] or index.get("remote_path") != self.remote_path:
+            return None
+        
+        previous = index.get("files", {})
+        return [rel_path for rel_path, info in manifest["files"].items() if previous.get(rel_path) != info]
+    
+    def _save_sync_index(self, manifest):
+        """Record the manifest of the files now present on this host.
+        
+        Args:
+            manifest: The manifest from build_manifest() that was transferred
+        """
+        index = {"folder": manifest["folder"], "remote_path": self.remote_path, "files": manifest["files"]}
+        try:
+            with open(self._sync_index_path(), "w") as f:
+                json.dump(index, f)
+        except OSError as e:
+            print(f"Could not save sync index: {e}")
+    
+    def transfer_files(self, archive=None, incremental=True):
+        """Transfer files to the remote server with rsync or as a single tar stream.
+        
+        rsync is used when available (see transfer_files_rsync). Otherwise the
+        eligible files are piped into ``tar -x`` on the remote side over one
+        SSH channel, instead of paying an SCP round trip and a ``mkdir`` per file
+        and directory. Falls back to the per-file SFTP copy if the remote
+        extraction fails.
+        
+        Args:
+            archive: Optional (bytes, int) tuple from build_archive() to reuse
+                across hosts, or a callable returning one, so the archive is
+                only packed if the tar stream is actually used; built on
+                demand if None
+            incremental: If True and this host was synced before, only send the
+                files whose time or size changed since then
+        
+        Returns:
+            int: The number of files transferred
+        """
+        manifest = self.build_manifest()
+        
+        changed_files = self._changed_files(manifest) if incremental else None
+        if changed_files is not None and not changed_files:
+            print(f"No files changed since the last transfer to {self.remote_host}; skipping.")
+            return 0
+        
+        # rsync finds the changed files on its own and sends only what differs
+        if self._rsync_available():
+            file_count = self.transfer_files_rsync()
+            if file_count is not None:
+                print(f"Successfully transferred {file_count} files to {self.remote_host}.")
+                self._save_sync_index(manifest)
+                return file_count
+            print("Falling back to the tar stream...")
+        
+        if changed_files is not None:
+            archive = self.build_archive(manifest, changed_files)
+        elif archive is None:
+            archive = self.build_archive(manifest)
+        elif callable(archive):
+            archive = archive()
+        archive_bytes, file_count = archive
+        
+        print(f"Streaming {file_count} files ({len(archive_bytes) / 1e6:.1f} MB) to {self.remote_host}...")
+        
+        remote_path = shlex.quote(self.remote_path.replace("\\", "/"))
+        tar_flags = "-xzf" if self.wan else "-xf"
+        extract_cmd = f"mkdir -p {remote_path} && tar {tar_flags} - -C {remote_path}"
+        
+        if self._openssh_available():
+            exit_status, error_output = self._transfer_archive_openssh(archive_bytes, extract_cmd)
+            if exit_status == 0:
+                print(f"Successfully transferred {file_count} files to {self.remote_host}.")
+                self._save_sync_index(manifest)
+                return file_count
+            print(f"OpenSSH upload failed ({error_output.strip()}); retrying over paramiko...")
+        
+        ssh = self.connect_ssh()
+        stdin, stdout, stderr = ssh.exec_command(extract_cmd)
+        
+        try:
+            # Feed the archive to the remote tar so it extracts as bytes arrive
+            for offset in range(0, len(archive_bytes), ARCHIVE_CHUNK_SIZE):
+                stdin.write(archive_bytes[offset:offset + ARCHIVE_CHUNK_SIZE])
+            stdin.flush()
+            stdin.channel.shutdown_write()
+            exit_status = stdout.channel.recv_exit_status()
+            error_output = stderr.read().decode()
+        except Exception as e:
+            # Abort the remote tar so it does not wait on a half-written stream
+            stdin.channel.close()
+            exit_status = -1
+            error_output = str(e)
+        
+        if exit_status != 0:
+            print(f"Remote extraction failed: {error_output}")
+            print("Falling back to per-file SFTP transfer...")
+            file_count = self.transfer_files_sftp()
         else:
-            ssh.connect(self.remote_host, username=self.remote_user, password=self.remote_password)
+            print(f"Successfully transferred {file_count} files to {self.remote_host}.")
+        
+        self._save_sync_index(manifest)
+        return file_count
+    
+    def _openssh_available(self):
+        """Check whether uploads can go through the OpenSSH client.
         
-        return ssh
+        The OpenSSH client uses OpenSSL's AES-NI accelerated ciphers, but it cannot
+        take a password non-interactively, so it is only used with key files.
+        
+        Returns:
+            bool: True if the OpenSSH path should be used
+        """
+        return bool(self.use_openssh and self.ssh_key_path and shutil.which("ssh"))
     
-    def transfer_files(self):
-        """Transfer files to the remote server.
+    def _transfer_archive_openssh(self, archive_bytes, extract_cmd):
+        """Pipe an archive into a remote command through the OpenSSH client.
+        
+        Args:
+            archive_bytes: The tar archive to send on stdin
+            extract_cmd: The remote shell command that extracts the archive
+            
+        Returns:
+            tuple: (int, str) with the exit status and the stderr output
+        """
+        cmd = ["ssh", "-T", "-x", "-i", self.ssh_key_path,
+               "-o", "BatchMode=yes",
+               "-o", f"Compression={'yes' if self.wan else 'no'}",
+               f"{self.remote_user}@{self.remote_host}", extract_cmd]
+        try:
+            result = subprocess.run(cmd, input=archive_bytes, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        except OSError as e:
+            return -1, str(e)
+        return result.returncode, result.stderr.decode()
+    
+    def _rsync_available(self):
+        """Check whether uploads can go through rsync.
+        
+        rsync runs over the OpenSSH client, which cannot take a password on its
+        own, so password authentication also needs sshpass.
+        
+        Returns:
+            bool: True if the rsync path should be used
+        """
+        if not (self.use_rsync and shutil.which("rsync") and shutil.which("ssh")):
+            return False
+        return bool(self.ssh_key_path or (self.remote_password and shutil.which("sshpass")))
+    
+    def transfer_files_rsync(self):
+        """Transfer files to the remote server with rsync.
+        
+        rsync skips files that are already up to date on the server and sends
+        only the changed blocks of the others. Remote files that no longer exist
+        locally are kept, since the experiments write their data there.
+        
+        Returns:
+            int: The number of files transferred, or None if rsync failed
+        """
+        ssh_cmd = ["ssh", "-x", "-o", "Compression=no"]
+        if self.ssh_key_path:
+            ssh_cmd += ["-i", self.ssh_key_path, "-o", "BatchMode=yes"]
+        
+        remote_path = self.remote_path.replace("\\", "/")
+        excludes = ([d + "/" for d in self.exclude_dirs] + ["*" + ext for ext in self.exclude_extensions]
+                    + [self.script_name])
+        
+        # rsync compresses on its own when asked, so SSH compression stays off;
+        # the remote rsync creates the destination folder before it starts
+        cmd = ["rsync", "-a", "--out-format=%n",
+               "-e", " ".join(shlex.quote(arg) for arg in ssh_cmd),
+               "--rsync-path", f"mkdir -p {shlex.quote(remote_path)} && rsync"]
+        if self.wan:
+            cmd.append("-z")
+        cmd += ["--exclude=" + pattern for pattern in excludes]
+        cmd += [self.folder_to_copy + os.sep, f"{self.remote_user}@{self.remote_host}:{remote_path}/"]
+        
+        env = None
+        if not self.ssh_key_path:
+            cmd = ["sshpass", "-e"] + cmd
+            env = {**os.environ, "SSHPASS": self.remote_password}
+        
+        print(f"Synchronizing project with {self.remote_host} over rsync...")
+        try:
+            result = subprocess.run(cmd, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        except OSError as e:
+            print(f"rsync upload failed ({str(e)})")
+            return None
+        
+        if result.returncode != 0:
+            print(f"rsync upload failed ({result.stderr.decode().strip()})")
+            return None
+        
+        # Directories are listed with a trailing slash; count only the files
+        return sum(1 for line in result.stdout.decode().splitlines() if line and not line.endswith("/"))
+    
+    def transfer_files_sftp(self):
+        """Transfer files to the remote server over a pool of SFTP channels.
+        
+        Each upload mostly waits on round trips to the server, so the files are
+        spread over SFTP_CHANNELS channels on the shared SSH connection and sent
+        concurrently, one file per channel at a time.
         
         Returns:
             int: The number of files transferred
@@ -115,53 +517,46 @@ class ProjectTransfer:
         # Set up SSH client
         ssh = self.connect_ssh()
         
-        # Create SCP client
-        scp = SCPClient(ssh.get_transport())
-        
-        # Count eligible files
-        eligible_files = self.count_eligible_files()
+        # Scan the project once; the file list also gives the progress total
+        jobs = self._collect_transfer_jobs()
+        eligible_files = len(jobs)
         print(f"Preparing to transfer {eligible_files} files to {self.remote_host}...")
+        if not jobs:
+            return 0
         
-        # Walk through the folder and transfer files
-        file_count = 0
-        skipped_count = 0
-        
-        for root, dirs, files in os.walk(self.folder_to_copy):
-            # Skip excluded directories
-            dirs_to_remove = [d for d in dirs if self.should_skip_directory(d)]
-            for d in dirs_to_remove:
-                dirs.remove(d)
-            
-            # Calculate relative path
-            rel_path = os.path.relpath(root, self.folder_to_copy)
-            remote_folder = os.path.join(self.remote_path, rel_path)
-            remote_folder = remote_folder.replace("\\", "/")  # Ensure proper format for remote system
-            
-            # Ensure remote directory exists
-            ssh.exec_command(f"mkdir -p {shlex.quote(remote_folder)}")
-            
-            # Copy files
-            for file in files:
-                if self.should_skip_file(file):
-                    print(f"Skipping: {file}")
-                    skipped_count += 1
-                    continue
-                    
-                local_file_path = os.path.join(root, file)
-                remote_file_path = os.path.join(remote_folder, file).replace("\\", "/")
-                
-                print(f"Copying [{file_count+1}/{eligible_files}]: {file} to {self.remote_host}")
-                scp.put(local_file_path, remote_file_path)
-                file_count += 1
+        # Create every remote directory with one command before any upload needs them
+        remote_folders = sorted({posixpath.dirname(remote_file_path) for _, remote_file_path in jobs})
+        stdin, stdout, stderr = ssh.exec_command("mkdir -p " + " ".join(shlex.quote(d) for d in remote_folders))
+        stdout.channel.recv_exit_status()
         
-        print(f"Successfully transferred {file_count} files to {self.remote_host}.")
-        print(f"Skipped {skipped_count} files (including .npy files).")
+        # Workers borrow a channel from the pool for each file and return it after
+        channels = queue.Queue()
+        for _ in range(min(SFTP_CHANNELS, eligible_files)):
+            channels.put(ssh.open_sftp())
         
-        # Close connections
-        scp.close()
-        ssh.close()
+        def put_file(local_file_path, remote_file_path):
+            sftp = channels.get()
+            try:
+                sftp.put(local_file_path, remote_file_path)
+            finally:
+                channels.put(sftp)
+            return remote_file_path
         
-        return file_count
+        try:
+            with ThreadPoolExecutor(max_workers=channels.qsize()) as executor:
+                futures = [executor.submit(put_file, local_file_path, remote_file_path)
+                           for local_file_path, remote_file_path in jobs]
+                for file_count, future in enumerate(as_completed(futures), 1):
+                    remote_file_path = future.result()
+                    print(f"Copied [{file_count}/{eligible_files}]: {posixpath.basename(remote_file_path)} to {self.remote_host}")
+        finally:
+            # Close the SFTP channels; the SSH connection stays open for reuse
+            while not channels.empty():
+                channels.get().close()
+        
+        print(f"Successfully transferred {eligible_files} files to {self.remote_host}.")
+        
+        return eligible_files
     
     def check_venv_exists(self, venv_name=".venv"):
         """Check if a virtual environment exists on the remote server.
@@ -175,20 +570,38 @@ class ProjectTransfer:
         ssh = self.connect_ssh()
         remote_venv_path = os.path.join(self.remote_path, venv_name).replace("\\", "/")
         
-        # Check if the venv directory exists
-        stdin, stdout, stderr = ssh.exec_command(f"test -d {shlex.quote(remote_venv_path)} && echo 'exists'")
-        exists = stdout.read().decode().strip() == 'exists'
+        # The python executable can only exist if the venv directory does
+        stdin, stdout, stderr = ssh.exec_command(
+            f"test -f {shlex.quote(remote_venv_path)}/bin/python && echo 'exists'"
+        )
+        return stdout.read().decode().strip() == 'exists'
+    
+    def probe_venv(self, venv_name=".venv"):
+        """Check existence, Python version and installed packages of the remote
+        virtual environment in a single SSH command.
+        
+        Args:
+            venv_name: The name of the virtual environment directory
+            
+        Returns:
+            tuple: (bool, str, str) with whether the environment exists, its Python
+                version (None if unavailable) and the lowercase pip freeze output
+        """
+        ssh = self.connect_ssh()
+        remote_venv_path = shlex.quote(os.path.join(self.remote_path, venv_name).replace("\\", "/"))
+        
+        cmd = (f"if test -f {remote_venv_path}/bin/python; then echo 'exists'; "
+               f"{remote_venv_path}/bin/python --version 2>&1; {remote_venv_path}/bin/pip freeze; fi")
+        stdin, stdout, stderr = ssh.exec_command(cmd)
+        lines = stdout.read().decode().split('\n')
         
-        # Check if the python executable exists in the venv
-        if exists:
-            stdin, stdout, stderr = ssh.exec_command(
-                f"test -f {shlex.quote(remote_venv_path)}/bin/python && echo 'exists'"
-            )
-            python_exists = stdout.read().decode().strip() == 'exists'
-            exists = exists and python_exists
+        if lines[0].strip() != 'exists':
+            return False, None, ""
         
-        ssh.close()
-        return exists
+        python_version = lines[1].strip() if len(lines) > 1 and lines[1].strip() else None
+        installed_packages = '\n'.join(lines[2:]).lower()
+        
+        return True, python_version, installed_packages
     
     def check_venv_packages(self, venv_name=".venv"):
         """Check if the virtual environment has all required packages.
@@ -207,6 +620,18 @@ class ProjectTransfer:
         stdin, stdout, stderr = ssh.exec_command(cmd)
         installed_packages = stdout.read().decode().lower()
         
+        return self._find_missing_packages(installed_packages)
+    
+    def _find_missing_packages(self, installed_packages):
+        """Compare pip freeze output against the required packages.
+        
+        Args:
+            installed_packages: The lowercase output of pip freeze
+            
+        Returns:
+            tuple: (bool, list) indicating whether all packages are installed and
+                which ones are missing
+        """
         # Check if each required package is installed
         all_packages_installed = True
         missing_packages = []
@@ -220,7 +645,6 @@ class ProjectTransfer:
                 all_packages_installed = False
                 missing_packages.append(package)
         
-        ssh.close()
         return all_packages_installed, missing_packages
     
     def check_venv_python_version(self, venv_name=".venv"):
@@ -240,31 +664,34 @@ class ProjectTransfer:
         stdin, stdout, stderr = ssh.exec_command(cmd)
         version_output = stdout.read().decode().strip()
         
-        ssh.close()
         return version_output if version_output else None
     
-    def create_virtual_environment(self, venv_name=".venv"):
+    def create_virtual_environment(self, venv_name=".venv", abort=None):
         """Create a virtual environment on the remote server with the specified dependencies.
         If a valid environment already exists, it will be kept.
         
         Args:
             venv_name: The name of the virtual environment directory
+            abort: Optional threading.Event; if it is set once the environment
+                has been checked, no packages are installed
             
         Returns:
-            bool: True if successful, False if there was an error
+            bool: True if successful, False if there was an error or the setup was aborted
         """
         print(f"\nChecking virtual environment '{venv_name}' on {self.remote_host}...")
         
-        # Check if virtual environment exists
-        venv_exists = self.check_venv_exists(venv_name)
+        # Check existence, Python version and packages in one round trip
+        venv_exists, python_version, installed_packages = self.probe_venv(venv_name)
+        
+        if abort is not None and abort.is_set():
+            print(f"Deployment aborted; skipping package installation on {self.remote_host}.")
+            return False
         
         if venv_exists:
-            # Check Python version
-            python_version = self.check_venv_python_version(venv_name)
             print(f"Found existing virtual environment with {python_version}")
             
             # Check if all required packages are installed
-            all_packages_installed, missing_packages = self.check_venv_packages(venv_name)
+            all_packages_installed, missing_packages = self._find_missing_packages(installed_packages)
             
             if all_packages_installed:
                 print(f"The existing virtual environment has all required packages installed.")
@@ -296,56 +723,52 @@ class ProjectTransfer:
             # Full path to the virtual environment
             remote_venv_path = os.path.join(self.remote_path, venv_name).replace("\\", "/")
             
-            # Remove existing virtual environment if it exists
+            # Remove any existing virtual environment and create a new one with system
+            # site packages in one command, so the removal has finished before the
+            # creation starts and only one exec round trip is paid
             print(f"Removing any existing '{venv_name}' directory...")
-            ssh.exec_command(f"rm -rf {shlex.quote(remote_venv_path)}")
-            
-            # Create new virtual environment with system site packages
             print(f"Creating new virtual environment with system site packages...")
-            cmd_create_venv = f"cd {shlex.quote(self.remote_path)} && /usr/bin/python3.8 -m venv --system-site-packages {shlex.quote(venv_name)}"
+            cmd_create_venv = (f"rm -rf {shlex.quote(remote_venv_path)} && cd {shlex.quote(self.remote_path)} && "
+                               f"/usr/bin/python3.8 -m venv --system-site-packages {shlex.quote(venv_name)}")
             
             stdin, stdout, stderr = ssh.exec_command(cmd_create_venv)
             exit_status = stdout.channel.recv_exit_status()
             
             if exit_status != 0:
                 print(f"Error creating virtual environment: {stderr.read().decode()}")
-                ssh.close()
                 return False
             
             # Install pybind11 first
             print("Installing pybind11...")
             cmd_install_pybind = f"cd {shlex.quote(self.remote_path)} && {shlex.quote(remote_venv_path)}/bin/pip install pybind11"
             stdin, stdout, stderr = ssh.exec_command(cmd_install_pybind)
-            self._stream_output(stdout)
+            error_output = self._stream_output(stdout)
             exit_status = stdout.channel.recv_exit_status()
             
             if exit_status != 0:
-                print(f"Error installing pybind11: {stderr.read().decode()}")
-                ssh.close()
+                print(f"Error installing pybind11: {error_output}")
                 return False
             
             # Upgrade pip and wheel
             print("Upgrading pip and wheel...")
             cmd_upgrade_pip = f"cd {shlex.quote(self.remote_path)} && {shlex.quote(remote_venv_path)}/bin/pip install --upgrade pip wheel"
             stdin, stdout, stderr = ssh.exec_command(cmd_upgrade_pip)
-            self._stream_output(stdout)
+            error_output = self._stream_output(stdout)
             exit_status = stdout.channel.recv_exit_status()
             
             if exit_status != 0:
-                print(f"Error upgrading pip and wheel: {stderr.read().decode()}")
-                ssh.close()
+                print(f"Error upgrading pip and wheel: {error_output}")
                 return False
             
             # Upgrade scipy
             print("Upgrading scipy...")
             cmd_upgrade_scipy = f"cd {shlex.quote(self.remote_path)} && {shlex.quote(remote_venv_path)}/bin/pip install --upgrade scipy"
             stdin, stdout, stderr = ssh.exec_command(cmd_upgrade_scipy)
-            self._stream_output(stdout)
+            error_output = self._stream_output(stdout)
             exit_status = stdout.channel.recv_exit_status()
             
             if exit_status != 0:
-                print(f"Error upgrading scipy: {stderr.read().decode()}")
-                ssh.close()
+                print(f"Error upgrading scipy: {error_output}")
                 return False
             
             # Install other required packages
@@ -353,21 +776,18 @@ class ProjectTransfer:
             print(f"Installing required packages: {', '.join(packages_to_install)}...")
             cmd_install_packages = f"cd {shlex.quote(self.remote_path)} && {shlex.quote(remote_venv_path)}/bin/pip install {' '.join(packages_to_install)}"
             stdin, stdout, stderr = ssh.exec_command(cmd_install_packages)
-            self._stream_output(stdout)
+            error_output = self._stream_output(stdout)
             exit_status = stdout.channel.recv_exit_status()
             
             if exit_status != 0:
-                print(f"Error installing required packages: {stderr.read().decode()}")
-                ssh.close()
+                print(f"Error installing required packages: {error_output}")
                 return False
             
             print(f"Virtual environment '{venv_name}' created successfully on {self.remote_host}.")
-            ssh.close()
             return True
             
         except Exception as e:
             print(f"Error setting up virtual environment: {str(e)}")
-            ssh.close()
             return False
     
     def _install_packages(self, venv_name, packages):
@@ -406,33 +826,84 @@ class ProjectTransfer:
                 print(f"Installing missing packages: {', '.join(packages)}...")
                 cmd_install_packages = f"cd {shlex.quote(self.remote_path)} && {shlex.quote(remote_venv_path)}/bin/pip install {' '.join(packages)}"
                 stdin, stdout, stderr = ssh.exec_command(cmd_install_packages)
-                self._stream_output(stdout)
+                error_output = self._stream_output(stdout)
                 exit_status = stdout.channel.recv_exit_status()
                 
                 if exit_status != 0:
-                    print(f"Error installing packages: {stderr.read().decode()}")
-                    ssh.close()
+                    print(f"Error installing packages: {error_output}")
                     return False
             
             print(f"All required packages installed successfully in existing virtual environment.")
-            ssh.close()
             return True
             
         except Exception as e:
             print(f"Error installing packages in existing virtual environment: {str(e)}")
-            ssh.close()
             return False
     
+    def _relay_channel(self, channel, capture_stdout=False):
+        """Echo a remote command's stdout while collecting its stderr.
+        
+        Blocks in select() on the channel until data, EOF or a short timeout
+        instead of spinning on recv_ready(), and drains stderr alongside stdout so
+        a chatty stderr cannot stall the command once its window fills.
+        
+        Args:
+            channel: The paramiko channel of the running command
+            capture_stdout: If True, also return the stdout text
+            
+        Returns:
+            tuple: (str, str) with the stdout text (empty unless captured) and the
+                stderr text
+        """
+        # Incremental decoding keeps multi-byte characters split across chunks intact
+        out_decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        err_decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        out_chunks = []
+        err_chunks = []
+        
+        def relay_stdout(data, final=False):
+            text = out_decoder.decode(data, final=final)
+            if text:
+                sys.stdout.write(text)
+                sys.stdout.flush()
+                if capture_stdout:
+                    out_chunks.append(text)
+        
+        while True:
+            select.select([channel], [], [], 0.1)
+            if channel.recv_ready():
+                relay_stdout(channel.recv(STREAM_CHUNK_SIZE))
+            if channel.recv_stderr_ready():
+                err_chunks.append(err_decoder.decode(channel.recv_stderr(STREAM_CHUNK_SIZE)))
+            if channel.exit_status_ready() and not channel.recv_ready() and not channel.recv_stderr_ready():
+                break
+        
+        # Drain anything still in flight until the remote side closes the streams
+        data = channel.recv(STREAM_CHUNK_SIZE)
+        while data:
+            relay_stdout(data)
+            data = channel.recv(STREAM_CHUNK_SIZE)
+        relay_stdout(b"", final=True)
+        
+        data = channel.recv_stderr(STREAM_CHUNK_SIZE)
+        while data:
+            err_chunks.append(err_decoder.decode(data))
+            data = channel.recv_stderr(STREAM_CHUNK_SIZE)
+        err_chunks.append(err_decoder.decode(b"", final=True))
+        
+        return "".join(out_chunks), "".join(err_chunks)
+    
     def _stream_output(self, stdout):
         """Stream the output from a remote command.
         
         Args:
             stdout: The stdout from the command
+            
+        Returns:
+            str: The stderr output of the command
         """
-        while not stdout.channel.exit_status_ready():
-            if stdout.channel.recv_ready():
-                output = stdout.channel.recv(1024).decode()
-                print(output, end='')
+        _, error_output = self._relay_channel(stdout.channel)
+        return error_output
     
     def add_excluded_extension(self, extension):
         """Add a file extension to the exclusion list.
@@ -444,6 +915,7 @@ class ProjectTransfer:
             extension = '.' + extension
         if extension not in self.exclude_extensions:
             self.exclude_extensions.append(extension)
+            self._update_exclusion_filters()
     
     def add_excluded_directory(self, dirname):
         """Add a directory name to the exclusion list.
@@ -453,8 +925,66 @@ class ProjectTransfer:
         """
         if dirname not in self.exclude_dirs:
             self.exclude_dirs.append(dirname)
+            self._update_exclusion_filters()
 
-    def execute_remote_script(self, script_path, command_args=None, env_vars=None, input_values=None):
+    def fetch_data(self, remote_dir="data", local_dir=None):
+        """Download new or grown data files from the remote working directory.
+        
+        Files already present locally with the same size are skipped, so this
+        can be called repeatedly while an experiment is still writing data.
+        
+        Args:
+            remote_dir: The data directory relative to the remote_path
+            local_dir: The local destination (defaults to the project's data folder)
+            
+        Returns:
+            int: The number of files downloaded
+        """
+        if local_dir is None:
+            local_dir = os.path.join(self.folder_to_copy, "data")
+        os.makedirs(local_dir, exist_ok=True)
+        
+        remote_data_path = os.path.join(self.remote_path, remote_dir).replace("\\", "/")
+        
+        sftp = self.connect_ssh().open_sftp()
+        file_count = 0
+        try:
+            for attr in sftp.listdir_attr(remote_data_path):
+                local_file_path = os.path.join(local_dir, attr.filename)
+                try:
+                    if os.path.getsize(local_file_path) == attr.st_size:
+                        continue
+                except OSError:
+                    pass
+                
+                sftp.get(f"{remote_data_path}/{attr.filename}", local_file_path)
+                file_count += 1
+        except IOError as e:
+            print(f"Could not fetch data from {self.remote_host}: {str(e)}")
+        finally:
+            sftp.close()
+        
+        if file_count:
+            print(f"Fetched {file_count} data files from {self.remote_host}.")
+        return file_count
+    
+    def _sync_data_loop(self, stop_event, interval):
+        """Periodically fetch data files until stop_event is set.
+        
+        Args:
+            stop_event: threading.Event signalling that the script has finished
+            interval: Seconds between fetches
+        """
+        while not stop_event.wait(interval):
+            # A dropped connection must not end the sync silently; report it
+            # and try again on the next period, which reconnects
+            try:
+                self.fetch_data()
+            except (paramiko.SSHException, EOFError, OSError) as e:
+                print(f"Data sync from {self.remote_host} failed, retrying in {interval} s: {str(e)}")
+    
+    def execute_remote_script(self, script_path, command_args=None, env_vars=None, input_values=None,
+                              capture_output=True, sync_data_interval=None):
         """Execute a Python script within the virtual environment on the remote server.
         
         Args:
@@ -462,9 +992,16 @@ class ProjectTransfer:
             command_args: Optional string of arguments to pass to the script
             env_vars: Optional dictionary of environment variables to set
             input_values: Optional string of input values to feed to stdin
+            capture_output: If True, keep a copy of the script's stdout to return;
+                set to False for long runs so the output is only streamed to the
+                terminal instead of accumulating in memory
+            sync_data_interval: Optional period in seconds at which the remote data
+                folder is pulled while the script runs, followed by a final fetch
+                when it exits, so the download overlaps the experiment
             
         Returns:
             tuple: (bool, str) where bool indicates success/failure and str contains the output
+                (only the errors if capture_output is False)
         """
         # Normalize the script path and ensure it uses Unix-style forward slashes
         norm_script_path = os.path.normpath(script_path).replace("\\", "/")
@@ -508,22 +1045,27 @@ class ProjectTransfer:
                 stdin.flush()
                 stdin.channel.shutdown_write()  # Signal that no more input will be sent
             
+            # Pull data in the background while the script runs
+            stop_sync = threading.Event()
+            sync_thread = None
+            if sync_data_interval:
+                sync_thread = threading.Thread(target=self._sync_data_loop,
+                                               args=(stop_sync, sync_data_interval), daemon=True)
+                sync_thread.start()
+            
             # Stream output in real-time
-            output = ""
-            while not stdout.channel.exit_status_ready():
-                if stdout.channel.recv_ready():
-                    data = stdout.channel.recv(1024).decode()
-                    output += data
-                    print(data, end='')
-            
-            # Get any remaining output
-            data = stdout.read().decode()
-            if data:
-                output += data
-                print(data, end='')
+            try:
+                output, error_output = self._relay_channel(stdout.channel, capture_stdout=capture_output)
+            finally:
+                stop_sync.set()
+                if sync_thread is not None:
+                    sync_thread.join()
+            
+            # Final fetch picks up whatever was written at the end of the run
+            if sync_data_interval:
+                self.fetch_data()
             
             # Check for errors
-            error_output = stderr.read().decode()
             if error_output:
                 print(f"\nErrors encountered while executing script:")
                 print(error_output)
@@ -538,9 +1080,6 @@ class ProjectTransfer:
             else:
                 print(f"\nScript execution failed on {self.remote_host} with exit code {exit_status}")
             
-            # Close the connection
-            ssh.close()
-            
             return success, output
             
         except Exception as e:
@@ -548,8 +1087,49 @@ class ProjectTransfer:
             return False, str(e)
 
 
+def deploy_to_host(name, transfer, archive=None, incremental=True, abort=None):
+    """Transfer the project to one host and set up its virtual environment.
+    
+    Args:
+        name: The display name of the host
+        transfer: The ProjectTransfer instance for the host
+        archive: Optional prebuilt archive from ProjectTransfer.build_archive(),
+            or a callable returning one
+        incremental: If True, only send files changed since the last transfer
+        abort: Optional threading.Event set when another host failed; it is
+            checked before each stage (transfer, environment check, install),
+            so this host stops at the next one instead of running to the end
+        
+    Returns:
+        bool: True if the virtual environment is ready, False otherwise
+    """
+    if abort is not None and abort.is_set():
+        print(f"Deployment aborted; not starting the transfer to {name}.")
+        return False
+    
+    print(f"Starting transfer to {name}...")
+    transfer.transfer_files(archive, incremental)
+    
+    if abort is not None and abort.is_set():
+        print(f"Deployment aborted; skipping the virtual environment on {name}.")
+        return False
+    
+    # Create or verify virtual environment
+    return transfer.create_virtual_environment(abort=abort)
+
+
 # Sample main function
 def main():
+    # Parse command line arguments
+    parser = argparse.ArgumentParser(description='Transfer ProxiPy to the spacecraft platforms')
+    parser.add_argument('--wan', action='store_true', help='Compress transfers for slow links (default: uncompressed LAN transfer)')
+    parser.add_argument('--full', action='store_true', help='Send every file even if the host was synced before (default: only changed files)')
+    parser.add_argument('--keep-going', action='store_true', help='Keep deploying to other hosts after one fails (default: stop at the first failure)')
+    parser.add_argument('--run', metavar='SCRIPT', help='Run this script (e.g. main/main.py) on every host after deploying (default: deploy only)')
+    parser.add_argument('--run-args', default='', help='Arguments passed to the script given with --run; use the = form for options, e.g. --run-args="--experiment"')
+    parser.add_argument('--sync-data', type=float, metavar='SECONDS', help='With --run, pull the remote data folder every SECONDS while the script runs (default: no data is fetched)')
+    args = parser.parse_args()
+    
     # Configuration for spot-red
     red_config = {
         'remote_host': '192.168.1.110',
@@ -567,25 +1147,73 @@ def main():
     }
     
     # Create transfer instances
-    red_transfer = ProjectTransfer(**red_config)
-    black_transfer = ProjectTransfer(**black_config)
+    red_transfer = ProjectTransfer(**red_config, wan=args.wan)
+    black_transfer = ProjectTransfer(**black_config, wan=args.wan)
+    
+    # Deploy to both platforms concurrently; each host has its own connection,
+    # so the transfers and pip installs overlap instead of running back to back
+    hosts = {'spot-red': red_transfer, 'spot-black': black_transfer}
+    
+    # Both hosts receive the same project, so it is packed at most once; only
+    # the tar stream needs it, so nothing is packed when rsync does the transfer.
+    # The lock makes a host that asks while the other is packing wait for it
+    archive_lock = threading.Lock()
+    build_archive = lru_cache(maxsize=None)(red_transfer.build_archive)
+    
+    def archive():
+        with archive_lock:
+            return build_archive()
     
-    # Transfer files to spot-red
-    print("Starting transfer to spot-red...")
-    red_transfer.transfer_files()
+    # A running transfer cannot be interrupted, so a failure sets this event and
+    # the other hosts stop at the start of their next stage
+    abort = threading.Event()
     
-    # Create or verify virtual environment on spot-red
-    red_transfer.create_virtual_environment()
+    results = {}
+    with ThreadPoolExecutor(max_workers=len(hosts)) as executor:
+        futures = {executor.submit(deploy_to_host, name, transfer, archive, not args.full, abort): name
+                   for name, transfer in hosts.items()}
+        
+        # Report hosts as they finish rather than in submission order
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                print(f"Deployment to {name} failed: {str(e)}")
+                results[name] = False
+            
+            if not results[name] and not args.keep_going and not abort.is_set():
+                print(f"Stopping deployment after failure on {name}; "
+                      f"the other hosts stop after their current stage...")
+                abort.set()
     
-    # Transfer files to spot-black
-    print("\nStarting transfer to spot-black...")
-    black_transfer.transfer_files()
+    for name in hosts:
+        print(f"{name} deployment: {'SUCCESS' if results.get(name) else 'FAILED'}")
     
-    # Create or verify virtual environment on spot-black
-    black_transfer.create_virtual_environment()
+    failed = [name for name in hosts if not results.get(name)]
+    if failed:
+        print(f"\nDeployment failed on: {', '.join(failed)}")
+        sys.exit(1)
     
     print("\nAll transfers and virtual environment setups complete!")
     
+    if args.run:
+        # Start the script on every host at once; with --sync-data each host
+        # pulls its data while the run is still going
+        print("\n" + "="*50)
+        print("EXECUTING REMOTE SCRIPTS")
+        print("="*50)
+        
+        with ThreadPoolExecutor(max_workers=len(hosts)) as executor:
+            futures = {executor.submit(transfer.execute_remote_script, args.run, command_args=args.run_args,
+                                       capture_output=False, sync_data_interval=args.sync_data): name
+                       for name, transfer in hosts.items()}
+            run_results = {futures[future]: future.result()[0] for future in as_completed(futures)}
+        
+        for name in hosts:
+            print(f"{name} execution: {'SUCCESS' if run_results[name] else 'FAILED'}")
+        failed = [name for name in hosts if not run_results[name]]
+    
     # # Ask user if this is an experiment
     # is_experiment = input("\nIs this an experiment? (yes/no): ").lower().strip() in ['yes', 'y', 'true', '1']
     # experiment_value = True if is_experiment else False
@@ -615,6 +1243,13 @@ def main():
     # print("="*50)
     # print(f"spot-red execution: {'SUCCESS' if red_success else 'FAILED'}")
     # print(f"spot-black execution: {'SUCCESS' if black_success else 'FAILED'}")
+    
+    # Close the shared SSH connections
+    red_transfer.close()
+    black_transfer.close()
+    
+    if failed:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -18,7 +18,7 @@ import cProfile
 import pstats
 
 # Import custom libraries
-from tools.utils import precise_delay_microsecond, class_init, create_phase_tracker, get_platform_id, handle_data_logging, enable_disable_pucks, set_platform_configuration, handle_loop_timing
+from tools.utils import precise_delay_microsecond, class_init, get_current_locations_exp, create_phase_tracker, get_platform_id, make_data_logger, enable_disable_pucks, set_platform_configuration, handle_loop_timing, set_realtime_scheduling
 from classes.Phasespace import OwlStreamProcessor
 from classes.Thrusters import Thrusters
 from classes.BMI160 import IMUProcessor
@@ -53,6 +53,13 @@ def main():
     targetGyroAccel = {}
     obstacleGyroAccel = {}
 
+    # Latest states of the simulated models, filled in place every control cycle
+    sim_states = {"chaser": None, "target": None, "obstacle": None}
+
+    # Placeholder IMU reading, shared instead of rebuilt every control cycle;
+    # the data logger only reads it
+    ZERO_GYRO_ACCEL = {'gx': 0.0, 'gy': 0.0, 'gz': 0.0, 'ax': 0.0, 'ay': 0.0, 'az': 0.0}
+
     phase0_clock = 0
     phase1_clock = 0
     phase2_clock = 0
@@ -80,7 +87,7 @@ def main():
         DURATION = sum([phases[key] for key in phases.keys()])
 
         # Create a phase tracker
-        track_phase, is_phase = create_phase_tracker(phases)
+        track_phase, _ = create_phase_tracker(phases)
 
         # Set simulation parameters
         IS_REALTIME = False
@@ -96,14 +103,23 @@ def main():
         chaserModel, targetModel, obstacleModel, \
         chaserControl, targetControl, obstacleControl, \
         dataContainer, chaser_params, target_params, \
-        obstacle_params = class_init(PERIOD)
+        obstacle_params = class_init(PERIOD, CHASER_ACTIVE, TARGET_ACTIVE, OBSTACLE_ACTIVE, DURATION)
 
         # Get the identity of the hardware
         PLATFORM = get_platform_id()
 
+        # Only run an agent's control pipeline when its thrusters are driven from
+        # this platform (experiment) or its model needs to be integrated (simulation)
+        CHASER_COMMANDED = CHASER_ACTIVE and (not IS_EXPERIMENT or PLATFORM == 1)
+        TARGET_COMMANDED = TARGET_ACTIVE and (not IS_EXPERIMENT or PLATFORM == 2)
+        OBSTACLE_COMMANDED = OBSTACLE_ACTIVE and (not IS_EXPERIMENT or PLATFORM == 3)
+
         # If this is an experiment, set the platform configuration
         if IS_EXPERIMENT:
 
+            # Pin the control loop to an isolated core and raise its priority
+            set_realtime_scheduling(cpu_core=3, priority=80)
+
             streamChaser, streamTarget, streamObstacle, \
                 imuChaser, imuTarget, imuObstacle = set_platform_configuration(CHASER_ACTIVE, TARGET_ACTIVE, OBSTACLE_ACTIVE, \
                                                                                PLATFORM, OwlStreamProcessor, IMUProcessor)
@@ -169,6 +185,10 @@ def main():
         # Handle GPIO logic for the thrustersObstacle
         thrustersObstacle = Thrusters(pwm_frequency=5, is_experiment=IS_EXPERIMENT)
 
+        # Data logger for the active spacecraft
+        log_data = make_data_logger(dataContainer, chaserControl, thrustersChaser, targetControl, thrustersTarget,
+                                    obstacleControl, thrustersObstacle, CHASER_ACTIVE, TARGET_ACTIVE, OBSTACLE_ACTIVE)
+
         # Set the start time for the experiment
         if IS_EXPERIMENT:
             # Get the latest states from PhaseSpace
@@ -216,136 +236,61 @@ def main():
 
                 # Get the latest states from PhaseSpace
                 if PLATFORM == 1:
-                    latest_states = streamChaser.get()
-                    if CHASER_ACTIVE:
-                        currentLocationChaser = np.array([latest_states.get("chaser")['pos'][0],
-                                                    latest_states.get("chaser")['pos'][1],
-                                                    latest_states.get("chaser")['att'],
-                                                    latest_states.get("chaser")['vel'][0],
-                                                    latest_states.get("chaser")['vel'][1],
-                                                    latest_states.get("chaser")['omega']])
-                    else:
-                        currentLocationChaser = np.array([0, 0, 0, 0, 0, 0])
-
-                    if TARGET_ACTIVE:
-                        currentLocationTarget = np.array([latest_states.get("target")['pos'][0],
-                                                    latest_states.get("target")['pos'][1],
-                                                    latest_states.get("target")['att'],
-                                                    latest_states.get("target")['vel'][0],
-                                                    latest_states.get("target")['vel'][1],
-                                                    latest_states.get("target")['omega']])
-                    else:
-                        currentLocationTarget = np.array([0, 0, 0, 0, 0, 0])
-
-                    if OBSTACLE_ACTIVE:
-                        currentLocationObstacle = np.array([latest_states.get("obstacle")['pos'][0],
-                                                    latest_states.get("obstacle")['pos'][1],
-                                                    latest_states.get("obstacle")['att'],
-                                                    latest_states.get("obstacle")['vel'][0],
-                                                    latest_states.get("obstacle")['vel'][1],
-                                                    latest_states.get("obstacle")['omega']])
-                    else:
-                        currentLocationObstacle = np.array([0, 0, 0, 0, 0, 0])
-
+                    streamPlatform = streamChaser
                 elif PLATFORM == 2:
-                    latest_states = streamTarget.get()
-                    if CHASER_ACTIVE:
-                        currentLocationChaser = np.array([latest_states.get("chaser")['pos'][0],
-                                                    latest_states.get("chaser")['pos'][1],
-                                                    latest_states.get("chaser")['att'],
-                                                    latest_states.get("chaser")['vel'][0],
-                                                    latest_states.get("chaser")['vel'][1],
-                                                    latest_states.get("chaser")['omega']])
-                    else:
-                        currentLocationChaser = np.array([0, 0, 0, 0, 0, 0])
-
-                    if TARGET_ACTIVE:
-                        currentLocationTarget = np.array([latest_states.get("target")['pos'][0],
-                                                    latest_states.get("target")['pos'][1],
-                                                    latest_states.get("target")['att'],
-                                                    latest_states.get("target")['vel'][0],
-                                                    latest_states.get("target")['vel'][1],
-                                                    latest_states.get("target")['omega']])
-                    else:
-                        currentLocationTarget = np.array([0, 0, 0, 0, 0, 0])
-
-                    if OBSTACLE_ACTIVE:
-                        currentLocationObstacle = np.array([latest_states.get("obstacle")['pos'][0],
-                                                    latest_states.get("obstacle")['pos'][1],
-                                                    latest_states.get("obstacle")['att'],
-                                                    latest_states.get("obstacle")['vel'][0],
-                                                    latest_states.get("obstacle")['vel'][1],
-                                                    latest_states.get("obstacle")['omega']])
-                    else:
-                        currentLocationObstacle = np.array([0, 0, 0, 0, 0, 0])
+                    streamPlatform = streamTarget
                 else:
                     print('Invalid platform selected; terminating control loop...')
                     break
+
+                latest_states, currentLocationChaser, currentLocationTarget, currentLocationObstacle = \
+                    get_current_locations_exp(streamPlatform, CHASER_ACTIVE, TARGET_ACTIVE, OBSTACLE_ACTIVE)
                 
                 # Get the latest IMU data
                 if PLATFORM == 1:
                     try:
                         chaserGyroAccel = imuChaser.get()
                     except:
-                        chaserGyroAccel = {'gx': 0.0, 'gy': 0.0, 'gz': 0.0, 'ax': 0.0, 'ay': 0.0, 'az': 0.0}
-                    targetGyroAccel = {'gx': 0.0, 'gy': 0.0, 'gz': 0.0, 'ax': 0.0, 'ay': 0.0, 'az': 0.0}
-                    obstacleGyroAccel = {'gx': 0.0, 'gy': 0.0, 'gz': 0.0, 'ax': 0.0, 'ay': 0.0, 'az': 0.0}
+                        chaserGyroAccel = ZERO_GYRO_ACCEL
+                    targetGyroAccel = ZERO_GYRO_ACCEL
+                    obstacleGyroAccel = ZERO_GYRO_ACCEL
                 elif PLATFORM == 2:
-                    chaserGyroAccel = {'gx': 0.0, 'gy': 0.0, 'gz': 0.0, 'ax': 0.0, 'ay': 0.0, 'az': 0.0}
+                    chaserGyroAccel = ZERO_GYRO_ACCEL
                     try:
                         targetGyroAccel = imuTarget.get()
                     except:
-                        targetGyroAccel = {'gx': 0.0, 'gy': 0.0, 'gz': 0.0, 'ax': 0.0, 'ay': 0.0, 'az': 0.0}
-                    obstacleGyroAccel = {'gx': 0.0, 'gy': 0.0, 'gz': 0.0, 'ax': 0.0, 'ay': 0.0, 'az': 0.0}
+                        targetGyroAccel = ZERO_GYRO_ACCEL
+                    obstacleGyroAccel = ZERO_GYRO_ACCEL
                 elif PLATFORM == 3:
-                    chaserGyroAccel = {'gx': 0.0, 'gy': 0.0, 'gz': 0.0, 'ax': 0.0, 'ay': 0.0, 'az': 0.0}
-                    targetGyroAccel = {'gx': 0.0, 'gy': 0.0, 'gz': 0.0, 'ax': 0.0, 'ay': 0.0, 'az': 0.0}
+                    chaserGyroAccel = ZERO_GYRO_ACCEL
+                    targetGyroAccel = ZERO_GYRO_ACCEL
                     try:
                         obstacleGyroAccel = imuObstacle.get()
                     except:
-                        obstacleGyroAccel = {'gx': 0.0, 'gy': 0.0, 'gz': 0.0, 'ax': 0.0, 'ay': 0.0, 'az': 0.0}
+                        obstacleGyroAccel = ZERO_GYRO_ACCEL
             
                 
             else:
 
-                # Get the latest states from all models
-                latest_states_chaser = chaserModel.get()
-                latest_states_target = targetModel.get()
-                latest_states_obstacle = obstacleModel.get()
-
-                # Create a latest_states variable to mimic the PhaseSpace data structure
-                latest_states = {
-                    "chaser": latest_states_chaser.get("chaser"),
-                    "target": latest_states_target.get("target"),
-                    "obstacle": latest_states_obstacle.get("obstacle")
-                }
-
-                # Get the current location for each spacecraft
-                currentLocationChaser = np.array([latest_states.get("chaser")['pos'][0],
-                                                    latest_states.get("chaser")['pos'][1],
-                                                    latest_states.get("chaser")['att'],
-                                                    latest_states.get("chaser")['vel'][0],
-                                                    latest_states.get("chaser")['vel'][1],
-                                                    latest_states.get("chaser")['omega']])
-
-                currentLocationTarget = np.array([latest_states.get("target")['pos'][0],
-                                                latest_states.get("target")['pos'][1],
-                                                latest_states.get("target")['att'],
-                                                latest_states.get("target")['vel'][0],
-                                                latest_states.get("target")['vel'][1],
-                                                latest_states.get("target")['omega']])
-
-                currentLocationObstacle = np.array([latest_states.get("obstacle")['pos'][0],
-                                                    latest_states.get("obstacle")['pos'][1],
-                                                    latest_states.get("obstacle")['att'],
-                                                    latest_states.get("obstacle")['vel'][0],
-                                                    latest_states.get("obstacle")['vel'][1],
-                                                    latest_states.get("obstacle")['omega']])
+                # Get the latest states from all models into a latest_states
+                # variable that mimics the PhaseSpace data structure; the same
+                # dictionary is reused and only its values are replaced
+                latest_states = sim_states
+                latest_states["chaser"] = chaserModel.get().get("chaser")
+                latest_states["target"] = targetModel.get().get("target")
+                latest_states["obstacle"] = obstacleModel.get().get("obstacle")
+
+                # Get the current location for each spacecraft, walking each
+                # state dictionary once
+                currentLocationChaser, currentLocationTarget, currentLocationObstacle = \
+                    [np.array([state['pos'][0], state['pos'][1], state['att'],
+                               state['vel'][0], state['vel'][1], state['omega']])
+                     for state in latest_states.values()]
                 
                 # Placeholder values for simulations
-                chaserGyroAccel = {'gx': 0.0, 'gy': 0.0, 'gz': 0.0, 'ax': 0.0, 'ay': 0.0, 'az': 0.0}
-                targetGyroAccel = {'gx': 0.0, 'gy': 0.0, 'gz': 0.0, 'ax': 0.0, 'ay': 0.0, 'az': 0.0}
-                obstacleGyroAccel = {'gx': 0.0, 'gy': 0.0, 'gz': 0.0, 'ax': 0.0, 'ay': 0.0, 'az': 0.0}
+                chaserGyroAccel = ZERO_GYRO_ACCEL
+                targetGyroAccel = ZERO_GYRO_ACCEL
+                obstacleGyroAccel = ZERO_GYRO_ACCEL
 
             #========================================#
             # HANDLE TERMINATION CONDITIONS
@@ -356,28 +301,28 @@ def main():
 
                 if PLATFORM == 1:
 
-                    if latest_states.get("chaser")['t'] - t_init >= DURATION:
+                    t_now = latest_states["chaser"]['t'] - t_init
+
+                    if t_now >= DURATION:
                         print('Experiment complete; terminating control loop...')
                         break
 
-                    t_now = latest_states.get("chaser")['t']-t_init
-
                 elif PLATFORM == 2:
 
-                    if latest_states.get("target")['t'] - t_init >= DURATION:
+                    t_now = latest_states["target"]['t'] - t_init
+
+                    if t_now >= DURATION:
                         print('Experiment complete; terminating control loop...')
                         break
 
-                    t_now = latest_states.get("target")['t']-t_init
-
                 elif PLATFORM == 3:
 
-                    if latest_states.get("obstacle")['t'] - t_init >= DURATION:
+                    t_now = latest_states["obstacle"]['t'] - t_init
+
+                    if t_now >= DURATION:
                         print('Experiment complete; terminating control loop...')
                         break
 
-                    t_now = latest_states.get("obstacle")['t']-t_init
-
             else:
 
                 if t_now >= DURATION:
@@ -393,7 +338,7 @@ def main():
             # HANDLE PHASE TRANSITIONS
             #========================================#
 
-            track_phase(t_now)
+            phase = track_phase(t_now)
 
             #========================================#
             # HANDLE MAIN PHASE LOGIC
@@ -403,7 +348,7 @@ def main():
             # PHASE 0: Initialization
             #----------------------------------------#
 
-            if is_phase(0):
+            if phase == 0:
 
                 # Define the desired location for the chaser
                 desiredLocationChaser = np.array([0, 0, 0, 0, 0, 0])
@@ -421,7 +366,7 @@ def main():
             # PHASE 1: Pucks
             #----------------------------------------#
 
-            elif is_phase(1):
+            elif phase == 1:
 
                 # Define the desired location for the chaser
                 desiredLocationChaser = np.array([0, 0, 0, 0, 0, 0])
@@ -439,7 +384,7 @@ def main():
             # PHASE 2: Approach
             #----------------------------------------#
             
-            elif is_phase(2):
+            elif phase == 2:
 
                 # Define the desired location for the chaser
                 # [m, m, rad, m/s, m/s, rad/s]
@@ -460,7 +405,7 @@ def main():
             # PHASE 3: User Experiments
             #----------------------------------------#
 
-            elif is_phase(3):
+            elif phase == 3:
 
                 # Calculate a new time for this phase that starts at zero and increments
 
@@ -494,7 +439,7 @@ def main():
             # PHASE 4: Home
             #----------------------------------------#
 
-            elif is_phase(4):
+            elif phase == 4:
 
                 # Define the desired location for the chaser
                 # [m, m, rad, m/s, m/s, rad/s]
@@ -515,7 +460,7 @@ def main():
             # PHASE 5: Shutdown
             #----------------------------------------#
 
-            elif is_phase(5):
+            elif phase == 5:
 
                 # Define the desired location for the chaser
                 desiredLocationChaser = np.array([0, 0, 0, 0, 0, 0])
@@ -536,7 +481,7 @@ def main():
             # It is simply disabled for certain phases and enabled for others
                 
             # For all phases other then 0, 1, and 5, enable control 
-            if is_phase(0) or is_phase(1) or is_phase(5):
+            if phase in (0, 1, 5):
                 chaserControl.enable_control = False
                 targetControl.enable_control = False
                 obstacleControl.enable_control = False
@@ -549,19 +494,19 @@ def main():
             # CHASER CONTROL
             #----------------------------------------#
 
-            if CHASER_ACTIVE:
+            if CHASER_COMMANDED:
 
                 # Compute the control input 
                 chaserControl.compute_control(state = currentLocationChaser, 
                                             target = desiredLocationChaser)
                 
-                chaserControl.compute_control_body_frame(attitude = latest_states.get("chaser")['att'])
+                chaserControl.compute_control_body_frame(attitude = currentLocationChaser[2])
 
                 # Computer the duty cycle
                 chaserControl.compute_duty_cycle()
 
                 # Compute saturated duty cycle
-                chaserControl.compute_saturated_control_signal(attitude = latest_states.get("chaser")['att'])
+                chaserControl.compute_saturated_control_signal(attitude = currentLocationChaser[2])
 
                 if IS_EXPERIMENT:
 
@@ -578,19 +523,19 @@ def main():
             # TARGET CONTROL
             #----------------------------------------#
 
-            if TARGET_ACTIVE:
+            if TARGET_COMMANDED:
 
                 # Compute the control input
                 targetControl.compute_control(state = currentLocationTarget,
                                                 target = desiredLocationTarget)
                 
-                targetControl.compute_control_body_frame(attitude = latest_states.get("target")['att'])
+                targetControl.compute_control_body_frame(attitude = currentLocationTarget[2])
 
                 # Computer the duty cycle
                 targetControl.compute_duty_cycle()
 
                 # Compute saturated duty cycle
-                targetControl.compute_saturated_control_signal(attitude = latest_states.get("target")['att'])
+                targetControl.compute_saturated_control_signal(attitude = currentLocationTarget[2])
 
                 if IS_EXPERIMENT:
                     
@@ -608,19 +553,19 @@ def main():
             # OBSTACLE CONTROL
             #----------------------------------------#
 
-            if OBSTACLE_ACTIVE:
+            if OBSTACLE_COMMANDED:
 
                 # Compute the control input
                 obstacleControl.compute_control(state = currentLocationObstacle,
                                                 target = desiredLocationObstacle)
                 
-                obstacleControl.compute_control_body_frame(attitude = latest_states.get("obstacle")['att'])
+                obstacleControl.compute_control_body_frame(attitude = currentLocationObstacle[2])
 
                 # Computer the duty cycle
                 obstacleControl.compute_duty_cycle()
 
                 # Compute saturated duty cycle
-                obstacleControl.compute_saturated_control_signal(attitude = latest_states.get("obstacle")['att'])
+                obstacleControl.compute_saturated_control_signal(attitude = currentLocationObstacle[2])
 
                 if IS_EXPERIMENT:
 
@@ -637,7 +582,8 @@ def main():
             # HANDLE DATA STORAGE
             #========================================#
 
-            handle_data_logging(t_now, latest_states, chaserControl, thrustersChaser, targetControl, thrustersTarget, obstacleControl, thrustersObstacle, chaserGyroAccel, targetGyroAccel, obstacleGyroAccel, dataContainer, CHASER_ACTIVE, TARGET_ACTIVE, OBSTACLE_ACTIVE)
+            log_data(t_now, (currentLocationChaser, currentLocationTarget, currentLocationObstacle),
+                     (chaserGyroAccel, targetGyroAccel, obstacleGyroAccel))
             
             #========================================#
             # HANDLE LOOP SLEEP CONDITIONS
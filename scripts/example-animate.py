@@ -1,15 +1,74 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 import numpy as np
 import plotly.graph_objects as go
+import plotly.io as pio
 from plotly.subplots import make_subplots
 import tkinter as tk
 from tkinter import filedialog
 
+try:
+    from _plotly_utils.utils import convert_to_base64
+except ImportError:
+    # Older Plotly releases serialize arrays as plain lists
+    convert_to_base64 = None
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+    print("Numba not available. Using the NumPy spacecraft outline transform.")
+
+if njit is not None:
+    @njit(cache=True, fastmath=True)
+    def _square_corners(out, bodies, half_size):
+        """Write the closed, rotated and translated square of every body and frame into out."""
+        for b in range(bodies.shape[0]):
+            for i in range(bodies.shape[1]):
+                x = bodies[b, i, 0]
+                y = bodies[b, i, 1]
+                cos_rot = np.cos(bodies[b, i, 2])
+                sin_rot = np.sin(bodies[b, i, 2])
+                # Rotated half-diagonals; the four corners are +-u and +-v
+                ux = half_size * (cos_rot - sin_rot)
+                uy = half_size * (sin_rot + cos_rot)
+                vx = half_size * (cos_rot + sin_rot)
+                vy = half_size * (sin_rot - cos_rot)
+                out[b, i, 0, 0] = x - ux
+                out[b, i, 0, 1] = y - uy
+                out[b, i, 1, 0] = x + vx
+                out[b, i, 1, 1] = y + vy
+                out[b, i, 2, 0] = x + ux
+                out[b, i, 2, 1] = y + uy
+                out[b, i, 3, 0] = x - vx
+                out[b, i, 3, 1] = y - vy
+                out[b, i, 4, 0] = x - ux
+                out[b, i, 4, 1] = y - uy
+else:
+    _square_corners = None
+
+# Trace styles shared by the base figure and every animation frame
+BODY_LINE = dict(color='black', width=2)
+CHASER_FILL = 'rgba(255, 0, 0, 0.5)'
+TARGET_FILL = 'rgba(0, 0, 0, 0.5)'
+OBSTACLE_FILL = 'rgba(0, 0, 255, 0.5)'
+BODIES_FILL = 'rgba(128, 128, 128, 0.5)'  # Shared fill when the bodies are merged
+CHASER_PATH_LINE = dict(color='rgba(255, 0, 0, 0.7)', width=2, dash='dot')
+TARGET_PATH_LINE = dict(color='rgba(0, 0, 0, 0.7)', width=2)
+OBSTACLE_PATH_LINE = dict(color='rgba(0, 0, 255, 0.7)', width=2)
+AXIS_ARROW_MARKER = dict(size=[0, 15], symbol='arrow', angleref='previous')
+
+# Script tag appending a chunk of frames to the saved figure
+FRAMES_SCRIPT = '<script type="text/javascript">Plotly.addFrames("%s", %s);</script>\n'
+
 class SpacecraftAnimator:
     """
     Animate spacecraft positions from logged data stored in a dictionary of arrays.
     
     The NPY file is expected to contain a dictionary where each key (like 'Chaser Px (m)') 
-    maps to a numpy array of values (one per time step).
+    maps to a numpy array of values (one per time step). An NPZ file written by
+    Storage.write_to_npz holds the same arrays as separate members.
     """
     
     def __init__(self, npy_file):
@@ -19,21 +78,27 @@ class SpacecraftAnimator:
         Parameters
         ----------
         npy_file : str
-            Path to the .npy file containing the logged data.
+            Path to the .npy or .npz file containing the logged data.
         """
         self.npy_file = npy_file
-        # Load the data; if it's stored as a 0-d array containing a dict, extract it.
-        data_loaded = np.load(npy_file, allow_pickle=True)
-        if isinstance(data_loaded, np.ndarray) and data_loaded.shape == ():
-            self.data = data_loaded.item()
+        if npy_file.endswith('.npz'):
+            # Each column is its own member of the archive and is only read when
+            # accessed, so the columns the animator never uses stay on disk
+            self.data = np.load(npy_file)
         else:
-            self.data = data_loaded
+            # Load the data; if it's stored as a 0-d array containing a dict, extract it.
+            data_loaded = np.load(npy_file, allow_pickle=True)
+            if isinstance(data_loaded, np.ndarray) and data_loaded.shape == ():
+                self.data = data_loaded.item()
+            else:
+                self.data = data_loaded
 
         # Determine the number of frames
         self.n_frames = len(self.data['Time (s)'])
         
         # For performance, subsample frames if there are too many
         self.max_frames = 200  # Maximum number of frames for smooth animation
+        self.merge_bodies = False  # Draw all spacecraft as one trace with a shared fill color
         self.skip = max(1, self.n_frames // self.max_frames)
         self.effective_frames = self.n_frames // self.skip
         
@@ -50,100 +115,317 @@ class SpacecraftAnimator:
         """
         # Extract all data first
         self.time = self.data['Time (s)']
-        self.chaser_x = self.data['Chaser Px (m)']
-        self.chaser_y = self.data['Chaser Py (m)']
-        self.target_x = self.data['Target Px (m)']
-        self.target_y = self.data['Target Py (m)']
         
         # Extract rotation data if available
-        self.chaser_rot = self.data.get('Chaser Rz (rad)', np.zeros_like(self.time))
-        self.target_rot = self.data.get('Target Rz (rad)', np.zeros_like(self.time))
+        zeros = np.zeros_like(self.time)
+        body_list = [
+            (self.data['Chaser Px (m)'], self.data['Chaser Py (m)'], self.data.get('Chaser Rz (rad)', zeros)),
+            (self.data['Target Px (m)'], self.data['Target Py (m)'], self.data.get('Target Rz (rad)', zeros)),
+        ]
         
         # Check if obstacle data exists
-        if 'Obstacle Px (m)' in self.data and 'Obstacle Py (m)' in self.data:
-            self.obstacle_x = self.data['Obstacle Px (m)']
-            self.obstacle_y = self.data['Obstacle Py (m)']
-            self.obstacle_rot = self.data.get('Obstacle Rz (rad)', np.zeros_like(self.time))
+        has_obstacle = 'Obstacle Px (m)' in self.data and 'Obstacle Py (m)' in self.data
+        if has_obstacle:
+            body_list.append((self.data['Obstacle Px (m)'], self.data['Obstacle Py (m)'],
+                              self.data.get('Obstacle Rz (rad)', zeros)))
+        
+        # Struct-of-arrays layout: one (n_bodies, N, 3) buffer of [x, y, rot] per
+        # body (chaser, target, then obstacle), so subsampling is a single slice
+        # and the outlines of every body are rotated together. It is stored as
+        # float32 rounded to 0.1 mm, which is plenty for the 3.4 m x 2.5 m table
+        # and halves the data Plotly has to encode
+        self.bodies = np.stack([np.stack([x, y, rot], axis=-1) for (x, y, rot) in body_list])
+        self.bodies = np.round(self.bodies, 4).astype(np.float32)
+            
+        # Subsample data for performance
+        full_time, full_bodies = self.time, self.bodies
+        if self.skip > 1:
+            self.time = self.time[::self.skip]
+            self.bodies = self.bodies[:, ::self.skip]
+        
+        # The trails get the same point budget as the frames but are downsampled
+        # with LTTB, which keeps the corners of the path that stride subsampling
+        # cuts off. Each trail is stored as contiguous (time, x, y) arrays
+        self.trails = []
+        for body in full_bodies:
+            idx = self._lttb(body[:, 0], body[:, 1], len(self.time))
+            self.trails.append((full_time[idx], body[idx, 0], body[idx, 1]))
+        
+        # Per-body views into the buffer
+        self.chaser_x, self.chaser_y, self.chaser_rot = self.bodies[0].T
+        self.target_x, self.target_y, self.target_rot = self.bodies[1].T
+        if has_obstacle:
+            self.obstacle_x, self.obstacle_y, self.obstacle_rot = self.bodies[2].T
         else:
             self.obstacle_x = None
             self.obstacle_y = None
             self.obstacle_rot = None
+
+    def _lttb(self, x, y, n_out):
+        """
+        Select the points of a path to keep using Largest-Triangle-Three-Buckets.
+        
+        The first and last points are always kept; every other bucket keeps the
+        point forming the largest triangle with the previously kept point and the
+        mean of the next bucket.
+        
+        Parameters
+        ----------
+        x, y : numpy.ndarray
+            Coordinates of the path
+        n_out : int
+            Number of points to keep
             
-        # Subsample data for performance
-        if self.skip > 1:
-            self.time = self.time[::self.skip]
-            self.chaser_x = self.chaser_x[::self.skip]
-            self.chaser_y = self.chaser_y[::self.skip]
-            self.chaser_rot = self.chaser_rot[::self.skip]
-            self.target_x = self.target_x[::self.skip]
-            self.target_y = self.target_y[::self.skip]
-            self.target_rot = self.target_rot[::self.skip]
-            if self.obstacle_x is not None:
-                self.obstacle_x = self.obstacle_x[::self.skip]
-                self.obstacle_y = self.obstacle_y[::self.skip]
-                self.obstacle_rot = self.obstacle_rot[::self.skip]
+        Returns
+        -------
+        numpy.ndarray
+            Sorted indices of the kept points
+        """
+        n = len(x)
+        if n_out >= n or n_out < 3:
+            return np.arange(n)
+        
+        # Interior points split into n_out - 2 buckets of at least one point
+        edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+        idx = np.empty(n_out, dtype=int)
+        idx[0] = 0
+        idx[-1] = n - 1
+        
+        a = 0
+        for b in range(n_out - 2):
+            lo, hi = edges[b], edges[b + 1]
+            if b < n_out - 3:
+                next_x = x[hi:edges[b + 2]].mean()
+                next_y = y[hi:edges[b + 2]].mean()
+            else:
+                next_x, next_y = x[-1], y[-1]
+            
+            # Twice the triangle area for every candidate in the bucket at once
+            area = np.abs((x[a] - next_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (next_y - y[a]))
+            a = lo + int(np.argmax(area))
+            idx[b + 1] = a
+        
+        return idx
 
-    def _create_square_shape(self, x, y, rotation, size, color):
+    def _create_square_shapes(self, bodies, size):
         """
-        Create a rotated square shape representing a spacecraft.
+        Create rotated square shapes representing every spacecraft at every frame.
+        
+        All bodies and frames are rotated in one batched matrix product instead of
+        building a rotation matrix and calling np.dot once per frame. When Numba is
+        installed, a compiled kernel writes the corners directly instead.
         
         Parameters
         ----------
-        x, y : float
-            Center coordinates of the square
-        rotation : float
-            Rotation angle in radians
+        bodies : numpy.ndarray
+            Array of shape (n_bodies, N, 3) holding the center x, y and rotation
+            angle in radians of each body for each frame
         size : float
             Side length of the square in meters
-        color : str
-            Fill color of the square
             
         Returns
         -------
-        list
-            List of (x, y) coordinates for the rotated square
+        numpy.ndarray
+            Array of shape (n_bodies, N, 5, 2) with the (x, y) coordinates of each
+            body's rotated square for each frame
         """
-        # Create square corners (centered at origin)
         half_size = size / 2
+        if _square_corners is not None:
+            rotated_corners = np.empty(bodies.shape[:-1] + (5, 2), dtype=bodies.dtype)
+            _square_corners(rotated_corners, bodies, half_size)
+            return rotated_corners
+        
+        # Create square corners (centered at origin)
         corners = np.array([
             [-half_size, -half_size],
             [half_size, -half_size],
             [half_size, half_size],
             [-half_size, half_size],
             [-half_size, -half_size]  # Close the shape
-        ])
+        ], dtype=bodies.dtype)
         
-        # Rotation matrix
-        rot_matrix = np.array([
-            [np.cos(rotation), -np.sin(rotation)],
-            [np.sin(rotation), np.cos(rotation)]
-        ])
+        # Stack of transposed rotation matrices, one per body and frame
+        cos_rot = np.cos(bodies[..., 2])
+        sin_rot = np.sin(bodies[..., 2])
+        rot_matrix_t = np.empty(cos_rot.shape + (2, 2), dtype=bodies.dtype)
+        rot_matrix_t[..., 0, 0] = cos_rot
+        rot_matrix_t[..., 0, 1] = sin_rot
+        rot_matrix_t[..., 1, 0] = -sin_rot
+        rot_matrix_t[..., 1, 1] = cos_rot
         
-        # Apply rotation and translation
-        rotated_corners = np.dot(corners, rot_matrix.T)
-        rotated_corners[:, 0] += x
-        rotated_corners[:, 1] += y
+        # Apply rotation and translation for all bodies and frames at once
+        rotated_corners = corners @ rot_matrix_t
+        rotated_corners += bodies[..., None, :2]
         
         return rotated_corners
 
-    def create_animation(self):
+    def _merge_outlines(self, corners):
         """
-        Create the animated Plotly figure showing spacecraft trajectories.
+        Join the outlines of every body into one NaN-separated polyline per frame.
         
+        Plotly draws NaN-separated segments of a single trace as disjoint shapes,
+        so all spacecraft can be updated as one trace instead of one per body.
+        
+        Parameters
+        ----------
+        corners : numpy.ndarray
+            Array of shape (n_bodies, N, 5, 2) from _create_square_shapes
+            
         Returns
         -------
-        fig : plotly.graph_objects.Figure
-            The animated figure.
+        tuple of numpy.ndarray
+            x and y arrays of shape (N, 6 * n_bodies - 1)
+        """
+        n_bodies, n_frames = corners.shape[:2]
+        merged = np.full((n_frames, n_bodies, 6, 2), np.nan, dtype=corners.dtype)
+        merged[:, :, :5] = corners.transpose(1, 0, 2, 3)
+        merged = merged.reshape(n_frames, -1, 2)[:, :-1]
+        return np.ascontiguousarray(merged[..., 0]), np.ascontiguousarray(merged[..., 1])
+
+    def _iter_frames(self, start=0, stop=None):
         """
-        # Calculate data ranges for better axis limits
-        all_x = np.concatenate([self.chaser_x, self.target_x])
-        all_y = np.concatenate([self.chaser_y, self.target_y])
+        Generate the animation frames one at a time.
+        
+        Parameters
+        ----------
+        start, stop : int
+            Range of frame indices to generate; every frame by default.
+        
+        Yields
+        ------
+        dict
+            Frame with the trail and spacecraft traces at one time step
+        """
+        if stop is None:
+            stop = len(self.time)
+        frame_time = self.time[start:stop]
+        
+        # Each frame shows the trail points up to the frame time; the trails are
+        # contiguous, so every per-frame prefix slice is a view that Plotly
+        # encodes directly
+        chaser_trail_t, chaser_trail_x, chaser_trail_y = self.trails[0]
+        chaser_trail_end = np.searchsorted(chaser_trail_t, frame_time, side='right')
+        target_trail_t, target_trail_x, target_trail_y = self.trails[1]
+        target_trail_end = np.searchsorted(target_trail_t, frame_time, side='right')
         if self.obstacle_x is not None:
-            all_x = np.concatenate([all_x, self.obstacle_x])
-            all_y = np.concatenate([all_y, self.obstacle_y])
+            obstacle_trail_t, obstacle_trail_x, obstacle_trail_y = self.trails[2]
+            obstacle_trail_end = np.searchsorted(obstacle_trail_t, frame_time, side='right')
+        
+        # The workspace rectangle and axis arrows (traces 0-2) never move, so they
+        # live only in the base figure; each frame carries just the trails and
+        # spacecraft of every body and names the trace indices it updates
+        n_body_traces = 1 if self.merge_bodies else len(self.bodies)
+        dynamic_traces = list(range(3, 3 + len(self.bodies) + n_body_traces))
+        
+        # Rotate the spacecraft outlines of every body and frame in one batch
+        corners_all = self._create_square_shapes(self.bodies[:, start:stop], self.spacecraft_size)
+        chaser_corners_all = corners_all[0]
+        target_corners_all = corners_all[1]
+        if self.obstacle_x is not None:
+            obstacle_corners_all = corners_all[2]
+        if self.merge_bodies:
+            merged_x, merged_y = self._merge_outlines(corners_all)
+        
+        # Frame traces are plain dicts rather than go.Scatter objects so each one
+        # is not run through the full Plotly validator; their styles are the
+        # module-level constants, shared by every frame
+        for k in range(stop - start):
+            frame_data = []
+            
+            # Chaser path
+            frame_data.append(dict(
+                type='scatter',
+                x=chaser_trail_x[:chaser_trail_end[k]],
+                y=chaser_trail_y[:chaser_trail_end[k]],
+                mode='lines',
+                line=CHASER_PATH_LINE
+            ))
+            
+            # Target path
+            frame_data.append(dict(
+                type='scatter',
+                x=target_trail_x[:target_trail_end[k]],
+                y=target_trail_y[:target_trail_end[k]],
+                mode='lines',
+                line=TARGET_PATH_LINE
+            ))
+            
+            # Obstacle path (if available)
+            if self.obstacle_x is not None:
+                frame_data.append(dict(
+                    type='scatter',
+                    x=obstacle_trail_x[:obstacle_trail_end[k]],
+                    y=obstacle_trail_y[:obstacle_trail_end[k]],
+                    mode='lines',
+                    line=OBSTACLE_PATH_LINE
+                ))
             
-        # x_min, x_max = np.min(all_x), np.max(all_x)
-        # y_min, y_max = np.min(all_y), np.max(all_y)
+            # Rotated spacecraft shapes
+            if self.merge_bodies:
+                frame_data.append(dict(
+                    type='scatter',
+                    x=merged_x[k], y=merged_y[k],
+                    fill="toself",
+                    fillcolor=BODIES_FILL,
+                    line=BODY_LINE,
+                    showlegend=False
+                ))
+            else:
+                # Chaser spacecraft
+                chaser_corners = chaser_corners_all[k]
+                frame_data.append(dict(
+                    type='scatter',
+                    x=chaser_corners[:, 0], y=chaser_corners[:, 1],
+                    fill="toself",
+                    fillcolor=CHASER_FILL,
+                    line=BODY_LINE,
+                    showlegend=False
+                ))
+            
+                # Target spacecraft
+                target_corners = target_corners_all[k]
+                frame_data.append(dict(
+                    type='scatter',
+                    x=target_corners[:, 0], y=target_corners[:, 1],
+                    fill="toself",
+                    fillcolor=TARGET_FILL,
+                    line=BODY_LINE,
+                    showlegend=False
+                ))
+            
+                # Obstacle spacecraft (if available)
+                if self.obstacle_x is not None:
+                    obstacle_corners = obstacle_corners_all[k]
+                    frame_data.append(dict(
+                        type='scatter',
+                        x=obstacle_corners[:, 0], y=obstacle_corners[:, 1],
+                        fill="toself",
+                        fillcolor=OBSTACLE_FILL,
+                        line=BODY_LINE,
+                        showlegend=False
+                    ))
+                
+            yield dict(data=frame_data, traces=dynamic_traces, name=str(start + k))
+
+    def create_animation(self, include_frames=True):
+        """
+        Create the animated Plotly figure showing spacecraft trajectories.
+        
+        Parameters
+        ----------
+        include_frames : bool
+            If False, only the base figure and controls are built and the frames
+            are left to be generated with _iter_frames.
+        
+        Returns
+        -------
+        fig : dict
+            The animated figure as a Plotly figure dict.
+        """
+        # Data ranges for automatic axis limits, reduced over the body buffer
+        # directly rather than over a concatenated copy of every position array
+        # x_min, x_max = self.bodies[:, :, 0].min(), self.bodies[:, :, 0].max()
+        # y_min, y_max = self.bodies[:, :, 1].min(), self.bodies[:, :, 1].max()
         
         # # Add padding around the data (including spacecraft size)
         # padding = max(0.5, self.spacecraft_size * 2)
@@ -183,7 +465,7 @@ class SpacecraftAnimator:
             y=[0, 0],
             mode='lines+markers',
             line=dict(color='red', width=3),
-            marker=dict(size=[0, 15], symbol='arrow', angleref='previous'),
+            marker=AXIS_ARROW_MARKER,
             name='X-axis',
             hoverinfo='none'
         ))
@@ -194,7 +476,7 @@ class SpacecraftAnimator:
             y=[0, 0.3],
             mode='lines+markers',
             line=dict(color='green', width=3),
-            marker=dict(size=[0, 15], symbol='arrow', angleref='previous'),
+            marker=AXIS_ARROW_MARKER,
             name='Y-axis',
             hoverinfo='none'
         ))
@@ -212,7 +494,7 @@ class SpacecraftAnimator:
         self.fig.add_trace(go.Scatter(
             x=[self.target_x[0]], y=[self.target_y[0]],
             mode='lines',
-            line=dict(color='rgba(0, 0, 0, 0.7)', width=2),
+            line=TARGET_PATH_LINE,
             name='Target Path'
         ))
         
@@ -221,54 +503,59 @@ class SpacecraftAnimator:
             self.fig.add_trace(go.Scatter(
                 x=[self.obstacle_x[0]], y=[self.obstacle_y[0]],
                 mode='lines',
-                line=dict(color='rgba(0, 0, 255, 0.7)', width=2),
+                line=OBSTACLE_PATH_LINE,
                 name='Obstacle Path'
             ))
         
-        # Create initial spacecraft shapes
-        # Chaser spacecraft
-        chaser_corners = self._create_square_shape(
-            self.chaser_x[0], self.chaser_y[0], 
-            self.chaser_rot[0], self.spacecraft_size, 'red'
-        )
-        self.fig.add_trace(go.Scatter(
-            x=chaser_corners[:, 0], y=chaser_corners[:, 1],
-            fill="toself",
-            fillcolor='rgba(255, 0, 0, 0.5)',
-            line=dict(color='black', width=2),
-            name='Chaser',
-            showlegend=False
-        ))
+        # Spacecraft outlines at the first frame
+        initial_corners = self._create_square_shapes(self.bodies[:, :1], self.spacecraft_size)[:, 0]
         
-        # Target spacecraft
-        target_corners = self._create_square_shape(
-            self.target_x[0], self.target_y[0], 
-            self.target_rot[0], self.spacecraft_size, 'black'
-        )
-        self.fig.add_trace(go.Scatter(
-            x=target_corners[:, 0], y=target_corners[:, 1],
-            fill="toself",
-            fillcolor='rgba(0, 0, 0, 0.5)',
-            line=dict(color='black', width=2),
-            name='Target',
-            showlegend=False
-        ))
+        # Create initial spacecraft shapes
+        if self.merge_bodies:
+            merged_x, merged_y = self._merge_outlines(initial_corners[:, None])
+            self.fig.add_trace(go.Scatter(
+                x=merged_x[0], y=merged_y[0],
+                fill="toself",
+                fillcolor=BODIES_FILL,
+                line=BODY_LINE,
+                name='Spacecraft',
+                showlegend=False
+            ))
+        else:
+            # Chaser spacecraft
+            chaser_corners = initial_corners[0]
+            self.fig.add_trace(go.Scatter(
+                x=chaser_corners[:, 0], y=chaser_corners[:, 1],
+                fill="toself",
+                fillcolor=CHASER_FILL,
+                line=BODY_LINE,
+                name='Chaser',
+                showlegend=False
+            ))
         
-        # Obstacle spacecraft (if available)
-        if self.obstacle_x is not None:
-            obstacle_corners = self._create_square_shape(
-                self.obstacle_x[0], self.obstacle_y[0], 
-                self.obstacle_rot[0], self.spacecraft_size, 'blue'
-            )
+            # Target spacecraft
+            target_corners = initial_corners[1]
             self.fig.add_trace(go.Scatter(
-                x=obstacle_corners[:, 0], y=obstacle_corners[:, 1],
+                x=target_corners[:, 0], y=target_corners[:, 1],
                 fill="toself",
-                fillcolor='rgba(0, 0, 255, 0.5)',
-                line=dict(color='black', width=2),
-                name='Obstacle',
+                fillcolor=TARGET_FILL,
+                line=BODY_LINE,
+                name='Target',
                 showlegend=False
             ))
         
+            # Obstacle spacecraft (if available)
+            if self.obstacle_x is not None:
+                obstacle_corners = initial_corners[2]
+                self.fig.add_trace(go.Scatter(
+                    x=obstacle_corners[:, 0], y=obstacle_corners[:, 1],
+                    fill="toself",
+                    fillcolor=OBSTACLE_FILL,
+                    line=BODY_LINE,
+                    name='Obstacle',
+                    showlegend=False
+                ))
+        
         # Update layout with better spacing and centering
         self.fig.update_layout(
             title={
@@ -313,7 +600,8 @@ class SpacecraftAnimator:
             updatemenus=[{
                 "buttons": [
                     {
-                        "args": [None, {"frame": {"duration": 50, "redraw": False}, "fromcurrent": True}],
+                        "args": [None, {"frame": {"duration": 50, "redraw": False}, "fromcurrent": True,
+                                         "mode": "immediate", "transition": {"duration": 0}}],
                         "label": "Play",
                         "method": "animate"
                     },
@@ -335,115 +623,11 @@ class SpacecraftAnimator:
             template="plotly_white"  # Use a cleaner template
         )
         
-        # Create frames
-        frames = []
-        for i in range(len(self.time)):
-            frame_data = []
-
-            # Add background rectangle as first element in each frame
-            frame_data.append(go.Scatter(
-                x=rect_corners[:, 0], y=rect_corners[:, 1],
-                fill="toself",
-                fillcolor='rgba(200, 200, 200, 0.2)',  # Very transparent gray
-                line=dict(color='black', width=2),  # Black border
-                showlegend=False
-            ))
-
-            # X-axis (red arrow)
-            frame_data.append(go.Scatter(
-                x=[0, 0.3],
-                y=[0, 0],
-                mode='lines+markers',
-                line=dict(color='red', width=3),
-                marker=dict(size=[0, 15], symbol='arrow', angleref='previous'),
-                hoverinfo='none'
-            ))
-
-            # Y-axis (green arrow)
-            frame_data.append(go.Scatter(
-                x=[0, 0],
-                y=[0, 0.3],
-                mode='lines+markers',
-                line=dict(color='green', width=3),
-                marker=dict(size=[0, 15], symbol='arrow', angleref='previous'),
-                hoverinfo='none'
-            ))
-            
-            # Chaser path
-            frame_data.append(go.Scatter(
-                x=self.chaser_x[:i+1],
-                y=self.chaser_y[:i+1],
-                mode='lines',
-                line=dict(color='rgba(255, 0, 0, 0.7)', width=2, dash='dot')
-            ))
-            
-            # Target path
-            frame_data.append(go.Scatter(
-                x=self.target_x[:i+1],
-                y=self.target_y[:i+1],
-                mode='lines',
-                line=dict(color='rgba(0, 0, 0, 0.7)', width=2)
-            ))
-            
-            # Obstacle path (if available)
-            if self.obstacle_x is not None:
-                frame_data.append(go.Scatter(
-                    x=self.obstacle_x[:i+1],
-                    y=self.obstacle_y[:i+1],
-                    mode='lines',
-                    line=dict(color='rgba(0, 0, 255, 0.7)', width=2)
-                ))
-            
-            # Rotated spacecraft shapes
-            # Chaser spacecraft
-            chaser_corners = self._create_square_shape(
-                self.chaser_x[i], self.chaser_y[i], 
-                self.chaser_rot[i], self.spacecraft_size, 'red'
-            )
-            frame_data.append(go.Scatter(
-                x=chaser_corners[:, 0], y=chaser_corners[:, 1],
-                fill="toself",
-                fillcolor='rgba(255, 0, 0, 0.5)',
-                line=dict(color='black', width=2),
-                showlegend=False
-            ))
-            
-            # Target spacecraft
-            target_corners = self._create_square_shape(
-                self.target_x[i], self.target_y[i], 
-                self.target_rot[i], self.spacecraft_size, 'black'
-            )
-            frame_data.append(go.Scatter(
-                x=target_corners[:, 0], y=target_corners[:, 1],
-                fill="toself",
-                fillcolor='rgba(0, 0, 0, 0.5)',
-                line=dict(color='black', width=2),
-                showlegend=False
-            ))
-            
-            # Obstacle spacecraft (if available)
-            if self.obstacle_x is not None:
-                obstacle_corners = self._create_square_shape(
-                    self.obstacle_x[i], self.obstacle_y[i], 
-                    self.obstacle_rot[i], self.spacecraft_size, 'blue'
-                )
-                frame_data.append(go.Scatter(
-                    x=obstacle_corners[:, 0], y=obstacle_corners[:, 1],
-                    fill="toself",
-                    fillcolor='rgba(0, 0, 255, 0.5)',
-                    line=dict(color='black', width=2),
-                    showlegend=False
-                ))
-                
-            frames.append(go.Frame(data=frame_data, name=str(i)))
-        
-        self.fig.frames = frames
-        
         # Create a more efficient slider - only show key frames
         slider_steps = []
-        step_size = max(1, len(frames) // 20)  # Show at most 20 slider steps
+        step_size = max(1, len(self.time) // 20)  # Show at most 20 slider steps
         
-        for i in range(0, len(frames), step_size):
+        for i in range(0, len(self.time), step_size):
             step = {
                 "args": [
                     [str(i)],
@@ -474,24 +658,78 @@ class SpacecraftAnimator:
             }]
         )
         
+        # Frames are attached to the serialized figure instead of fig.frames:
+        # go.Figure coerces every frame trace into a validated go.Scatter, which
+        # was most of the build time, while Plotly renders the dict as is
+        self.fig = self.fig.to_dict()
+        if include_frames:
+            self.fig['frames'] = list(self._iter_frames())
+            if convert_to_base64 is not None:
+                convert_to_base64(self.fig['frames'])
+        
         return self.fig
     
     def show(self):
         """
         Display the animated figure.
         """
-        if self.fig is None:
+        if self.fig is None or 'frames' not in self.fig:
             self.create_animation()
         
         # Use renderer that works better for complex animations
-        self.fig.show(renderer="browser")
+        pio.show(self.fig, renderer="browser", validate=False)
+        
+    def __getstate__(self):
+        """
+        Pickle only what frame generation needs, leaving out the raw log and figure.
+        """
+        state = self.__dict__.copy()
+        state['data'] = None
+        state['fig'] = None
+        return state
+        
+    def _encode_frames(self, start, stop):
+        """
+        Generate a range of frames and serialize them to JSON.
         
-    def save_html(self, filename="spacecraft_animation.html"):
+        Parameters
+        ----------
+        start, stop : int
+            Range of frame indices to encode.
+            
+        Returns
+        -------
+        str
+            JSON array of the frames.
+        """
+        frames = list(self._iter_frames(start, stop))
+        # Encode arrays the same compact way Figure.to_html does
+        if convert_to_base64 is not None:
+            convert_to_base64(frames)
+        return pio.json.to_json_plotly(frames)
+        
+    def save_html(self, filename="spacecraft_animation.html", frames_per_chunk=20, workers=None):
         """
         Save the animation as an HTML file for better performance.
+        
+        The page is written with the base figure only; the frames are then
+        generated and appended as Plotly.addFrames calls a chunk at a time, so
+        the full list of frames is never held in memory. Chunks are encoded in
+        parallel worker processes, since encoding grows with the trail length
+        and dominates the save time of long animations.
+        
+        Parameters
+        ----------
+        filename : str
+            Path of the HTML file to write.
+        frames_per_chunk : int
+            Number of frames serialized into each addFrames call.
+        workers : int, optional
+            Number of worker processes; defaults to the CPU count. Use 1 to
+            encode in this process.
         """
-        if self.fig is None:
-            self.create_animation()
+        self.create_animation(include_frames=False)
+        div_id = "spacecraft-animation"
             
         # Set the HTML config to center the plot
         config = {
@@ -500,14 +738,17 @@ class SpacecraftAnimator:
             'displaylogo': False
         }
             
-        # Add custom CSS to center the plot
-        html_string = self.fig.to_html(
+        # Only the figure's div and scripts; the page around it is written separately
+        html_string = pio.to_html(
+            self.fig,
+            validate=False,
             include_plotlyjs=True,
             config=config,
-            full_html=True
+            full_html=False,
+            div_id=div_id
         )
         
-        # Insert CSS for centering
+        # CSS for centering the plot
         css_style = """
         <style>
         .plotly-graph-div {
@@ -532,15 +773,36 @@ class SpacecraftAnimator:
         </style>
         """
         
-        # Insert the CSS after the opening <head> tag
-        html_string = html_string.replace('<head>', '<head>' + css_style)
-        
-        # Write to file
+        # Write to file: the page head with the centering CSS, the figure, then
+        # the frames streamed in before the closing </body> tag. Writing the
+        # pieces in order avoids searching and copying the whole document
+        n_frames = len(self.time)
+        starts = range(0, n_frames, frames_per_chunk)
+        stops = [min(start + frames_per_chunk, n_frames) for start in starts]
+        if workers is None:
+            workers = os.cpu_count() or 1
+            
         with open(filename, 'w') as f:
+            f.write('<!DOCTYPE html>\n<html>\n<head><meta charset="utf-8" />' + css_style + '</head>\n<body>\n')
             f.write(html_string)
+            if workers > 1 and len(starts) > 1:
+                # map keeps the chunks in frame order
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    for chunk in executor.map(_encode_frame_chunk, repeat(self), starts, stops):
+                        f.write(FRAMES_SCRIPT % (div_id, chunk))
+            else:
+                for start, stop in zip(starts, stops):
+                    f.write(FRAMES_SCRIPT % (div_id, self._encode_frames(start, stop)))
+            f.write('</body>\n</html>\n')
             
         print(f"Animation saved to {filename}")
 
+def _encode_frame_chunk(animator, start, stop):
+    """
+    Worker entry point for SpacecraftAnimator.save_html.
+    """
+    return animator._encode_frames(start, stop)
+
 # Example usage:
 if __name__ == "__main__":
     
@@ -551,7 +813,7 @@ if __name__ == "__main__":
     # Ask the user to select the .npy file
     file_path = filedialog.askopenfilename(
         title="Select spacecraft data file",
-        filetypes=[("NumPy files", "*.npy"), ("All files", "*.*")]
+        filetypes=[("NumPy files", "*.npy *.npz"), ("All files", "*.*")]
     )
     
     if file_path:
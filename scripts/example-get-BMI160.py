@@ -1,24 +1,37 @@
-from time import sleep
+import sys
+from collections import deque
+from time import monotonic, sleep
 from BMI160_i2c import Driver
 
+# Bind the writer and the line template once rather than building a dict for print() every poll
+write = sys.stdout.write
+format_motion = "gx=%d gy=%d gz=%d ax=%d ay=%d az=%d\n".__mod__
+
+SAMPLE_PERIOD = 0.01  # 100 Hz
+PRINT_EVERY = 100  # Print one in this many samples
+
 print('Trying to initialize the sensor...')
 sensor = Driver(0x69)  # change address if needed
 print('Initialization done')
 
+# Most recent samples, kept without printing each one
+samples = deque(maxlen=1000)
+sample_count = 0
+
+next_t = monotonic()
 while True:
-    data = sensor.getMotion6()
+    data = tuple(sensor.getMotion6())
     # If all values are zero, assume something went wrong and try reinitializing.
-    if all(val == 0 for val in data):
+    if not any(data):
         print("Warning: Sensor returned all zeros. Reinitializing sensor...")
         sensor = Driver(0x69)
     else:
-        print({
-            'gx': data[0],
-            'gy': data[1],
-            'gz': data[2],
-            'ax': data[3],
-            'ay': data[4],
-            'az': data[5]
-        })
-    # Increase the delay to at least 1 second to prevent I2C issues.
-    sleep(0.01)
+        samples.append(data)
+        sample_count += 1
+        if sample_count % PRINT_EVERY == 0:
+            write(format_motion(data))
+    # Sleep until the next deadline so I2C and print time do not stretch the period
+    next_t += SAMPLE_PERIOD
+    dt = next_t - monotonic()
+    if dt > 0:
+        sleep(dt)
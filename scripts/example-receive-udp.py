@@ -4,10 +4,16 @@ UDP_IP = "0.0.0.0"
 UDP_PORT = 53673
 
 sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+# Larger kernel receive buffer so bursts are not dropped while printing
+sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
 sock.bind((UDP_IP, UDP_PORT))
 
+# Packets are received into one preallocated buffer instead of a new bytes object each time
+buf = bytearray(1500)  # one Ethernet MTU
+view = memoryview(buf)
+
 print(f"Listening for UDP packets on port {UDP_PORT}...")
 
 while True:
-    data, addr = sock.recvfrom(1024)  # buffer size is 1024 bytes
-    print(f"Received message: {data} from {addr}")
\ No newline at end of file
+    nbytes, addr = sock.recvfrom_into(view)
+    print(f"Received message: {bytes(view[:nbytes])} from {addr}")
\ No newline at end of file
@@ -3,19 +3,14 @@ import signal
 import sys
 import struct
 
-def send_udp_values():
-    udp_ip = "127.0.0.1"
-    udp_port = 48291
-    values = [568471.0, 5.0, 50.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0]  # List of 10 floats
-
-    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+UDP_IP = "127.0.0.1"
+UDP_PORT = 48291
 
-    # Pack the values as doubles
-    message = struct.pack('d' * len(values), *values)
-    sock.sendto(message, (udp_ip, udp_port))
-    print(f"Sent: {values}")
+# Precompiled format for the 10 doubles in each packet
+PACKER = struct.Struct('10d')
 
-    sock.close()
+def send_udp_values(sock, message):
+    sock.sendto(message, (UDP_IP, UDP_PORT))
 
 if __name__ == "__main__":
 
@@ -25,5 +20,12 @@ if __name__ == "__main__":
 
     signal.signal(signal.SIGINT, signal_handler)
 
+    values = [568471.0, 5.0, 50.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0]  # List of 10 floats
+
+    # The values never change, so the socket is opened and the message packed once
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    message = PACKER.pack(*values)
+    print(f"Sending: {values} to {UDP_IP}:{UDP_PORT}")
+
     while True:
-        send_udp_values()
\ No newline at end of file
+        send_udp_values(sock, message)
@@ -7,17 +7,17 @@
 import sys
 import os
 import socket
-import struct
 
 # Add the path to the Owl library
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.append(project_root)
 
 import lib.owl as owl
+from tools.udp import PoseSender
 import csv
 import datetime
 import time
-import numpy as np
+from math import atan2
 
 #==============================================================================
 # DEFINE PARAMETERS
@@ -29,6 +29,37 @@ TIMEOUT = 10000000
 STREAMING = 1  # 0 to disable, 1 for UDP, 2 for TCP, 3 for TCP Broadcast
 FREQUENCY = 10  # in Hz
 UDP_PORT = 53673
+PRINT_PERIOD = 1.0  # Seconds between status prints
+
+#==============================================================================
+# DEFINE FUNCTIONS
+#==============================================================================
+
+class PoseLog:
+    """Stream the (time, x, y, yaw) rows of one rigid body to a CSV file.
+
+    Rows are written as they arrive through a 64 KiB file buffer, so memory
+    stays bounded however long the session runs, the OS writes in blocks, and
+    everything up to the last flush is on disk even if the script dies.
+    """
+
+    def __init__(self, filename):
+        self.file = open(filename, 'w', newline='', buffering=1 << 16)
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(('Time (s)', 'Px (mm)', 'Py (mm)', 'Rz (rad)'))
+        self.append = self.writer.writerow
+
+    def close(self):
+        self.file.close()
+
+def pose_to_yaw(pose):
+    """Yaw angle in radians of an OWL rigid body pose (x, y, z, qw, qx, qy, qz).
+
+    Uses math.atan2 on the scalar quaternion components rather than the NumPy
+    ufunc, which would go through the array machinery for four floats.
+    """
+    q0, q1, q2, q3 = pose[3], pose[4], pose[5], pose[6]
+    return atan2(2.0 * (q0 * q3 + q1 * q2), 1.0 - 2.0 * (q2 * q2 + q3 * q3))
 
 #==============================================================================
 # INITIALIZE STREAMING SERVER
@@ -79,20 +110,30 @@ owl_context.assignMarker(tracker_ID_BLUE, 18, "18", "pos=-136.999823,153.596588,
 # Start a clock
 start_time = time.time()
 
-# Initialize data for RED, BLACK, and BLUE rigid bodies
-red_data = np.array([[0,0,0,0]])
-black_data = np.array([[0,0,0,0]])
-blue_data = np.array([[0,0,0,0]])
+# Open data logs for RED, BLACK, and BLUE rigid bodies, named after the current datetime
+session_stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+red_log = PoseLog("RED_rigid_" + session_stamp + ".csv")
+black_log = PoseLog("BLACK_rigid_" + session_stamp + ".csv")
+blue_log = PoseLog("BLUE_rigid_" + session_stamp + ".csv")
+
+# Rigid body handlers by tracker ID: the log to append to, and whether the pose
+# is also sent over UDP
+rigid_handlers = {
+    tracker_ID_RED: (red_log, True),
+    tracker_ID_BLACK: (black_log, False),
+    tracker_ID_BLUE: (blue_log, False),
+}
 
 # Create a UDP socket
 udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
 udp_address = ('<broadcast>', UDP_PORT)
 udp_socket.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
 
-try:
-    # Create a filename based on the current datetime
-    filename = datetime.datetime.now().strftime("RED_rigid_%Y%m%d_%H%M%S.csv")
+# Fix the destination once so each send skips the per-packet address handling
+udp_socket.connect(udp_address)
+pose_sender = PoseSender(udp_socket)
 
+try:
     # Create an empty event
     event = None
 
@@ -111,58 +152,30 @@ try:
 
             # Find any rigid bodies    
             if "rigids" in event:
+                # One timestamp per frame, shared by every rigid body in it
+                now = time.time()
                 for r in event.rigids: 
                     if r.cond > 0:
 
-                        # Save the position of the RED rigid body and attitude
-                        if r.id == tracker_ID_RED:
+                        # Look up the tracked rigid body in one dictionary access
+                        handler = rigid_handlers.get(r.id)
+                        if handler is None:
+                            continue
+                        log, send = handler
 
-                            # Calculate the yaw of the RED rigid body
-                            q0 = r.pose[3]
-                            q1 = r.pose[4]
-                            q2 = r.pose[5]
-                            q3 = r.pose[6]
-                            yaw = np.arctan2(2.0 * (q0 * q3 + q1 * q2), 1.0 - 2.0 * (q2 * q2 + q3 * q3))
+                        # Calculate the yaw of the rigid body
+                        yaw = pose_to_yaw(r.pose)
 
-                            # Append the ECEF position and attitude of the RED rigid body
-                            red_data = np.append(red_data, [[time.time()-start_time, r.pose[0], r.pose[1], yaw]], axis=0)
+                        # Append the ECEF position and attitude of the rigid body
+                        log.append((now - start_time, r.pose[0], r.pose[1], yaw))
 
-                            # Send the red data over UDP
-                            message = struct.pack('fff', r.pose[0]/1000, r.pose[1]/1000, yaw)
-                            udp_socket.sendto(message, udp_address)
+                        # Send the red data over UDP
+                        if send:
+                            pose_sender.send(r.pose[0] * 0.001, r.pose[1] * 0.001, yaw)
 
-                            current_time = time.time()
-                            if current_time - last_print_time >= 1/FREQUENCY:  # Print every second
+                            if now - last_print_time >= PRINT_PERIOD:  # Print every second
                                 print(f"Sent: {r.pose[0]}, {r.pose[1]}, {yaw}")
-                                last_print_time = current_time
-                            print(f"Sent: {r.pose[0]}, {r.pose[1]}, {yaw}")
- 
-                            
-                        # Save the position of the BLACK rigid body and attitude
-                        if r.id == tracker_ID_BLACK:
-
-                            # Calculate the yaw of the BLACK rigid body
-                            q0 = r.pose[3]
-                            q1 = r.pose[4]
-                            q2 = r.pose[5]
-                            q3 = r.pose[6]
-                            yaw = np.arctan2(2.0 * (q0 * q3 + q1 * q2), 1.0 - 2.0 * (q2 * q2 + q3 * q3))
-
-                            # Append the ECEF position and attitude of the BLACK rigid body
-                            black_data = np.append(black_data, [[time.time()-start_time, r.pose[0], r.pose[1], yaw]], axis=0)
-
-                        # Save the position of the BLUE rigid body and attitude
-                        if r.id == tracker_ID_BLUE:
-
-                            # Calculate the yaw of the BLUE rigid body
-                            q0 = r.pose[3]
-                            q1 = r.pose[4]
-                            q2 = r.pose[5]
-                            q3 = r.pose[6]
-                            yaw = np.arctan2(2.0 * (q0 * q3 + q1 * q2), 1.0 - 2.0 * (q2 * q2 + q3 * q3))
-
-                            # Append the ECEF position and attitude of the BLUE rigid body
-                            blue_data = np.append(blue_data, [[time.time()-start_time, r.pose[0], r.pose[1], yaw]], axis=0)
+                                last_print_time = now
 
             # Handle errors
             if event.name == "fatal":
@@ -194,4 +207,9 @@ finally:
     owl_context.close()
 
     # Close UDP socket
-    udp_socket.close()
\ No newline at end of file
+    udp_socket.close()
+
+    # Close the data logs
+    red_log.close()
+    black_log.close()
+    blue_log.close()
\ No newline at end of file
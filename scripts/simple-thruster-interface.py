@@ -1,9 +1,17 @@
 import Jetson.GPIO as GPIO  
+import sys
 import socket
 import struct
 import time
 import signal
 import select
+import os
+
+# Add the project root so the shared UDP helpers can be imported
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+
+from tools.udp import LatestPacketReader
 
 # Define the 8 pins we want to use
 PINS = [7, 12, 13, 15, 16, 18, 22, 23]
@@ -19,25 +27,50 @@ for pin in PINS:
 IP_ADDRESS = '127.0.0.1'
 PORT = 48291
 NUM_DOUBLES = 10
+# Kernel receive buffer size, overridable from the environment; a larger
+# buffer absorbs bursts instead of dropping packets
+UDP_RCVBUF = int(os.environ.get('PROXIPY_UDP_RCVBUF', 1 << 20))
+UNPACK_DOUBLES = struct.Struct('d' * NUM_DOUBLES).unpack  # Parsed once, not per packet
 
 server_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
 server_address = (IP_ADDRESS, PORT)
 server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, UDP_RCVBUF)
 server_socket.bind(server_address)
-server_socket.setblocking(0)
+reader = LatestPacketReader(server_socket, NUM_DOUBLES * 8)
 
 def signal_handler(sig, frame):
     raise KeyboardInterrupt
 
 signal.signal(signal.SIGTERM, signal_handler)
 
+def clamp_duty_cycle(duty_cycle):
+    """Limit a commanded duty cycle to the 0-100 % range the PWM channels accept."""
+    # NaN fails both comparisons and switches the thruster off
+    if not duty_cycle > 0.0:
+        return 0.0
+    return duty_cycle if duty_cycle < 100.0 else 100.0
+
 SAFETY_BIT = 568471
 duty_cycles = [0] * len(PINS)
 pwm_frequency = 5  # Default to 5Hz
 period_duration = 1 / pwm_frequency
 
-# Initialize timestamps and states for each pin
-pin_states = [GPIO.LOW] * len(PINS)
+# Pins with a hardware PWM channel are driven by the PWM controller; only the
+# rest are toggled by the software scheduler below
+hw_pwm = [None] * len(PINS)
+for i, pin in enumerate(PINS):
+    try:
+        hw_pwm[i] = GPIO.PWM(pin, pwm_frequency)
+        hw_pwm[i].start(0)
+    except (ValueError, RuntimeError, OSError):
+        hw_pwm[i] = None
+soft_pins = [i for i in range(len(PINS)) if hw_pwm[i] is None]
+print(f"Hardware PWM pins: {[pin for i, pin in enumerate(PINS) if hw_pwm[i] is not None]}")
+
+# Initialize timestamps and states for each pin; bit i of pin_mask is set
+# while PINS[i] is driven high
+pin_mask = 0
 period_start_time = time.time()
 
 try:
@@ -56,40 +89,50 @@ try:
         elif time_in_period >= period_duration:
             time_in_period = period_duration - 1e-6
 
-        # Update pin states based on duty cycle
-        for i, pin in enumerate(PINS):
+        # Update software-driven pin states based on duty cycle, tracking the
+        # next time any pin has to change: the end of the period or the earliest
+        # falling edge still ahead
+        next_edge_time = period_start_time + period_duration
+        desired_mask = 0
+        for i in soft_pins:
             high_time = (duty_cycles[i] / 100) * period_duration
             if time_in_period < high_time:
-                desired_state = GPIO.HIGH
-            else:
-                desired_state = GPIO.LOW
-
-            if pin_states[i] != desired_state:
-                GPIO.output(pin, desired_state)
-                pin_states[i] = desired_state
-
-        # Use select to check for available data without blocking
-        readable, _, _ = select.select([server_socket], [], [], 0)
+                desired_mask |= 1 << i
+                next_edge_time = min(next_edge_time, period_start_time + high_time)
+
+        # Write only the pins whose state changed, all in one GPIO.output call
+        changed = desired_mask ^ pin_mask
+        if changed:
+            channels = []
+            states = []
+            while changed:
+                lowest = changed & -changed
+                channels.append(PINS[lowest.bit_length() - 1])
+                states.append(GPIO.HIGH if desired_mask & lowest else GPIO.LOW)
+                changed ^= lowest
+            GPIO.output(channels, states)
+            pin_mask = desired_mask
+
+        # Sleep in select until the next edge is due or a packet arrives,
+        # rather than spinning with a zero timeout
+        timeout = max(0.0, next_edge_time - time.time())
+        readable, _, _ = select.select([server_socket], [], [], timeout)
         
         if readable:
             # Drain all available packets, keeping only the most recent
-            latest_data = None
-            while True:
-                try:
-                    # Attempt to read the next packet
-                    more_data, client_address = server_socket.recvfrom(NUM_DOUBLES * 8)
-                    latest_data = more_data
-                except BlockingIOError:
-                    # No more data available
-                    break
+            latest_data = reader.read()
             
             # Process only the most recent packet
             if latest_data is not None and len(latest_data) == NUM_DOUBLES * 8:
-                doubles = struct.unpack('d' * NUM_DOUBLES, latest_data)
+                doubles = UNPACK_DOUBLES(latest_data)
                 if int(doubles[0]) == SAFETY_BIT:
                     pwm_frequency = doubles[1]
                     period_duration = 1 / pwm_frequency
-                    duty_cycles = list(doubles[2:10])
+                    duty_cycles = [clamp_duty_cycle(duty_cycle) for duty_cycle in doubles[2:10]]
+                    for i, pwm in enumerate(hw_pwm):
+                        if pwm is not None:
+                            pwm.ChangeFrequency(pwm_frequency)
+                            pwm.ChangeDutyCycle(duty_cycles[i])
 
 except KeyboardInterrupt:
     for pin in PINS:
@@ -99,6 +142,9 @@ except KeyboardInterrupt:
     print("\nExiting...")
 
 finally:
+    for pwm in hw_pwm:
+        if pwm is not None:
+            pwm.stop()
     for pin in PINS:
         GPIO.setup(pin, GPIO.OUT)
         GPIO.output(pin, GPIO.LOW)
@@ -9,6 +9,53 @@ import os
 from dash.exceptions import PreventUpdate
 import time
 import math
+from functools import lru_cache
+
+try:
+    from dash import Patch
+except ImportError:
+    Patch = None
+    print("Dash Patch not available (needs Dash 2.9+). Sending the full animation figure every frame.")
+
+# Spacecraft outline for a unit square centered at the origin, closed by
+# repeating the first corner: bottom left, bottom right, top right, top left
+UNIT_CORNERS = np.array([
+    [-0.5, -0.5],
+    [0.5, -0.5],
+    [0.5, 0.5],
+    [-0.5, 0.5],
+    [-0.5, -0.5]
+])
+
+def encode_array(value):
+    """Pack a numeric array for dcc.Store as base64 bytes with its dtype and shape"""
+    array = np.ascontiguousarray(value)
+    return {
+        '__ndarray__': True,
+        'b64': base64.b64encode(array.tobytes()).decode('ascii'),
+        'dtype': array.dtype.str,
+        'shape': array.shape
+    }
+
+def decode_array(value):
+    """Inverse of encode_array; values that were not encoded are returned unchanged"""
+    if isinstance(value, dict) and value.get('__ndarray__'):
+        return np.frombuffer(base64.b64decode(value['b64']), dtype=value['dtype']).reshape(value['shape'])
+    return value
+
+def decode_array_item(value, index):
+    """Read element index of a flattened encode_array entry without decoding the rest"""
+    if not (isinstance(value, dict) and value.get('__ndarray__')):
+        return value[index]
+    dtype = np.dtype(value['dtype'])
+    start = index * dtype.itemsize
+    stop = start + dtype.itemsize
+    
+    # Every 4 base64 characters hold 3 bytes, so decode only the groups spanning the item
+    first_group = start // 3
+    last_group = -(-stop // 3)
+    chunk = base64.b64decode(value['b64'][4 * first_group:4 * last_group])
+    return np.frombuffer(chunk, dtype=dtype, count=1, offset=start - 3 * first_group)[0]
 
 # Initialize the Dash app
 app = dash.Dash(__name__, title="NPY Data Viewer")
@@ -138,11 +185,16 @@ def update_data(content, filename):
         if not isinstance(data_dict, dict):
             return None, [], True, html.Div("Error: Loaded file does not contain a dictionary.", style={'color': 'red'}), 100, None
         
-        # Convert data for JSON serialization (np arrays to lists)
+        # Convert data for JSON serialization; numeric arrays are stored as base64
+        # bytes rather than lists of Python floats, anything else as lists
         serializable_data = {}
         for key, value in data_dict.items():
             if isinstance(value, (np.ndarray, list)):
-                serializable_data[key] = np.array(value).tolist()
+                array = np.asarray(value)
+                if array.dtype.kind in 'biuf':
+                    serializable_data[key] = encode_array(array)
+                else:
+                    serializable_data[key] = array.tolist()
             else:
                 serializable_data[key] = value
         
@@ -151,8 +203,8 @@ def update_data(content, filename):
         
         # Get the length of position data for the slider
         data_length = 100  # Default value
-        if 'Chaser Px (m)' in serializable_data:
-            data_length = len(serializable_data['Chaser Px (m)']) - 1
+        if 'Chaser Px (m)' in data_dict:
+            data_length = len(data_dict['Chaser Px (m)']) - 1
         
         # Create marks for the slider at regular intervals
         slider_marks = {}
@@ -178,11 +230,12 @@ def update_plot(selected_key, data):
         return go.Figure()
     
     # Get time data if available, otherwise use indices
+    y_data = decode_array(data[selected_key])
     if 'time_s' in data:
-        x_data = data['time_s']
+        x_data = decode_array(data['time_s'])
         x_title = 'Time (s)'
     else:
-        x_data = list(range(len(data[selected_key])))
+        x_data = np.arange(len(y_data))
         x_title = 'Index'
     
     # Create the figure
@@ -190,7 +243,7 @@ def update_plot(selected_key, data):
     
     fig.add_trace(go.Scatter(
         x=x_data,
-        y=data[selected_key],
+        y=y_data,
         mode='lines',
         name=selected_key
     ))
@@ -258,16 +311,21 @@ def update_animation(n_intervals, slider_value, data, animation_state, interval_
     # Determine the current frame
     current_frame = slider_value
     if not interval_disabled and animation_state['is_running']:
-        data_length = len(data['Chaser Px (m)']) - 1
+        data_length = data['Chaser Px (m)']['shape'][0] - 1
         current_frame = (current_frame + 1) % (data_length + 1)
     
     # Get position data for current frame
-    px = data['Chaser Px (m)'][current_frame]
-    py = data['Chaser Py (m)'][current_frame]
-    rz = data['Chaser Rz (rad)'][current_frame]
-    
-    # Create the animation figure with spacecraft
-    fig = create_animation_figure(px, py, rz)
+    px = float(decode_array_item(data['Chaser Px (m)'], current_frame))
+    py = float(decode_array_item(data['Chaser Py (m)'], current_frame))
+    rz = float(decode_array_item(data['Chaser Rz (rad)'], current_frame))
+    
+    # Send the whole figure when new data arrives; on later frames the figure
+    # already holds the spacecraft traces, so only their coordinates are patched
+    trigger_ids = [t['prop_id'].split('.')[0] for t in callback_context.triggered]
+    if Patch is None or 'stored-data' in trigger_ids:
+        fig = create_animation_figure(px, py, rz)
+    else:
+        fig = patch_animation_figure(px, py, rz)
     
     # Status message
     status = html.Div(f"Frame: {current_frame}, Position: ({px:.2f}, {py:.2f}), Rotation: {rz:.2f} rad", 
@@ -304,74 +362,96 @@ def create_empty_animation():
     
     return fig
 
-def create_animation_figure(px, py, rz):
-    # Create figure with table
+def create_animation_base():
+    """Empty animation figure with the spacecraft, center and direction traces, as a dict"""
     fig = create_empty_animation()
     
-    # Define spacecraft size
-    spacecraft_size = 0.3
-    
-    # Calculate spacecraft corners based on position and rotation
-    corners = get_rotated_spacecraft_corners(px, py, rz, spacecraft_size)
-    
-    # Add spacecraft as a filled polygon
+    # Spacecraft as a filled polygon
     fig.add_trace(go.Scatter(
-        x=[corners[0][0], corners[1][0], corners[2][0], corners[3][0], corners[0][0]],
-        y=[corners[0][1], corners[1][1], corners[2][1], corners[3][1], corners[0][1]],
+        x=[], y=[],
         fill="toself",
         fillcolor="blue",
         line=dict(color="darkblue", width=2),
         name="Spacecraft"
     ))
     
-    # Add a marker for the center/origin of the spacecraft
+    # Marker for the center/origin of the spacecraft
     fig.add_trace(go.Scatter(
-        x=[px],
-        y=[py],
+        x=[], y=[],
         mode="markers",
         marker=dict(color="red", size=8),
         name="Center"
     ))
     
-    # Add a line showing the forward direction
-    forward_x = px + 0.2 * math.cos(rz)
-    forward_y = py + 0.2 * math.sin(rz)
+    # Line showing the forward direction
     fig.add_trace(go.Scatter(
-        x=[px, forward_x],
-        y=[py, forward_y],
+        x=[], y=[],
         mode="lines",
         line=dict(color="red", width=2),
         name="Direction"
     ))
     
-    return fig
+    return fig.to_dict()
 
-def get_rotated_spacecraft_corners(px, py, rz, size):
-    """Calculate the corners of the spacecraft after rotation"""
-    half_size = size / 2
-    
-    # Corners before rotation (centered at origin)
-    corners = [
-        [-half_size, -half_size],  # Bottom left
-        [half_size, -half_size],   # Bottom right
-        [half_size, half_size],    # Top right
-        [-half_size, half_size]    # Top left
-    ]
+# Layout, table and trace styles are the same for every frame, so they are built once
+ANIMATION_BASE = create_animation_base()
+
+def animation_coordinates(px, py, rz):
+    """x and y coordinates of the spacecraft outline, center and direction traces"""
+    # Define spacecraft size
+    spacecraft_size = 0.3
     
-    # Apply rotation and translation
-    rotated_corners = []
-    for x, y in corners:
-        # Rotate
-        x_rot = x * math.cos(rz) - y * math.sin(rz)
-        y_rot = x * math.sin(rz) + y * math.cos(rz)
-        
-        # Translate
-        x_final = x_rot + px
-        y_final = y_rot + py
-        
-        rotated_corners.append([x_final, y_final])
+    # Calculate spacecraft corners based on position and rotation
+    corners = get_rotated_spacecraft_corners(px, py, rz, spacecraft_size)
+    
+    # Calculate the end of the forward direction line
+    forward_x = px + 0.2 * math.cos(rz)
+    forward_y = py + 0.2 * math.sin(rz)
+    
+    return [
+        (corners[:, 0].tolist(), corners[:, 1].tolist()),
+        ([px], [py]),
+        ([px, forward_x], [py, forward_y])
+    ]
+
+def create_animation_figure(px, py, rz):
+    # Only the coordinates change per frame; the layout and the trace styles are
+    # shared with ANIMATION_BASE, which is never modified
+    return {
+        'data': [dict(trace, x=x, y=y)
+                 for trace, (x, y) in zip(ANIMATION_BASE['data'], animation_coordinates(px, py, rz))],
+        'layout': ANIMATION_BASE['layout']
+    }
+
+def patch_animation_figure(px, py, rz):
+    """Patch moving the traces of a figure from create_animation_figure to a new frame"""
+    patch = Patch()
+    for i, (x, y) in enumerate(animation_coordinates(px, py, rz)):
+        patch['data'][i]['x'] = x
+        patch['data'][i]['y'] = y
+    return patch
+
+@lru_cache(maxsize=8192)
+def _rotated_base_corners(rz, size):
+    """Closed spacecraft outline rotated about its center, cached per rotation angle"""
+    cos_rz = math.cos(rz)
+    sin_rz = math.sin(rz)
+    rotation_t = np.array([[cos_rz, sin_rz],
+                           [-sin_rz, cos_rz]])
+    
+    # Rotate all corners in one matrix product; the cached array is shared, so
+    # it is made read-only
+    corners = (size * UNIT_CORNERS) @ rotation_t
+    corners.flags.writeable = False
+    return corners
+
+def get_rotated_spacecraft_corners(px, py, rz, size):
+    """Calculate the closed outline of the spacecraft after rotation as a (5, 2) array"""
+    # Quantize the rotation to 1 mrad so smooth trajectories reuse cached corners
+    rotated_corners = _rotated_base_corners(round(float(rz), 3), size)
     
-    return rotated_corners
+    # Translate
+    return rotated_corners + (px, py)
 
 # Run the app
 if __name__ == '__main__':
@@ -1,8 +1,38 @@
+import sys
 import socket
 import struct
 import numpy as np
-from scipy.optimize import minimize
-import select
+from scipy.optimize import lsq_linear
+import time
+import os
+
+# Add the project root so the shared UDP helpers can be imported
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+
+from tools.udp import LatestPacketReader, POSE_STRUCT
+
+# Packet layouts, parsed once instead of on every packet
+UNPACK_POSE = POSE_STRUCT.unpack_from  # x, y (m) and yaw (rad), as the rigid body streamers send it
+PACK_COMMAND = struct.Struct('d' * 10).pack  # safety bit, PWM frequency, 8 duty cycles
+
+# Thruster layout. The force distribution matrix H maps the 8 duty cycles to the
+# body-frame force and torque; it only depends on the geometry, so it is built
+# once rather than per packet. It is the only allocation constant: BVLS takes no
+# initial guess and factors H itself, so no pseudo-inverse or step size is cached
+THRUSTER_DIST2_CG = np.array([64.335708595202250,-67.66429140479772,93.129636186598190,-51.370363813401790,70.664291404797720,-63.335708595202256,43.870363813401780,-85.629636186598220]).T
+THRUSTER_DIRECTIONS = np.array([[-1, -1, 0, 0, 1, 1, 0, 0],
+                                [0, 0, 1, 1, 0, 0, -1, -1]])
+THRUSTER_FORCE = 0.2825
+H = np.vstack((THRUSTER_DIRECTIONS, THRUSTER_DIST2_CG / 1000)) * (THRUSTER_FORCE / 2)
+DUTY_CYCLE_BOUNDS = (0, 100)
+
+# Kernel socket buffer sizes, overridable from the environment; a larger
+# receive buffer absorbs bursts instead of dropping packets
+UDP_RCVBUF = int(os.environ.get('PROXIPY_UDP_RCVBUF', 1 << 20))
+UDP_SNDBUF = int(os.environ.get('PROXIPY_UDP_SNDBUF', 1 << 20))
+
+PRINT_PERIOD = 1.0  # Seconds between status prints; printing every packet stalls the loop
 
 class SimpleController:
     def __init__(self, kp_pos, kd_pos, kp_att, kd_att):
@@ -18,8 +48,6 @@ class SimpleController:
         error_pos = [desired_pos[0] - current_pos[0], desired_pos[1] - current_pos[1]]
         error_att = desired_att - current_att
 
-        print(f"Error position: {error_pos}, error attitude: {error_att}")
-
         # Calculate derivative of errors
         d_error_pos = [(error_pos[0] - self.prev_error_pos[0]) / dt, (error_pos[1] - self.prev_error_pos[1]) / dt]
         d_error_att = (error_att - self.prev_error_att) / dt
@@ -39,91 +67,66 @@ class SimpleController:
 
 def udp_server(controller, desired_pos, desired_att, dt, udp_ip='', udp_port=53673):
     sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, UDP_RCVBUF)
     sock.bind((udp_ip, udp_port))
-    sock.setblocking(False)  # Set socket to non-blocking mode
+    reader = LatestPacketReader(sock, 1024)  # buffer size is 1024 bytes
 
     print(f"Listening for UDP packets on {udp_ip}:{udp_port}")
 
     udp_send_ip = "127.0.0.1"
     udp_send_port = 48291
     send_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    send_sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, UDP_SNDBUF)
+
+    # Fix the destination once so each send skips the per-packet address handling
+    send_sock.connect((udp_send_ip, udp_send_port))
 
+    last_print_time = 0.0
     while True:
-        # Use select to check for available data without blocking
-        readable, _, _ = select.select([sock], [], [], 0)
+        # Sleep until a packet arrives, then drain the queue, keeping only the most recent
+        latest_data = reader.read(block=True)
+
+        # Process only the most recent packet
+        pos_x, pos_y, current_att = UNPACK_POSE(latest_data)
+        current_pos = (pos_x, pos_y)
         
-        if readable:
-            # Drain all available packets, keeping only the most recent
-            latest_data = None
-            while True:
-                try:
-                    # Attempt to read the next packet
-                    data, addr = sock.recvfrom(1024)  # buffer size is 1024 bytes
-                    latest_data = data
-                except BlockingIOError:
-                    # No more data available
-                    break
-            
-            if latest_data is not None:
-                # Process only the most recent packet
-                current_pos = struct.unpack('ff', latest_data[:8])
-                current_att = struct.unpack('f', latest_data[8:12])[0]
-                
-                # Use a simple PD controller to calculate the forces
-                force_x, force_y, torque = controller.update(desired_pos, current_pos, desired_att, current_att, dt)
-                
-                # Calculate the duty cycles
-                duty_cycles = forces_to_duty_cycle(force_x, force_y, torque, current_att)
-
-                # Pack the duty cycles as doubles and send over UDP
-                safety_bit = 568471  # Example safety bit, set to 1 for safety enabled
-                pwm_freq = 5  # Example PWM frequency in Hz
-                message = struct.pack('d' * 10, safety_bit, pwm_freq, *duty_cycles)
-                send_sock.sendto(message, (udp_send_ip, udp_send_port))
-                print(f"Sent duty cycles: {duty_cycles}")
+        # Use a simple PD controller to calculate the forces
+        force_x, force_y, torque = controller.update(desired_pos, current_pos, desired_att, current_att, dt)
+        
+        # Calculate the duty cycles
+        duty_cycles = forces_to_duty_cycle(force_x, force_y, torque, current_att)
+
+        # Pack the duty cycles as doubles and send over UDP
+        safety_bit = 568471  # Example safety bit, set to 1 for safety enabled
+        pwm_freq = 5  # Example PWM frequency in Hz
+        message = PACK_COMMAND(safety_bit, pwm_freq, *duty_cycles)
+        try:
+            send_sock.send(message)
+        except ConnectionRefusedError:
+            # A connected UDP socket reports that nothing was listening for an
+            # earlier command; keep sending, the thruster interface may start later
+            pass
+
+        # Report the latest errors and command at most once per PRINT_PERIOD
+        now = time.monotonic()
+        if now - last_print_time >= PRINT_PERIOD:
+            print(f"Error position: {controller.prev_error_pos}, error attitude: {controller.prev_error_att}")
+            print(f"Sent duty cycles: {duty_cycles}")
+            last_print_time = now
 
 def forces_to_duty_cycle(force_x, force_y, torque, yaw):
 
-    THRUSTER_DIST2_CG = np.array([64.335708595202250,-67.66429140479772,93.129636186598190,-51.370363813401790,70.664291404797720,-63.335708595202256,43.870363813401780,-85.629636186598220]).T
-
     # Calculate rotation matrix
     C_bI = np.array([[np.cos(yaw), -np.sin(yaw)],
                       [np.sin(yaw), np.cos(yaw)]])
-    
-    # Calculate the body forces
-    F_b = C_bI @ np.array([force_x, force_y]) 
-
-    # Calculate the force distribution matrix, H
-    Vec1 = np.array([[-1],[-1],[0],[0],[1],[1],[0],[0]])
-    Vec2 = np.array([[0],[0],[1],[1],[0],[0],[-1],[-1]])
-    Vec3 = THRUSTER_DIST2_CG/1000
-
-    Mat1 = np.concatenate((Vec1, Vec2, np.reshape(Vec3,(8,1))), axis=1).T
-    Mat2 = np.diag(np.array([0.2825,0.2825,0.2825,0.2825,0.2825,0.2825,0.2825,0.2825])/2)
-
-    H = Mat1 @ Mat2
-
-    # Take the pinv of H
-    Hinv = np.linalg.pinv(H)
-
-    # Calculate the duty cycles
-    duty_cycles_initial = Hinv @ np.append(F_b, torque)
-    print(duty_cycles_initial)
-
-    Q = 2 * (H.T @ H)
-    c = -2 * H.T @ np.append(F_b, torque)
-    lb = np.zeros(8)
-    ub = np.ones(8)
-
-    # Define the objective function for the optimizer
-    def objective(duty_cycles):
-        return 0.5 * duty_cycles.T @ Q @ duty_cycles + c.T @ duty_cycles
 
-    # Define the bounds for the optimizer
-    bounds = [(0, 100) for _ in range(H.shape[1])]
+    # Calculate the body forces and torque; only these depend on the state
+    F_b = np.append(C_bI @ np.array([force_x, force_y]), torque)
 
-    # Solve for optimal duty cycles
-    result = minimize(objective, duty_cycles_initial, bounds=bounds, options={'maxiter': 20})
+    # Solve for optimal duty cycles. Minimizing 0.5 d^T Q d + c^T d with
+    # Q = 2 H^T H and c = -2 H^T F_b is the bounded least-squares problem
+    # min ||H d - F_b||^2, which BVLS solves exactly without a Python callback
+    result = lsq_linear(H, F_b, bounds=DUTY_CYCLE_BOUNDS, method='bvls')
 
     # Extract the duty cycles
     duty_cycles = result.x
@@ -3,14 +3,127 @@ from dash import dcc, html, Input, Output, State, callback_context
 import plotly.graph_objects as go
 import numpy as np
 import base64
-import io
+import hashlib
+from collections import OrderedDict
 import json
 import os
+import tempfile
 from dash.exceptions import PreventUpdate
 
+try:
+    from dash import Patch
+except ImportError:
+    Patch = None
+    print("Dash Patch not available (needs Dash 2.9+). Sending the full figure on every selection.")
+
+try:
+    import diskcache
+    from dash import DiskcacheManager
+except ImportError:
+    diskcache = None
+    print("diskcache not available. Uploaded files are parsed in the callback thread and not cached.")
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+    print("orjson not available. Serializing the uploaded data with json.")
+
+# Longest trace sent to the browser; longer series are decimated on the server
+MAX_PLOT_POINTS = 4000
+
+# Number of (file, key) plots whose arrays are kept for revisiting a selection
+PLOT_CACHE_SIZE = 32
+
+# Uploads are decoded in slices of this many base64 characters (a multiple of 4)
+B64_CHUNK_CHARS = 4 << 20
+
+# Decoded uploads larger than this spill from memory to a temporary file
+UPLOAD_SPOOL_BYTES = 64 << 20
+
+# Parsed uploads are cached next to this script, not in the working directory;
+# diskcache evicts the least recently used entries beyond this size
+UPLOAD_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache')
+UPLOAD_CACHE_BYTES = 1 << 30
+
+def decode_upload(content_string):
+    """Decode base64 upload contents a slice at a time into a temporary file"""
+    upload_file = tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_BYTES)
+    for start in range(0, len(content_string), B64_CHUNK_CHARS):
+        upload_file.write(base64.b64decode(content_string[start:start + B64_CHUNK_CHARS]))
+    upload_file.seek(0)
+    return upload_file
+
+def encode_array(value):
+    """Pack a numeric array for dcc.Store as base64 bytes with its dtype and shape"""
+    array = np.ascontiguousarray(value)
+    return {
+        '__ndarray__': True,
+        'b64': base64.b64encode(array.tobytes()).decode('ascii'),
+        'dtype': array.dtype.str,
+        'shape': array.shape
+    }
+
+def decode_array(value):
+    """Inverse of encode_array; values that were not encoded are returned unchanged"""
+    if isinstance(value, dict) and value.get('__ndarray__'):
+        return np.frombuffer(base64.b64decode(value['b64']), dtype=value['dtype']).reshape(value['shape'])
+    return value
+
+def downsample_minmax(x_data, y_data, n_out=MAX_PLOT_POINTS):
+    """Keep the minimum and maximum of each of n_out // 2 equal slices so peaks survive decimation"""
+    y = np.asarray(y_data)
+    if y.ndim != 1 or y.dtype.kind not in 'biuf' or len(y) <= n_out or len(x_data) != len(y):
+        return x_data, y_data
+    
+    bin_size = len(y) // (n_out // 2)
+    n_bins = len(y) // bin_size
+    bins = y[:n_bins * bin_size].reshape(n_bins, bin_size)
+    
+    # Both extremes of every slice, in time order, followed by the final sample
+    extremes = np.sort(np.stack((bins.argmin(axis=1), bins.argmax(axis=1)), axis=1), axis=1)
+    index = (extremes + (np.arange(n_bins) * bin_size)[:, None]).ravel()
+    index = np.append(index, len(y) - 1)
+    return np.asarray(x_data)[index], y[index]
+
+def to_builtin(value):
+    """JSON fallback: numeric arrays become encode_array entries, other numpy values builtins"""
+    if isinstance(value, np.ndarray) and value.dtype.kind in 'biuf':
+        return encode_array(value)
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps_data(data_dict):
+    """Serialize the loaded dictionary to a JSON string for dcc.Store"""
+    if orjson is not None:
+        # orjson hands every numpy value to to_builtin while writing, so the
+        # dictionary is encoded in a single pass without an intermediate copy
+        return orjson.dumps(data_dict, default=to_builtin, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(data_dict, default=to_builtin)
+
+def loads_data(payload):
+    """Parse a JSON string written by dumps_data"""
+    if orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
 # Initialize the Dash app
 app = dash.Dash(__name__, title="NPY Data Viewer")
 
+# Parsed uploads are kept on disk, keyed by a hash of the file contents, and
+# update_data runs as a background callback so it does not block the others
+if diskcache is not None:
+    upload_cache = diskcache.Cache(UPLOAD_CACHE_DIR, size_limit=UPLOAD_CACHE_BYTES)
+    upload_callback_options = dict(
+        background=True,
+        manager=DiskcacheManager(upload_cache),
+        running=[(Output('upload-data', 'disabled'), True, False)]
+    )
+else:
+    upload_cache = None
+    upload_callback_options = {}
+
 # App layout
 app.layout = html.Div([
     html.H1("NPY Data Viewer", style={'textAlign': 'center'}),
@@ -21,7 +134,7 @@ app.layout = html.Div([
             id='upload-data',
             children=html.Div([
                 'Drag and Drop or ',
-                html.A('Select a .npy File')
+                html.A('Select a .npz or .npy File')
             ]),
             style={
                 'width': '100%',
@@ -52,13 +165,17 @@ app.layout = html.Div([
     # Plot area
     dcc.Graph(id='time-series-plot'),
     
-    # Store the data
+    # Store the data, and a hash of the uploaded file identifying it
     dcc.Store(id='stored-data'),
+    dcc.Store(id='stored-data-id'),
+    
+    # Whether the plot currently holds a trace that can be patched
+    dcc.Store(id='plot-has-trace', data=False),
     
     # Footer
     html.Div([
         html.Hr(),
-        html.P("Data Viewer for simulation data stored in .npy files", 
+        html.P("Data Viewer for simulation data stored in .npz or .npy files", 
                style={'textAlign': 'center'})
     ])
 ], style={'maxWidth': '1200px', 'margin': '0 auto', 'padding': '20px'})
@@ -66,74 +183,130 @@ app.layout = html.Div([
 # Callback for uploading data
 @app.callback(
     [Output('stored-data', 'data'),
+     Output('stored-data-id', 'data'),
      Output('data-key-dropdown', 'options'),
      Output('data-key-dropdown', 'disabled'),
      Output('upload-status', 'children')],
     [Input('upload-data', 'contents')],
-    [State('upload-data', 'filename')]
+    [State('upload-data', 'filename')],
+    **upload_callback_options
 )
 def update_data(content, filename):
     if content is None:
-        return None, [], True, ""
+        return None, None, [], True, ""
     
     try:
-        # Decode the uploaded file
+        # Split the data URL header from the base64 file contents
         content_type, content_string = content.split(',')
-        decoded = base64.b64decode(content_string)
         
         # Check file extension
-        if not filename.endswith('.npy'):
-            return None, [], True, html.Div(f"Error: File must be a .npy file.", style={'color': 'red'})
+        if not filename.endswith(('.npz', '.npy')):
+            return None, None, [], True, html.Div(f"Error: File must be a .npz or .npy file.", style={'color': 'red'})
         
-        # Load the numpy array from the decoded content
-        with io.BytesIO(decoded) as f:
-            data_dict = np.load(f, allow_pickle=True).item()
+        # A file that was uploaded before is served from the cache without parsing
+        data_id = hashlib.blake2b(content_string.encode('ascii')).hexdigest()
+        cache_key = 'upload-' + data_id
+        if upload_cache is not None:
+            cached = upload_cache.get(cache_key)
+            if cached is not None:
+                payload, dropdown_options = cached
+                return payload, data_id, dropdown_options, False, html.Div(f"File '{filename}' loaded successfully!", style={'color': 'green'})
+        
+        # Load the numpy array from the decoded content; large files are decoded
+        # to disk so the whole decoded file never sits in memory next to the upload
+        with decode_upload(content_string) as f:
+            if filename.endswith('.npz'):
+                # One plain array per key (Storage.write_to_npz); no unpickling needed
+                with np.load(f) as npz:
+                    data_dict = {key: npz[key] for key in npz.files}
+            else:
+                # Legacy pickled dictionary (Storage.write_to_npy)
+                data_dict = np.load(f, allow_pickle=True).item()
         
         # Check if it's a dictionary
         if not isinstance(data_dict, dict):
-            return None, [], True, html.Div("Error: Loaded file does not contain a dictionary.", style={'color': 'red'})
+            return None, None, [], True, html.Div("Error: Loaded file does not contain a dictionary.", style={'color': 'red'})
         
-        # Convert data for JSON serialization (np arrays to lists)
-        serializable_data = {}
-        for key, value in data_dict.items():
-            if isinstance(value, (np.ndarray, list)):
-                serializable_data[key] = np.array(value).tolist()
-            else:
-                serializable_data[key] = value
+        # Serialize to a JSON string up front; numeric arrays are stored as
+        # base64 bytes rather than decimal text
+        payload = dumps_data(data_dict)
         
         # Create dropdown options from dictionary keys
         dropdown_options = [{'label': key, 'value': key} for key in data_dict.keys()]
         
-        return serializable_data, dropdown_options, False, html.Div(f"File '{filename}' loaded successfully!", style={'color': 'green'})
+        if upload_cache is not None:
+            upload_cache.set(cache_key, (payload, dropdown_options))
+        
+        return payload, data_id, dropdown_options, False, html.Div(f"File '{filename}' loaded successfully!", style={'color': 'green'})
     
     except Exception as e:
-        return None, [], True, html.Div(f"Error loading file: {str(e)}", style={'color': 'red'})
+        return None, None, [], True, html.Div(f"Error loading file: {str(e)}", style={'color': 'red'})
+
+# Plot arrays by (data_id, key), least recently used first
+plot_cache = OrderedDict()
+
+def get_plot_arrays(data, data_id, selected_key):
+    """Return the decimated x and y arrays and the x-axis title for one key, memoized per file"""
+    cache_key = (data_id, selected_key)
+    if data_id is not None and cache_key in plot_cache:
+        plot_cache.move_to_end(cache_key)
+        return plot_cache[cache_key]
+    
+    # The store holds the JSON string from update_data; parse it once
+    data = loads_data(data)
+    
+    # Get time data if available, otherwise use indices
+    y_data = decode_array(data[selected_key])
+    if 'time_s' in data:
+        x_data = np.asarray(decode_array(data['time_s']), dtype=np.float64)
+        x_title = 'Time (s)'
+    else:
+        x_data = np.arange(len(y_data))
+        x_title = 'Index'
+    
+    # Long series are reduced to MAX_PLOT_POINTS and drawn with WebGL
+    x_data, y_data = downsample_minmax(x_data, y_data)
+    
+    if data_id is not None:
+        plot_cache[cache_key] = (x_data, y_data, x_title)
+        if len(plot_cache) > PLOT_CACHE_SIZE:
+            plot_cache.popitem(last=False)
+    return x_data, y_data, x_title
 
 # Callback for updating the plot
 @app.callback(
-    Output('time-series-plot', 'figure'),
+    [Output('time-series-plot', 'figure'),
+     Output('plot-has-trace', 'data')],
     [Input('data-key-dropdown', 'value')],
-    [State('stored-data', 'data')]
+    [State('stored-data', 'data'),
+     State('stored-data-id', 'data'),
+     State('plot-has-trace', 'data')]
 )
-def update_plot(selected_key, data):
+def update_plot(selected_key, data, data_id, has_trace):
     if data is None or selected_key is None:
         # Return empty figure if no data or key selected
-        return go.Figure()
+        return go.Figure(), False
     
-    # Get time data if available, otherwise use indices
-    if 'time_s' in data:
-        x_data = data['time_s']
-        x_title = 'Time (s)'
-    else:
-        x_data = list(range(len(data[selected_key])))
-        x_title = 'Index'
+    x_data, y_data, x_title = get_plot_arrays(data, data_id, selected_key)
+    
+    # Once the trace exists only its data and the titles change, so the
+    # browser updates the plot in place instead of rebuilding it
+    if Patch is not None and has_trace:
+        patched = Patch()
+        patched['data'][0]['x'] = x_data
+        patched['data'][0]['y'] = y_data
+        patched['data'][0]['name'] = selected_key
+        patched['layout']['title']['text'] = f'{selected_key} vs {x_title}'
+        patched['layout']['xaxis']['title']['text'] = x_title
+        patched['layout']['yaxis']['title']['text'] = selected_key
+        return patched, True
     
     # Create the figure
     fig = go.Figure()
     
-    fig.add_trace(go.Scatter(
+    fig.add_trace(go.Scattergl(
         x=x_data,
-        y=data[selected_key],
+        y=y_data,
         mode='lines',
         name=selected_key
     ))
@@ -148,7 +321,7 @@ def update_plot(selected_key, data):
         margin=dict(l=50, r=50, t=80, b=50)
     )
     
-    return fig
+    return fig, True
 
 # Run the app
 if __name__ == '__main__':
@@ -1,26 +1,51 @@
-import os, time, ctypes, multiprocessing
+import os, time, ctypes, threading
+
+libc = ctypes.CDLL("libc.so.6", use_errno=True)
+SCHED_FIFO = 1
+CLOCK_MONOTONIC = 1
+TIMER_ABSTIME = 1
+CPU_CORE = 3  # Ideally a core isolated with the isolcpus kernel parameter
+PERIOD_NS = 200000000  # 0.2 s cycle
+
+class sched_param(ctypes.Structure):
+    _fields_ = [("sched_priority", ctypes.c_int)]
+
+class timespec(ctypes.Structure):
+    _fields_ = [("tv_sec", ctypes.c_long), ("tv_nsec", ctypes.c_long)]
+
+libc.pthread_self.restype = ctypes.c_ulong
+libc.pthread_setschedparam.argtypes = [ctypes.c_ulong, ctypes.c_int, ctypes.POINTER(sched_param)]
 
 def timing_task():
-    # Attempt to set real-time scheduling (SCHED_FIFO)
-    libc = ctypes.CDLL("libc.so.6")
-    SCHED_FIFO = 1
-    class sched_param(ctypes.Structure):
-        _fields_ = [("sched_priority", ctypes.c_int)]
+    # SCHED_FIFO applies per thread, so set it on this thread rather than the process
     param = sched_param()
     param.sched_priority = 99  # Use a high priority
-    if libc.sched_setscheduler(0, SCHED_FIFO, ctypes.byref(param)) != 0:
-        print("Warning: Could not set real-time scheduler.")
-    
+    err = libc.pthread_setschedparam(libc.pthread_self(), SCHED_FIFO, ctypes.byref(param))
+    if err != 0:
+        print(f"Warning: Could not set real-time scheduler: {os.strerror(err)}")
+
+    # With pid 0 the affinity also applies to the calling thread only
+    try:
+        os.sched_setaffinity(0, {CPU_CORE})
+    except (AttributeError, OSError, ValueError) as e:
+        print(f"Warning: Could not pin thread to CPU {CPU_CORE}: {e}")
+
     # Your timing-critical loop
+    deadline = time.monotonic_ns()
+    wake = timespec()
     while True:
         cycle_start = time.perf_counter()
         # Do your work here...
-        # Wait until the next cycle
-        time.sleep(0.2)  # Replace with your precise delay mechanism
+        # Sleep until the next absolute deadline, so the output shows the wake-up
+        # jitter rather than the drift of a relative sleep
+        deadline += PERIOD_NS
+        wake.tv_sec, wake.tv_nsec = divmod(deadline, 1000000000)
+        libc.clock_nanosleep(CLOCK_MONOTONIC, TIMER_ABSTIME, ctypes.byref(wake), None)
+        late_us = (time.monotonic_ns() - deadline) / 1000
         cycle_end = time.perf_counter()
-        print(f"Cycle took {cycle_end - cycle_start:.6f} s")
+        print(f"Cycle took {cycle_end - cycle_start:.6f} s (woke {late_us:.1f} us late)")
 
 if __name__ == '__main__':
-    p = multiprocessing.Process(target=timing_task)
-    p.start()
-    p.join()
+    t = threading.Thread(target=timing_task, daemon=False)
+    t.start()
+    t.join()
@@ -0,0 +1,59 @@
+import ctypes
+import errno
+from time import monotonic_ns, perf_counter_ns
+
+# Linux clock_nanosleep, used to sleep until an absolute CLOCK_MONOTONIC deadline
+CLOCK_MONOTONIC = 1
+TIMER_ABSTIME = 1
+
+# The last part of a precise delay is busy-waited to absorb the wake-up latency
+SPIN_TAIL_NS = 50000
+
+class timespec(ctypes.Structure):
+    _fields_ = [("tv_sec", ctypes.c_long), ("tv_nsec", ctypes.c_long)]
+
+# One libc handle for the delays and the real-time setup in tools.utils
+try:
+    libc = ctypes.CDLL("libc.so.6", use_errno=True)
+except OSError:
+    libc = None
+    print('libc not available, real-time scheduling is disabled.')
+
+try:
+    clock_nanosleep = libc.clock_nanosleep
+    clock_nanosleep.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.POINTER(timespec), ctypes.POINTER(timespec)]
+    clock_nanosleep.restype = ctypes.c_int
+except AttributeError:
+    clock_nanosleep = None
+    print('clock_nanosleep not available, precise delays will busy-wait.')
+
+def precise_delay_microsecond(delay_us):
+    """
+    Delays the execution of the program for a specified number of microseconds.
+
+    The bulk of the delay is slept with clock_nanosleep against an absolute
+    CLOCK_MONOTONIC deadline, which leaves the core free; only the final
+    SPIN_TAIL_NS are busy-waited to hide the wake-up latency. Where
+    clock_nanosleep is unavailable the whole delay is busy-waited.
+
+    Args:
+        delay_us (int): The delay duration in microseconds.
+
+    Returns:
+        None
+    """
+    delay_ns = int(delay_us * 1000)
+    # The spin runs on perf_counter_ns, the finest clock on every platform;
+    # monotonic_ns is only read for the deadline, since it is the
+    # CLOCK_MONOTONIC that clock_nanosleep sleeps against
+    target_time = perf_counter_ns() + delay_ns
+
+    if clock_nanosleep is not None and delay_ns > 2 * SPIN_TAIL_NS:
+        deadline = timespec(*divmod(monotonic_ns() + delay_ns - SPIN_TAIL_NS, 1000000000))
+        # ctypes drops the GIL for the call, so other threads run while this
+        # one sleeps; resume after a signal so the rest is not spun with the GIL held
+        while clock_nanosleep(CLOCK_MONOTONIC, TIMER_ABSTIME, ctypes.byref(deadline), None) == errno.EINTR:
+            pass
+
+    while perf_counter_ns() < target_time:
+        pass
@@ -0,0 +1,121 @@
+import socket
+import struct
+import ctypes
+
+# Layout of the (x, y, yaw) float triple the rigid body streamers send over UDP
+POSE_STRUCT = struct.Struct('fff')
+
+# Flag for a single non-blocking receive; 0 where the platform lacks it (Windows)
+MSG_DONTWAIT = getattr(socket, 'MSG_DONTWAIT', 0)
+
+# Linux message headers for the batched recvmmsg() calls
+class iovec(ctypes.Structure):
+    _fields_ = [("iov_base", ctypes.c_void_p), ("iov_len", ctypes.c_size_t)]
+
+class msghdr(ctypes.Structure):
+    _fields_ = [("msg_name", ctypes.c_void_p), ("msg_namelen", ctypes.c_uint32),
+                ("msg_iov", ctypes.POINTER(iovec)), ("msg_iovlen", ctypes.c_size_t),
+                ("msg_control", ctypes.c_void_p), ("msg_controllen", ctypes.c_size_t),
+                ("msg_flags", ctypes.c_int)]
+
+class mmsghdr(ctypes.Structure):
+    _fields_ = [("msg_hdr", msghdr), ("msg_len", ctypes.c_uint)]
+
+class LatestPacketReader:
+    """Drain every queued datagram from a UDP socket and keep the last.
+
+    On Linux up to batch datagrams are read per recvmmsg() call, so a backlog
+    costs one system call instead of one recvfrom() per stale packet. Elsewhere
+    the socket is drained with recvfrom() one datagram at a time.
+    """
+
+    def __init__(self, sock, bufsize, batch=32):
+        self.sock = sock
+        self.bufsize = bufsize
+        self.batch = batch
+
+        try:
+            self.recvmmsg = ctypes.CDLL("libc.so.6", use_errno=True).recvmmsg
+        except (OSError, AttributeError):
+            print("recvmmsg not available. Draining one packet per system call.")
+            self.recvmmsg = None
+            return
+
+        # One preallocated receive buffer and message header per batch slot
+        self.bufs = [ctypes.create_string_buffer(bufsize) for _ in range(batch)]
+        self.iovecs = (iovec * batch)()
+        self.msgs = (mmsghdr * batch)()
+        for i in range(batch):
+            self.iovecs[i].iov_base = ctypes.addressof(self.bufs[i])
+            self.iovecs[i].iov_len = bufsize
+            self.msgs[i].msg_hdr.msg_iov = ctypes.pointer(self.iovecs[i])
+            self.msgs[i].msg_hdr.msg_iovlen = 1
+
+    def read(self, block=False):
+        """Return the most recent datagram, or None if nothing was queued.
+
+        The socket stays in blocking mode and is drained with MSG_DONTWAIT, so
+        an empty queue costs one failed receive rather than a select() call
+        as well; where that flag does not exist the socket is switched to
+        non-blocking mode for the drain only. With block=True the call first
+        sleeps until a datagram arrives.
+        """
+        latest_data = None
+        if block:
+            latest_data, _ = self.sock.recvfrom(self.bufsize)
+
+        if self.recvmmsg is not None:
+            fd = self.sock.fileno()
+            while True:
+                n = self.recvmmsg(fd, self.msgs, self.batch, MSG_DONTWAIT, None)
+                if n <= 0:
+                    # EAGAIN: the queue is empty
+                    break
+                latest_data = self.bufs[n - 1].raw[:self.msgs[n - 1].msg_len]
+                if n < self.batch:
+                    break
+            return latest_data
+
+        if MSG_DONTWAIT:
+            return self._drain(latest_data, MSG_DONTWAIT)
+
+        # Windows has no MSG_DONTWAIT, so the socket is made non-blocking for
+        # the drain and then put back in its previous mode
+        timeout = self.sock.gettimeout()
+        self.sock.setblocking(False)
+        try:
+            return self._drain(latest_data, 0)
+        finally:
+            self.sock.settimeout(timeout)
+
+    def _drain(self, latest_data, flags):
+        """Read datagrams one at a time until the queue is empty."""
+        while True:
+            try:
+                latest_data, _ = self.sock.recvfrom(self.bufsize, flags)
+            except BlockingIOError:
+                # No more data available
+                break
+        return latest_data
+
+class PoseSender:
+    """Send poses as (x, y, yaw) datagrams over a connected UDP socket.
+
+    The socket must already be connected to its destination, so each send()
+    carries no address. Every pose is packed into the same preallocated
+    buffer and sent on its own, since the receivers keep only the latest
+    datagram.
+    """
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.payload = bytearray(POSE_STRUCT.size)
+
+    def send(self, x, y, yaw):
+        POSE_STRUCT.pack_into(self.payload, 0, x, y, yaw)
+        try:
+            self.sock.send(self.payload)
+        except ConnectionRefusedError:
+            # A connected UDP socket reports ICMP errors from earlier sends;
+            # the poses are best effort, so drop this one
+            pass
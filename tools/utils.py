@@ -1,4 +1,3 @@
-from time import perf_counter_ns
 import numpy as np
 import json
 from classes.Spacecraft import Spacecraft
@@ -6,12 +5,65 @@ from classes.Controllers import LinearQuadraticRegulator
 from classes.Storage import Storage
 import getpass
 import time
+import os
+import re
+import ctypes
+from functools import lru_cache
+from bisect import bisect_right
+
+# The libc handle is shared with the precise delays
+from tools.timing import libc, precise_delay_microsecond
 
 try:
     import Jetson.GPIO as GPIO
 except ImportError:
     print('Unable to import Jetson.GPIO, running in simulation mode.')
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+    print('orjson not available, parsing configuration files with json.')
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+    print('numba not available, logging data with plain NumPy.')
+
+# Board pin driving the air pucks, set up by the first enable_disable_pucks call
+PUCK_PIN = 11
+_puck_pin_ready = False
+
+# Platform ID of each spot user account; any other user runs in simulation mode
+PLATFORM_IDS = {'spot-red': 1, 'spot-black': 2, 'spot-blue': 3}
+
+# Exported column names of the fields logged for each spacecraft, in row order;
+# built once here and shared by every data container
+LOG_COLUMNS = {
+    name: {
+        f'{name}_state': tuple(f'{name.capitalize()} {col}' for col in
+                               ('Px (m)', 'Py (m)', 'Rz (rad)', 'Vx (m/s)', 'Vy (m/s)', 'Wz (rad/s)')),
+        f'{name}_duty': tuple(f'{name.capitalize()} Duty Cycle [{k}]' for k in range(1, 9)),
+        f'{name}_pwm': tuple(f'{name.capitalize()} PWM [{k}]' for k in range(1, 9)),
+        f'{name}_imu': tuple(f'{name.capitalize()} {col}' for col in
+                             ('Gyro X (rad/s)', 'Gyro Y (rad/s)', 'Gyro Z (rad/s)',
+                              'Accel X (m/s²)', 'Accel Y (m/s²)', 'Accel Z (m/s²)')),
+    }
+    for name in ('chaser', 'target', 'obstacle')
+}
+
+# [x, y, att, vx, vy, omega] of each spacecraft, reused on every control cycle
+_state_buf = np.zeros((3, 6))
+
+# Scheduling policy and memory lock flags for set_realtime_scheduling
+SCHED_FIFO = 1
+MCL_CURRENT = 1
+MCL_FUTURE = 2
+
+class sched_param(ctypes.Structure):
+    _fields_ = [("sched_priority", ctypes.c_int)]
+
 def handle_loop_timing(t_now, t_rt, latest_states, PERIOD, IS_EXPERIMENT, PLATFORM, IS_REALTIME):
 
     if IS_EXPERIMENT:
@@ -176,203 +228,235 @@ def set_platform_configuration(CHASER_ACTIVE, TARGET_ACTIVE, OBSTACLE_ACTIVE, PL
     return streamChaser, streamTarget, streamObstacle, imuChaser, imuTarget, imuObstacle
 
 def enable_disable_pucks(enable=False):
+    """
+    Set the air pucks on or off.
 
-    # Define the pin for the pucks
-    PIN = 11
-
-    GPIO.setmode(GPIO.BOARD)
-    GPIO.setwarnings(False)
-
-    if enable:
-
-        try:
+    The pin is configured on the first call only, since every GPIO.setup()
+    goes through sysfs and this is called on each control cycle of the
+    first phases.
+    """
+    global _puck_pin_ready
 
-            # Set a pucks to open
-            GPIO.setup(PIN, GPIO.OUT)
-            GPIO.output(PIN, GPIO.HIGH)
+    try:
 
-        except:
+        if not _puck_pin_ready:
+            GPIO.setmode(GPIO.BOARD)
+            GPIO.setwarnings(False)
+            GPIO.setup(PUCK_PIN, GPIO.OUT)
+            _puck_pin_ready = True
 
-            print("Unable to set the pucks to HIGH")
+        GPIO.output(PUCK_PIN, GPIO.HIGH if enable else GPIO.LOW)
 
-    else:
+    except Exception:
 
-        try:
+        # Configure the pin again on the next call, e.g. after a GPIO.cleanup()
+        _puck_pin_ready = False
+        print(f"Unable to set the pucks to {'HIGH' if enable else 'LOW'}")
 
-            # Set a pucks to open
-            GPIO.setup(PIN, GPIO.OUT)
-            GPIO.output(PIN, GPIO.LOW)
+def write_spacecraft_row(row, offset, state, duty, pwm, gx, gy, gz, ax, ay, az):
+    """
+    Write the columns of one spacecraft into a logged row, starting at offset.
 
-        except:
+    The block is laid out as in log_record_layout: the state, duty cycles,
+    PWM states, and IMU readings. Compiled with numba when it is available.
+    """
+    row[offset:offset + 6] = state
+    row[offset + 6:offset + 14] = duty
+    row[offset + 14:offset + 22] = pwm
+    row[offset + 22] = gx
+    row[offset + 23] = gy
+    row[offset + 24] = gz
+    row[offset + 25] = ax
+    row[offset + 26] = ay
+    row[offset + 27] = az
+
+if njit is not None:
+    write_spacecraft_row = njit(cache=True)(write_spacecraft_row)
+
+def make_data_logger(dataContainer, chaserControl, thrustersChaser, targetControl, thrustersTarget, obstacleControl, thrustersObstacle, CHASER_ACTIVE, TARGET_ACTIVE, OBSTACLE_ACTIVE):
+    """
+    Create the data logger of the control loop.
 
-            print("Unable to set the pucks to LOW")
+    The column offset, controller, and thrusters of each active spacecraft
+    are looked up once here, so logging a time step only loops over the
+    active spacecraft and writes their blocks into the next row of the
+    record.
 
-def handle_data_logging(t_now, latest_states, chaserControl, thrustersChaser, targetControl, thrustersTarget, obstacleControl, thrustersObstacle, chaserGyroAccel, targetGyroAccel, obstacleGyroAccel, dataContainer, CHASER_ACTIVE, TARGET_ACTIVE, OBSTACLE_ACTIVE):
-    """
-    Handle the data logging.
-    This function appends the current time and spacecraft states to the data container.
     Parameters
     ----------
-    t_now : float
-        The current time.
-    latest_states : dict
-        A dictionary containing the latest states of the chaser, target, and obstacle spacecraft.
-    chaserControl : LinearQuadraticRegulator
-        The controller for the chaser spacecraft.
-    thrustersChaser : Thrusters
-        The thrusters for the chaser spacecraft.
     dataContainer : Storage
-        Container for storing data.
+        Container for storing data, initialized with log_record_layout for
+        the same active spacecraft.
+    chaserControl, targetControl, obstacleControl : LinearQuadraticRegulator
+        The controllers, whose duty cycles are logged.
+    thrustersChaser, thrustersTarget, thrustersObstacle : Thrusters
+        The thrusters, whose ON/OFF states are logged.
+    CHASER_ACTIVE, TARGET_ACTIVE, OBSTACLE_ACTIVE : bool
+        Whether each spacecraft is logged.
+
     Returns
     -------
-    None
+    function
+        log_data(t_now, states, gyros), where states holds the [x, y, att,
+        vx, vy, omega] vector and gyros the IMU dictionary of the chaser,
+        target, and obstacle, in that order; inactive entries are ignored.
+    """
+    fields = dataContainer.record.dtype.fields
+
+    # (column offset, index into states and gyros, controller, thrusters)
+    agents = tuple(
+        (fields[f'{name}_state'][1] // 8, k, control, thrusters)
+        for k, (name, active, control, thrusters) in enumerate((
+            ('chaser', CHASER_ACTIVE, chaserControl, thrustersChaser),
+            ('target', TARGET_ACTIVE, targetControl, thrustersTarget),
+            ('obstacle', OBSTACLE_ACTIVE, obstacleControl, thrustersObstacle)))
+        if active
+    )
+
+    # Compile write_spacecraft_row now, with the argument types of the real
+    # calls, so the first control tick does not pay for the Numba compile
+    scratch_row = np.zeros(dataContainer.table.shape[1])
+    scratch_state = np.zeros(6)
+    for offset, k, control, thrusters in agents:
+        write_spacecraft_row(scratch_row, offset, scratch_state, control.dutyCycle, thrusters.states,
+                             0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+
+    def log_data(t_now, states, gyros):
+        row = dataContainer.next_row()
+        row[0] = t_now
+
+        for offset, k, control, thrusters in agents:
+            gyro = gyros[k]
+            write_spacecraft_row(row, offset, states[k], control.dutyCycle, thrusters.states,
+                                 gyro['gx'], gyro['gy'], gyro['gz'], gyro['ax'], gyro['ay'], gyro['az'])
+
+    return log_data
+
+def log_record_layout(CHASER_ACTIVE, TARGET_ACTIVE, OBSTACLE_ACTIVE):
     """
+    Build the layout of one logged time step for the active spacecraft.
 
-    # Instead of multiple individual appends:
+    Parameters
+    ----------
+    CHASER_ACTIVE, TARGET_ACTIVE, OBSTACLE_ACTIVE : bool
+        Whether each spacecraft is logged.
 
-    batch_data_general = {
-            'Time (s)': t_now
-    }
-    if CHASER_ACTIVE:
-        batch_data_chaser = {
-            'Chaser Px (m)': latest_states.get("chaser")['pos'][0],
-            'Chaser Py (m)': latest_states.get("chaser")['pos'][1],
-            'Chaser Rz (rad)': latest_states.get("chaser")['att'],
-            'Chaser Vx (m/s)': latest_states.get("chaser")['vel'][0],
-            'Chaser Vy (m/s)': latest_states.get("chaser")['vel'][1],
-            'Chaser Wz (rad/s)': latest_states.get("chaser")['omega'],
-            'Chaser Duty Cycle [1]': chaserControl.dutyCycle[0],
-            'Chaser Duty Cycle [2]': chaserControl.dutyCycle[1],
-            'Chaser Duty Cycle [3]': chaserControl.dutyCycle[2],
-            'Chaser Duty Cycle [4]': chaserControl.dutyCycle[3],
-            'Chaser Duty Cycle [5]': chaserControl.dutyCycle[4],
-            'Chaser Duty Cycle [6]': chaserControl.dutyCycle[5],
-            'Chaser Duty Cycle [7]': chaserControl.dutyCycle[6],
-            'Chaser Duty Cycle [8]': chaserControl.dutyCycle[7],
-            'Chaser PWM [1]': thrustersChaser.get_state(1),
-            'Chaser PWM [2]': thrustersChaser.get_state(2),
-            'Chaser PWM [3]': thrustersChaser.get_state(3),
-            'Chaser PWM [4]': thrustersChaser.get_state(4),
-            'Chaser PWM [5]': thrustersChaser.get_state(5),
-            'Chaser PWM [6]': thrustersChaser.get_state(6),
-            'Chaser PWM [7]': thrustersChaser.get_state(7),
-            'Chaser PWM [8]': thrustersChaser.get_state(8),
-            'Chaser Gyro X (rad/s)': chaserGyroAccel['gx'],
-            'Chaser Gyro Y (rad/s)': chaserGyroAccel['gy'],
-            'Chaser Gyro Z (rad/s)': chaserGyroAccel['gz'],
-            'Chaser Accel X (m/s²)': chaserGyroAccel['ax'],
-            'Chaser Accel Y (m/s²)': chaserGyroAccel['ay'],
-            'Chaser Accel Z (m/s²)': chaserGyroAccel['az']
-        }
+    Returns
+    -------
+    tuple
+        The structured dtype of a row, and a dictionary mapping each of its
+        fields to the column names the field is exported under.
+    """
+    fields = [('t', 'f8')]
+    columns = {'t': ('Time (s)',)}
 
-    else:
+    for name, active in (('chaser', CHASER_ACTIVE), ('target', TARGET_ACTIVE), ('obstacle', OBSTACLE_ACTIVE)):
+        if active:
+            # Everything is stored as float64, like the per-key arrays of Storage
+            for field, names in LOG_COLUMNS[name].items():
+                fields.append((field, 'f8', len(names)))
+                columns[field] = names
 
-        batch_data_chaser = {}
-
-    if TARGET_ACTIVE:
-
-        batch_data_target = {
-            'Target Px (m)': latest_states.get("target")['pos'][0],
-            'Target Py (m)': latest_states.get("target")['pos'][1],
-            'Target Rz (rad)': latest_states.get("target")['att'],
-            'Target Vx (m/s)': latest_states.get("target")['vel'][0],
-            'Target Vy (m/s)': latest_states.get("target")['vel'][1],
-            'Target Wz (rad/s)': latest_states.get("target")['omega'],
-            'Target Duty Cycle [1]': targetControl.dutyCycle[0],
-            'Target Duty Cycle [2]': targetControl.dutyCycle[1],
-            'Target Duty Cycle [3]': targetControl.dutyCycle[2],
-            'Target Duty Cycle [4]': targetControl.dutyCycle[3],
-            'Target Duty Cycle [5]': targetControl.dutyCycle[4],
-            'Target Duty Cycle [6]': targetControl.dutyCycle[5],
-            'Target Duty Cycle [7]': targetControl.dutyCycle[6],
-            'Target Duty Cycle [8]': targetControl.dutyCycle[7],
-            'Target PWM [1]': thrustersTarget.get_state(1),
-            'Target PWM [2]': thrustersTarget.get_state(2),
-            'Target PWM [3]': thrustersTarget.get_state(3),
-            'Target PWM [4]': thrustersTarget.get_state(4),
-            'Target PWM [5]': thrustersTarget.get_state(5),
-            'Target PWM [6]': thrustersTarget.get_state(6),
-            'Target PWM [7]': thrustersTarget.get_state(7),
-            'Target PWM [8]': thrustersTarget.get_state(8),
-            'Target Gyro X (rad/s)': targetGyroAccel['gx'],
-            'Target Gyro Y (rad/s)': targetGyroAccel['gy'],
-            'Target Gyro Z (rad/s)': targetGyroAccel['gz'],
-            'Target Accel X (m/s²)': targetGyroAccel['ax'],
-            'Target Accel Y (m/s²)': targetGyroAccel['ay'],
-            'Target Accel Z (m/s²)': targetGyroAccel['az']
-        }
+    return np.dtype(fields), columns
 
-    else:
+def get_current_locations_exp(stream_processor, CHASER_ACTIVE, TARGET_ACTIVE, OBSTACLE_ACTIVE):
+    """
+    Get the current state vectors of the spacecraft from the PhaseSpace stream.
 
-        batch_data_target = {}
-
-    if OBSTACLE_ACTIVE:
-
-        batch_data_obstacle = {
-            'Obstacle Px (m)': latest_states.get("obstacle")['pos'][0],
-            'Obstacle Py (m)': latest_states.get("obstacle")['pos'][1],
-            'Obstacle Rz (rad)': latest_states.get("obstacle")['att'],
-            'Obstacle Vx (m/s)': latest_states.get("obstacle")['vel'][0],
-            'Obstacle Vy (m/s)': latest_states.get("obstacle")['vel'][1],
-            'Obstacle Wz (rad/s)': latest_states.get("obstacle")['omega'],
-            'Obstacle Duty Cycle [1]': obstacleControl.dutyCycle[0],
-            'Obstacle Duty Cycle [2]': obstacleControl.dutyCycle[1],
-            'Obstacle Duty Cycle [3]': obstacleControl.dutyCycle[2],
-            'Obstacle Duty Cycle [4]': obstacleControl.dutyCycle[3],
-            'Obstacle Duty Cycle [5]': obstacleControl.dutyCycle[4],
-            'Obstacle Duty Cycle [6]': obstacleControl.dutyCycle[5],
-            'Obstacle Duty Cycle [7]': obstacleControl.dutyCycle[6],
-            'Obstacle Duty Cycle [8]': obstacleControl.dutyCycle[7],
-            'Obstacle PWM [1]': thrustersObstacle.get_state(1),
-            'Obstacle PWM [2]': thrustersObstacle.get_state(2),
-            'Obstacle PWM [3]': thrustersObstacle.get_state(3),
-            'Obstacle PWM [4]': thrustersObstacle.get_state(4),
-            'Obstacle PWM [5]': thrustersObstacle.get_state(5),
-            'Obstacle PWM [6]': thrustersObstacle.get_state(6),
-            'Obstacle PWM [7]': thrustersObstacle.get_state(7),
-            'Obstacle PWM [8]': thrustersObstacle.get_state(8),
-            'Obstacle Gyro X (rad/s)': obstacleGyroAccel['gx'],
-            'Obstacle Gyro Y (rad/s)': obstacleGyroAccel['gy'],
-            'Obstacle Gyro Z (rad/s)': obstacleGyroAccel['gz'],
-            'Obstacle Accel X (m/s²)': obstacleGyroAccel['ax'],
-            'Obstacle Accel Y (m/s²)': obstacleGyroAccel['ay'],
-            'Obstacle Accel Z (m/s²)': obstacleGyroAccel['az']
-        }
+    The stream keeps the states as one (3, 6) array, which is copied into a
+    buffer shared across calls instead of building new arrays every control
+    cycle, so the returned vectors are only valid until the next call.
 
-    else:
+    Parameters
+    ----------
+    stream_processor : OwlStreamProcessor
+        The PhaseSpace stream of this platform.
+    CHASER_ACTIVE, TARGET_ACTIVE, OBSTACLE_ACTIVE : bool
+        Whether each spacecraft is tracked; inactive spacecraft get a zero state.
 
-        batch_data_obstacle = {}
+    Returns
+    -------
+    tuple
+        The latest states dictionary from the same snapshot, followed by the
+        [x, y, att, vx, vy, omega] states of the chaser, target, and obstacle.
+    """
+    state, _, latest_states = stream_processor.get_matrix(out=_state_buf)
 
-    # Merge the dictionaries
-    batch_data = {**batch_data_general, **batch_data_chaser, **batch_data_target, **batch_data_obstacle}
+    for row, active in zip(state, (CHASER_ACTIVE, TARGET_ACTIVE, OBSTACLE_ACTIVE)):
+        if not active:
+            row.fill(0.0)
 
-    # Append the data to the container
-    dataContainer.append_data_batch(batch_data)
+    return latest_states, state[0], state[1], state[2]
 
+@lru_cache(maxsize=1)
 def get_platform_id():
     """
-    Get the platform ID from the system time.
+    Get the platform ID from the username.
 
-    This function generates a platform ID based on username.
+    This function maps the spot user account to its platform ID through
+    PLATFORM_IDS. The user does not change while the program runs, so
+    getpass.getuser() is only called once and the result is cached.
 
     Returns:
-        str: The platform ID.
+        int: The platform ID (1 red, 2 black, 3 blue), or 0 for any other user.
     """
     platform_name = getpass.getuser()
+    whoami = PLATFORM_IDS.get(platform_name, 0)
 
-    if platform_name == 'spot-red':
-        whoami = 1
-    elif platform_name == 'spot-black':
-        whoami = 2
-    elif platform_name == 'spot-blue':
-        whoami = 3
-    else:
-        whoami = 0
+    if whoami == 0:
         print(f"Unknown platform: {platform_name}, running in simulation mode.")
 
     return whoami
 
-def class_init(PERIOD):
+@lru_cache(maxsize=None)
+def load_config(path):
+    """
+    Parse a JSON configuration file, caching the result per path.
+
+    The returned dictionary is shared between calls and must not be modified.
+    """
+    with open(path, 'rb') as f:
+        content = f.read()
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+def config_array(config, key):
+    """
+    Return the 'value' list of a configuration entry as a float64 array.
+    """
+    return np.asarray(config[key]['value'], dtype=np.float64)
+
+def load_spacecraft_params(path, prefix):
+    """
+    Read the parameters of one spacecraft from its JSON configuration file.
+
+    Parameters
+    ----------
+    path : str
+        Path of the configuration file.
+    prefix : str
+        Prefix of the parameter names, e.g. 'CHASER'.
+
+    Returns
+    -------
+    dict
+        The mass and inertia as floats, and the drop, initial, and home
+        states and thruster geometry and forces as float64 arrays.
+    """
+    config = load_config(path)
+
+    return {
+        f'{prefix}_MASS': float(config['mass']['value']),
+        f'{prefix}_INERTIA': float(config['inertia']['value']),
+        f'{prefix}_DROP': config_array(config, 'drop_states'),
+        f'{prefix}_INIT': config_array(config, 'init_states'),
+        f'{prefix}_HOME': config_array(config, 'home_states'),
+        f'{prefix}_THRUST_DIST2CG': config_array(config, 'thruster_dist2CG'),
+        f'{prefix}_THRUST_F': config_array(config, 'thruster_force'),
+    }
+
+def class_init(PERIOD, CHASER_ACTIVE=True, TARGET_ACTIVE=True, OBSTACLE_ACTIVE=True, DURATION=None):
     """
     Initialize spacecraft models, controllers, and data storage based on configuration files.
     This function reads spacecraft parameters from JSON configuration files, creates spacecraft
@@ -382,6 +466,11 @@ def class_init(PERIOD):
     ----------
     PERIOD : float
         The time step for the controller simulation.
+    CHASER_ACTIVE, TARGET_ACTIVE, OBSTACLE_ACTIVE : bool
+        Which spacecraft get columns in the data storage.
+    DURATION : float, optional
+        The length of the run in seconds, used to size the data storage so it
+        never has to grow during the run.
     Returns
     -------
     tuple
@@ -415,52 +504,18 @@ def class_init(PERIOD):
     Each spacecraft is initialized with default zero velocity and angular velocity.
     """
 
-    # Load the JSON file
-    with open('config/chaser.json') as f:
-        chaser_json = json.load(f)
-    
-    with open('config/target.json') as f:
-        target_json = json.load(f)
-    
-    with open('config/obstacle.json') as f:
-        obstacle_json = json.load(f)
-
-    # Create a dictionary to store the parameters
-    chaser_params = {}
-    target_params = {}
-    obstacle_params = {}
-
-    # Convert the mass and inertia and store 
-    chaser_params['CHASER_MASS'] = float(chaser_json['mass']['value'])
-    chaser_params['CHASER_INERTIA'] = float(chaser_json['inertia']['value'])
-    chaser_params['CHASER_DROP'] = [float(value) for value in chaser_json['drop_states']['value']]
-    chaser_params['CHASER_INIT'] = [float(value) for value in chaser_json['init_states']['value']]
-    chaser_params['CHASER_HOME'] = [float(value) for value in chaser_json['home_states']['value']]
-    chaser_params['CHASER_THRUST_DIST2CG'] = [float(value) for value in chaser_json['thruster_dist2CG']['value']]
-    chaser_params['CHASER_THRUST_F'] = [float(value) for value in chaser_json['thruster_force']['value']]
-
-    target_params['TARGET_MASS'] = float(target_json['mass']['value'])
-    target_params['TARGET_INERTIA'] = float(target_json['inertia']['value'])
-    target_params['TARGET_DROP'] = [float(value) for value in target_json['drop_states']['value']]
-    target_params['TARGET_INIT'] = [float(value) for value in target_json['init_states']['value']]
-    target_params['TARGET_HOME'] = [float(value) for value in target_json['home_states']['value']]
-    target_params['TARGET_THRUST_DIST2CG'] = [float(value) for value in target_json['thruster_dist2CG']['value']]
-    target_params['TARGET_THRUST_F'] = [float(value) for value in target_json['thruster_force']['value']]
-
-    obstacle_params['OBSTACLE_MASS'] = float(obstacle_json['mass']['value'])
-    obstacle_params['OBSTACLE_INERTIA'] = float(obstacle_json['inertia']['value'])
-    obstacle_params['OBSTACLE_DROP'] = [float(value) for value in obstacle_json['drop_states']['value']]
-    obstacle_params['OBSTACLE_INIT'] = [float(value) for value in obstacle_json['init_states']['value']]
-    obstacle_params['OBSTACLE_HOME'] = [float(value) for value in obstacle_json['home_states']['value']]
-    obstacle_params['OBSTACLE_THRUST_DIST2CG'] = [float(value) for value in obstacle_json['thruster_dist2CG']['value']]
-    obstacle_params['OBSTACLE_THRUST_F'] = [float(value) for value in obstacle_json['thruster_force']['value']]
+    # Load the JSON files; they are only read from disk and parsed once per process
+    chaser_params = load_spacecraft_params('config/chaser.json', 'CHASER')
+    target_params = load_spacecraft_params('config/target.json', 'TARGET')
+    obstacle_params = load_spacecraft_params('config/obstacle.json', 'OBSTACLE')
 
     print('Initializing spacecraft and controller classes...')
 
-    # Initialize the spacecraft class
+    # Initialize the spacecraft class; the positions are converted to lists so
+    # that the models update their own copies rather than views of the params
     chaserModel = Spacecraft(mass=chaser_params['CHASER_MASS'], 
                              inertia=chaser_params['CHASER_INERTIA'],
-                             position=chaser_params['CHASER_DROP'][:2], 
+                             position=chaser_params['CHASER_DROP'][:2].tolist(), 
                              attitude=chaser_params['CHASER_DROP'][2],
                              velocity=[0, 0],
                              angular_velocity=0,
@@ -468,7 +523,7 @@ def class_init(PERIOD):
                              
     targetModel = Spacecraft(mass=target_params['TARGET_MASS'],
                              inertia=target_params['TARGET_INERTIA'],
-                             position=target_params['TARGET_DROP'][:2],
+                             position=target_params['TARGET_DROP'][:2].tolist(),
                              attitude=target_params['TARGET_DROP'][2],
                              velocity=[0, 0],
                              angular_velocity=0,
@@ -476,7 +531,7 @@ def class_init(PERIOD):
                              
     obstacleModel = Spacecraft(mass=obstacle_params['OBSTACLE_MASS'],
                                inertia=obstacle_params['OBSTACLE_INERTIA'],
-                               position=obstacle_params['OBSTACLE_DROP'][:2],
+                               position=obstacle_params['OBSTACLE_DROP'][:2].tolist(),
                                attitude=obstacle_params['OBSTACLE_DROP'][2],
                                velocity=[0, 0],
                                angular_velocity=0,
@@ -506,8 +561,14 @@ def class_init(PERIOD):
     targetControl.solve()
     obstacleControl.solve()
 
-    # Initialize the data storage
-    dataContainer = Storage()
+    # Initialize the data storage with one record row per time step; with a
+    # known duration all rows are allocated up front, plus a 10% margin for
+    # experiments whose loop runs slightly faster than PERIOD
+    if DURATION is not None:
+        dataContainer = Storage(expected_size=int(np.ceil(1.1 * DURATION / PERIOD)) + 1)
+    else:
+        dataContainer = Storage()
+    dataContainer.initialize_record(*log_record_layout(CHASER_ACTIVE, TARGET_ACTIVE, OBSTACLE_ACTIVE))
 
     return chaserModel, targetModel, obstacleModel, chaserControl, targetControl, obstacleControl, dataContainer, chaser_params, target_params, obstacle_params
 
@@ -519,52 +580,94 @@ def create_phase_tracker(phases):
         phases (dict): A dictionary containing phase durations with keys like 'PHASE_0_DURATION'
     
     Returns:
-        function: A function that takes the current time and prints phase transitions
+        function: A function that takes the current time, prints phase transitions,
+            and returns the current phase (-1 before the first one starts)
+        function: A function that checks whether a given phase is the current one
     """
-    # Calculate phase transition points
-    transition_points = {}
+    # Start time of each phase, in phase order; the keys are ordered by their
+    # phase number, as sorting them as strings puts PHASE_10 before PHASE_2
+    start_times = []
     current_time = 0
     
-    for i, phase_key in enumerate(sorted(phases.keys())):
+    for phase_key in sorted(phases, key=lambda key: int(re.match(r'PHASE_(\d+)_DURATION', key).group(1))):
+        start_times.append(current_time)
         current_time += phases[phase_key]
-        transition_points[i] = current_time - phases[phase_key]  # Start time of each phase
+    
+    # Last printed phase and the start time of the phase after it, kept in
+    # cells shared by both closures
+    last_phase = [-1]
+    next_start = [float('-inf')]
     
     # Create a closure to track the current phase
     def track_phase(current_time):
-        # Static variable to keep track of the last printed phase
-        if not hasattr(track_phase, 'last_phase'):
-            track_phase.last_phase = -1
-        
-        # Determine current phase
-        current_phase = None
-        for phase, start_time in transition_points.items():
-            if current_time >= start_time:
-                current_phase = phase
+        # Nothing can change before the next phase starts, which is true on
+        # almost every call, so skip the search
+        if current_time < next_start[0]:
+            return last_phase[0]
+
+        # The current phase is the last one that has started; bisect finds it
+        # in O(log K) with C-level comparisons
+        current_phase = bisect_right(start_times, current_time) - 1
                 
         # Print phase transition if it's a new phase
-        if current_phase is not None and current_phase > track_phase.last_phase:
+        if current_phase > last_phase[0]:
             print(f"=== STARTING PHASE {current_phase} (t = {current_time:.2f} s) ===")
-            track_phase.last_phase = current_phase
+            last_phase[0] = current_phase
+            next_start[0] = start_times[current_phase + 1] if current_phase + 1 < len(start_times) else float('inf')
+
+        return last_phase[0]
 
     def is_phase(phase):
-        return track_phase.last_phase == phase
+        return last_phase[0] == phase
             
     return track_phase, is_phase
 
-def precise_delay_microsecond(delay_us):
+def set_realtime_scheduling(cpu_core=3, priority=80):
     """
-    Delays the execution of the program for a specified number of microseconds.
+    Pins the calling process to a single CPU core and raises it to SCHED_FIFO.
+
+    The control loop has a hard 20 Hz deadline, and the default scheduler can
+    preempt the Python process for 10+ ms. Pinning to a core isolated with
+    the isolcpus kernel parameter and running at a real-time priority keeps
+    those preemptions away from the loop, and locking all current and future
+    pages in RAM keeps page faults out of it. These steps require root, so
+    any failure is reported and the loop continues with the default scheduler.
 
-    This function uses a busy-wait loop to achieve a precise delay. It calculates
-    the target time in nanoseconds and continuously checks the current time until
-    the target time is reached.
+    On the Jetson, the core is isolated by adding "isolcpus=3 threadirqs" to
+    the APPEND line of /boot/extlinux/extlinux.conf; threadirqs turns
+    interrupt handlers into threads that the SCHED_FIFO loop can outrank.
 
     Args:
-        delay_us (int): The delay duration in microseconds.
+        cpu_core (int): The (ideally isolated) CPU core to pin the process to.
+        priority (int): The SCHED_FIFO priority (1-99).
 
     Returns:
-        None
+        tuple: (pinned, realtime, locked) flags, True where the CPU affinity,
+            the SCHED_FIFO policy and the memory lock were applied.
     """
-    target_time = perf_counter_ns() + delay_us * 1000
-    while perf_counter_ns() < target_time:
-        pass
\ No newline at end of file
+    pinned = realtime = locked = False
+
+    try:
+        os.sched_setaffinity(0, {cpu_core})
+        pinned = True
+    except (AttributeError, OSError, ValueError) as e:
+        print(f"Warning: Could not pin process to CPU {cpu_core}: {e}")
+
+    if libc is None:
+        print("Real-time scheduling not available: libc could not be loaded")
+        return pinned, realtime, locked
+
+    param = sched_param(priority)
+    if libc.sched_setscheduler(0, SCHED_FIFO, ctypes.byref(param)) == 0:
+        realtime = True
+    else:
+        print(f"Warning: Could not set real-time scheduler: {os.strerror(ctypes.get_errno())}")
+
+    # Independent of the scheduler; either can fail on its own limits
+    # (RLIMIT_RTPRIO, RLIMIT_MEMLOCK)
+    if libc.mlockall(MCL_CURRENT | MCL_FUTURE) == 0:
+        locked = True
+    else:
+        print(f"Warning: Could not lock memory: {os.strerror(ctypes.get_errno())}")
+
+    return pinned, realtime, locked